@@ -22,8 +22,10 @@ import time
 from datetime import date
 
 import polars as pl
+import polars.selectors as cs
 
 from utils.logger import get_logger
+from utils.quantiles import sorted_median, sorted_quantile
 
 logger = get_logger(__name__)
 
@@ -39,128 +41,262 @@ TIME_SPANS = {
     "all": None,
 }
 
+# Parquet row-group sizes: smaller groups for parcels so readers filtering on
+# code_departement can skip most of the file using row-group statistics
+DEFAULT_ROW_GROUP_SIZE = 262_144
+ROW_GROUP_SIZES = {"parcel": 65_536}
+
+
+# Price columns summarised with mean and quartiles (q25, median, q75)
+QUARTILE_COLS = ["prix_m2", "prix_m2_maison", "prix_m2_appart"]
+
+# Input columns read by price_stats_exprs; each level selects these plus its
+# keys so only the needed parquet columns are decoded
+PRICE_STATS_COLUMNS = [
+    "type_local",
+    "prix_m2", "prix_m2_maison", "prix_m2_appart",
+    "prix_m2_ajuste", "prix_m2_ajuste_maison", "prix_m2_ajuste_appart",
+]
+
+# Columns decoded once from the processed parquet for all levels and spans:
+# every level's keys plus the inputs of the per-type price columns
+SPAN_SOURCE_COLUMNS = [
+    "date_mutation", "type_local", "prix_m2", "prix_m2_ajuste",
+    "code_region", "nom_region", "code_departement",
+    "code_commune", "nom_commune", "code_iris", "nom_iris", "id_parcelle_unique",
+]
+
 
 def price_stats_exprs() -> list[pl.Expr]:
-    """Return standard price statistics expressions for aggregation."""
+    """Return standard price statistics expressions for aggregation.
+    
+    Expects the per-type price columns added by get_filtered_scan
+    (prix_m2_maison, prix_m2_appart and their _ajuste variants), which are
+    null for rows of the other property type.
+    
+    Quartiles are not computed here: each QUARTILE_COLS column is collected
+    as a sorted list so the group is sorted once, then add_quartiles extracts
+    q25/median/q75 from it.
+    """
     return [
         # Transaction counts
         pl.len().alias("nb_transactions"),
-        pl.col("type_local").filter(pl.col("type_local") == "Maison").len().alias("nb_maisons"),
-        pl.col("type_local").filter(pl.col("type_local") == "Appartement").len().alias("nb_appartements"),
-        
-        # Price per m² - all types
-        pl.col("prix_m2").mean().alias("prix_m2_mean"),
-        pl.col("prix_m2").quantile(0.25).alias("prix_m2_q25"),
-        pl.col("prix_m2").median().alias("prix_m2_median"),
-        pl.col("prix_m2").quantile(0.75).alias("prix_m2_q75"),
+        (pl.col("type_local") == "Maison").sum().alias("nb_maisons"),
+        (pl.col("type_local") == "Appartement").sum().alias("nb_appartements"),
         
-        # Price per m² - Maisons
-        pl.col("prix_m2").filter(pl.col("type_local") == "Maison").mean().alias("prix_m2_maison_mean"),
-        pl.col("prix_m2").filter(pl.col("type_local") == "Maison").quantile(0.25).alias("prix_m2_maison_q25"),
-        pl.col("prix_m2").filter(pl.col("type_local") == "Maison").median().alias("prix_m2_maison_median"),
-        pl.col("prix_m2").filter(pl.col("type_local") == "Maison").quantile(0.75).alias("prix_m2_maison_q75"),
-        
-        # Price per m² - Appartements
-        pl.col("prix_m2").filter(pl.col("type_local") == "Appartement").mean().alias("prix_m2_appart_mean"),
-        pl.col("prix_m2").filter(pl.col("type_local") == "Appartement").quantile(0.25).alias("prix_m2_appart_q25"),
-        pl.col("prix_m2").filter(pl.col("type_local") == "Appartement").median().alias("prix_m2_appart_median"),
-        pl.col("prix_m2").filter(pl.col("type_local") == "Appartement").quantile(0.75).alias("prix_m2_appart_q75"),
+        # Price per m² - all types, Maisons, Appartements
+        *[pl.col(col).mean().alias(f"{col}_mean") for col in QUARTILE_COLS],
+        *[pl.col(col).drop_nulls().sort().implode().alias(f"{col}_sorted") for col in QUARTILE_COLS],
         
         # Time-adjusted price per m² - all types
         pl.col("prix_m2_ajuste").median().alias("prix_m2_ajuste_median"),
         
         # Time-adjusted price per m² - Maisons
-        pl.col("prix_m2_ajuste").filter(pl.col("type_local") == "Maison").median().alias("prix_m2_ajuste_maison_median"),
+        pl.col("prix_m2_ajuste_maison").median().alias("prix_m2_ajuste_maison_median"),
         
         # Time-adjusted price per m² - Appartements
-        pl.col("prix_m2_ajuste").filter(pl.col("type_local") == "Appartement").median().alias("prix_m2_ajuste_appart_median"),
+        pl.col("prix_m2_ajuste_appart").median().alias("prix_m2_ajuste_appart_median"),
     ]
 
 
-def get_filtered_scan(start_date: date | None) -> pl.LazyFrame:
-    """Get a lazy scan of DVF data, optionally filtered by date."""
-    lf = pl.scan_parquet(PROCESSED_DVF)
+def add_quartiles(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Compute q25/median/q75 from the sorted price lists and drop the lists."""
+    exprs = []
+    for col in QUARTILE_COLS:
+        values = pl.col(f"{col}_sorted")
+        exprs += [
+            sorted_quantile(values, 0.25).alias(f"{col}_q25"),
+            sorted_median(values).alias(f"{col}_median"),
+            sorted_quantile(values, 0.75).alias(f"{col}_q75"),
+        ]
+    return lf.with_columns(exprs).drop([f"{col}_sorted" for col in QUARTILE_COLS])
+
+
+def get_filtered_scan(start_date: date | None, source: pl.LazyFrame | None = None) -> pl.LazyFrame:
+    """Get a lazy scan of DVF data, optionally filtered by date.
+    
+    Adds per-type price columns (null for other property types) so the
+    aggregations read type_local once instead of filtering per statistic.
+    Reads PROCESSED_DVF unless an already decoded source is given.
+    """
+    lf = pl.scan_parquet(PROCESSED_DVF) if source is None else source
     if start_date is not None:
         lf = lf.filter(pl.col("date_mutation") >= start_date)
+    is_maison = pl.col("type_local") == "Maison"
+    is_appart = pl.col("type_local") == "Appartement"
+    return lf.with_columns([
+        pl.when(is_maison).then(pl.col("prix_m2")).alias("prix_m2_maison"),
+        pl.when(is_appart).then(pl.col("prix_m2")).alias("prix_m2_appart"),
+        pl.when(is_maison).then(pl.col("prix_m2_ajuste")).alias("prix_m2_ajuste_maison"),
+        pl.when(is_appart).then(pl.col("prix_m2_ajuste")).alias("prix_m2_ajuste_appart"),
+    ])
+
+
+def scan_span_source(time_spans: dict[str, date | None]) -> pl.LazyFrame:
+    """Scan the columns every level needs, from the oldest span start.
+    
+    main() collects this once and builds all levels and spans on the
+    in-memory result, so the parquet file is decoded a single time.
+    """
+    lf = pl.scan_parquet(PROCESSED_DVF).select(SPAN_SOURCE_COLUMNS)
+    start_dates = list(time_spans.values())
+    if None not in start_dates:
+        lf = lf.filter(pl.col("date_mutation") >= min(start_dates))
     return lf
 
 
-def aggregate_country(start_date: date | None = None) -> pl.DataFrame:
-    """Aggregate at country level (single row for France)."""
-    result = (
-        get_filtered_scan(start_date)
-        .select([
-            pl.lit("France").alias("country"),
-            *price_stats_exprs(),
-        ])
-        .collect()
+def get_span_scan(time_spans: dict[str, date | None], source: pl.LazyFrame | None = None) -> pl.LazyFrame:
+    """Stack the rows of each time span, tagged with a "span" column.
+    
+    Without a source, each span's date filter is pushed into its own parquet
+    scan, which only decodes the columns the level selects and skips older
+    row groups (the processed file is sorted by date); this suits a single
+    level. To build several levels, pass the collected scan_span_source()
+    so the spans filter rows already in memory instead of scanning again.
+    The aggregation builders group by "span" so all spans are computed
+    together.
+    """
+    base = get_filtered_scan(None, source)
+    return pl.concat([
+        (base if start_date is None else base.filter(pl.col("date_mutation") >= start_date))
+        .with_columns(pl.lit(span_name).alias("span"))
+        for span_name, start_date in time_spans.items()
+    ])
+
+
+def aggregate_country_lf(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Build the country level aggregation (one row for France per span)."""
+    return (
+        lf
+        .select(["span", *PRICE_STATS_COLUMNS])
+        .group_by("span")
+        .agg(price_stats_exprs())
+        .pipe(add_quartiles)
+        .select(["span", pl.lit("France").alias("country"), pl.exclude("span")])
+        .sort("span")
     )
-    return result
 
 
-def aggregate_region(start_date: date | None = None) -> pl.DataFrame:
-    """Aggregate at region level."""
-    result = (
-        get_filtered_scan(start_date)
-        .group_by(["code_region", "nom_region"])
+def aggregate_region_lf(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Build the region level aggregation."""
+    return (
+        lf
+        .select(["span", "code_region", "nom_region", *PRICE_STATS_COLUMNS])
+        .group_by(["span", "code_region", "nom_region"])
         .agg(price_stats_exprs())
-        .sort("code_region")
-        .collect()
+        .pipe(add_quartiles)
+        .sort(["span", "code_region"])
     )
-    return result
 
 
-def aggregate_department(start_date: date | None = None) -> pl.DataFrame:
-    """Aggregate at department level."""
-    result = (
-        get_filtered_scan(start_date)
-        .group_by(["code_departement", "code_region", "nom_region"])
+def aggregate_department_lf(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Build the department level aggregation."""
+    return (
+        lf
+        .select(["span", "code_departement", "code_region", "nom_region", *PRICE_STATS_COLUMNS])
+        .group_by(["span", "code_departement", "code_region", "nom_region"])
         .agg(price_stats_exprs())
-        .sort("code_departement")
-        .collect()
+        .pipe(add_quartiles)
+        .sort(["span", "code_departement"])
     )
-    return result
 
 
-def aggregate_commune(start_date: date | None = None) -> pl.DataFrame:
-    """Aggregate at commune (neighborhood) level."""
-    result = (
-        get_filtered_scan(start_date)
-        .group_by(["code_commune", "nom_commune"])
+def aggregate_commune_lf(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Build the commune level aggregation."""
+    return (
+        lf
+        .select(["span", "code_commune", "nom_commune", *PRICE_STATS_COLUMNS])
+        .group_by(["span", "code_commune", "nom_commune"])
         .agg(price_stats_exprs())
-        .sort("code_commune")
-        .collect()
+        .pipe(add_quartiles)
+        .sort(["span", "code_commune"])
     )
-    return result
 
 
-def aggregate_iris(start_date: date | None = None) -> pl.DataFrame:
-    """Aggregate at IRIS level (neighborhood)."""
-    result = (
-        get_filtered_scan(start_date)
+def aggregate_iris_lf(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Build the IRIS level aggregation (neighborhood)."""
+    return (
+        lf
+        .select(["span", "code_iris", "nom_iris", *PRICE_STATS_COLUMNS])
         .filter(pl.col("code_iris").is_not_null())  
-        .group_by(["code_iris", "nom_iris"])
+        .group_by(["span", "code_iris", "nom_iris"])
         .agg(price_stats_exprs())
-        .sort("code_iris")
-        .collect()
+        .pipe(add_quartiles)
+        .sort(["span", "code_iris"])
     )
-    return result
 
 
-def aggregate_parcel(start_date: date | None = None) -> pl.DataFrame:
-    """Aggregate at parcel (building plot) level."""
-    result = (
-        get_filtered_scan(start_date)
-        .group_by(["id_parcelle_unique"])
+def aggregate_parcel_lf(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Build the parcel level aggregation (building plots)."""
+    return (
+        lf
+        .select(["span", "id_parcelle_unique", "code_departement", "code_commune", *PRICE_STATS_COLUMNS])
+        .group_by(["span", "id_parcelle_unique"])
         .agg([
             *price_stats_exprs(),
             pl.col("code_departement").first(),
             pl.col("code_commune").first(),
         ])
-        .sort("id_parcelle_unique")
-        .collect()
+        .pipe(add_quartiles)
+        # Department first (categorical): cheaper than a string sort on the
+        # parcel id alone, and lets readers skip row groups by department
+        .sort(["span", "code_departement", "id_parcelle_unique"])
+    )
+
+
+# Lazy aggregation builders by level, collected together in main().
+# Each takes the span-tagged scan from get_span_scan and groups by "span".
+AGGREGATORS = {
+    "country": aggregate_country_lf,
+    "region": aggregate_region_lf,
+    "department": aggregate_department_lf,
+    "commune": aggregate_commune_lf,
+    "iris": aggregate_iris_lf,
+    "parcel": aggregate_parcel_lf,
+}
+
+# Levels with millions of groups, collected with the streaming engine to
+# bound memory instead of holding every hash table in RAM
+STREAMING_LEVELS = {"parcel"}
+
+
+def collect_single_span(agg_func, start_date: date | None, engine: str = "auto") -> pl.DataFrame:
+    """Run one lazy aggregation builder for a single time span."""
+    return (
+        agg_func(get_span_scan({"span": start_date}))
+        .drop("span")
+        .collect(engine=engine)
     )
-    return result
+
+
+def aggregate_country(start_date: date | None = None) -> pl.DataFrame:
+    """Aggregate at country level (single row for France)."""
+    return collect_single_span(aggregate_country_lf, start_date)
+
+
+def aggregate_region(start_date: date | None = None) -> pl.DataFrame:
+    """Aggregate at region level."""
+    return collect_single_span(aggregate_region_lf, start_date)
+
+
+def aggregate_department(start_date: date | None = None) -> pl.DataFrame:
+    """Aggregate at department level."""
+    return collect_single_span(aggregate_department_lf, start_date)
+
+
+def aggregate_commune(start_date: date | None = None) -> pl.DataFrame:
+    """Aggregate at commune (neighborhood) level."""
+    return collect_single_span(aggregate_commune_lf, start_date)
+
+
+def aggregate_iris(start_date: date | None = None) -> pl.DataFrame:
+    """Aggregate at IRIS level (neighborhood)."""
+    return collect_single_span(aggregate_iris_lf, start_date)
+
+
+def aggregate_parcel(start_date: date | None = None) -> pl.DataFrame:
+    """Aggregate at parcel (building plot) level."""
+    return collect_single_span(aggregate_parcel_lf, start_date, engine="streaming")
 
 
 def save_aggregates(aggregates: dict[str, pl.DataFrame], time_span: str) -> None:
@@ -170,7 +306,16 @@ def save_aggregates(aggregates: dict[str, pl.DataFrame], time_span: str) -> None
     
     for name, df in aggregates.items():
         path = output_dir / f"agg_{name}.parquet"
-        df.write_parquet(path)
+        # Keys are categorical in the processed DVF; save plain strings for
+        # the pandas/GeoPandas consumers
+        df = df.with_columns((cs.categorical() | cs.enum()).cast(pl.String))
+        df.write_parquet(
+            path,
+            compression="zstd",
+            compression_level=3,
+            statistics=True,
+            row_group_size=ROW_GROUP_SIZES.get(name, DEFAULT_ROW_GROUP_SIZE),
+        )
         logger.info(f"      {name}: {len(df):,} rows")
 
 
@@ -197,44 +342,38 @@ def main():
     logger.info(f"  Total transactions: {summary['total_rows'][0]:,}")
     logger.info(f"  Date range: {summary['date_min'][0]} to {summary['date_max'][0]}")
     
-    # Aggregation functions by level
-    AGGREGATORS = {
-        "country": aggregate_country,
-        "region": aggregate_region,
-        "department": aggregate_department,
-        "commune": aggregate_commune,
-        "iris": aggregate_iris,
-        "parcel": aggregate_parcel,
-    }
+    # Decode the aggregation columns once, run the small levels for all time
+    # spans in one plan over them, then stream the high-cardinality levels
+    # separately from the same in-memory rows
+    source = scan_span_source(TIME_SPANS).collect()
+    lf = get_span_scan(TIME_SPANS, source.lazy())
+    in_memory_levels = [name for name in AGGREGATORS if name not in STREAMING_LEVELS]
+    counts_df, *in_memory_results = pl.collect_all([
+        lf.group_by("span").len(),
+        *[AGGREGATORS[name](lf) for name in in_memory_levels],
+    ])
+    counts = dict(counts_df.iter_rows())
+    results = dict(zip(in_memory_levels, in_memory_results))
+    for name in STREAMING_LEVELS:
+        results[name] = AGGREGATORS[name](lf).collect(engine="streaming")
+    del source, lf
+    logger.info(f"Aggregations computed in {time.time() - start_time:.1f}s")
     
-    # Run for each time span
+    # Save each time span
     for span_name, start_date in TIME_SPANS.items():
-        span_start = time.time()
         date_label = f">= {start_date}" if start_date else "all time"
         logger.info(f"\n{'='*60}")
         logger.info(f"Time span: {span_name} ({date_label})")
         logger.info("=" * 60)
+        logger.info(f"  Transactions in span: {counts.get(span_name, 0):,}")
         
-        # Count transactions in this span
-        count = (
-            get_filtered_scan(start_date)
-            .select(pl.len())
-            .collect()
-            .item()
-        )
-        logger.info(f"  Transactions in span: {count:,}")
-        
-        # Run all aggregations
-        aggregates = {}
-        for level_name, agg_func in AGGREGATORS.items():
-            aggregates[level_name] = agg_func(start_date)
+        aggregates = {
+            level_name: results[level_name].filter(pl.col("span") == span_name).drop("span")
+            for level_name in AGGREGATORS
+        }
         
-        # Save
         logger.info(f"\n  Saving to {AGGREGATES_DIR / span_name}/:")
         save_aggregates(aggregates, span_name)
-        
-        span_elapsed = time.time() - span_start
-        logger.info(f"  Completed in {span_elapsed:.1f}s")
     
     elapsed = time.time() - start_time
     
@@ -2,21 +2,27 @@
 """
 Convert communes and iris GeoJSON to PMTiles 
 This script:
-1. Converts communes.geojson to communes.pmtiles
-2. Converts iris.geojson to iris.pmtiles
+1. Converts communes.geojsonl to communes.pmtiles
+2. Converts iris.geojsonl to iris.pmtiles
 3. Moves original GeoJSON files to processed/ directories
 
 PMTiles enables on-demand tile loading instead of downloading entire files.
 
 Requires:
 - tippecanoe (install with: sudo apt install tippecanoe)
-- pmtiles CLI (install from: https://github.com/protomaps/go-pmtiles/releases)
+- pmtiles CLI, only for tippecanoe < 2.17 (install from: https://github.com/protomaps/go-pmtiles/releases)
 """
 
+import errno
+import os
+import re
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import pyogrio
+
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -28,7 +34,7 @@ PROCESSED_DIR = Path("data/processed")
 # PMTiles configuration for each level
 PMTILES_CONFIG = {
     "communes": {
-        "input": MAP_DATA_DIR / "communes.geojson",
+        "input": MAP_DATA_DIR / "communes.geojsonl",
         "output": MAP_DATA_DIR / "communes.pmtiles",
         "archive": PROCESSED_DIR / "joined_communes",
         "layer": "communes",
@@ -36,7 +42,7 @@ PMTILES_CONFIG = {
         "max_zoom": 14,  
     },
     "iris": {
-        "input": MAP_DATA_DIR / "iris.geojson",
+        "input": MAP_DATA_DIR / "iris.geojsonl",
         "output": MAP_DATA_DIR / "iris.pmtiles",
         "archive": PROCESSED_DIR / "joined_iris",
         "layer": "iris",
@@ -45,6 +51,14 @@ PMTILES_CONFIG = {
     },
 }
 
+# Line-delimited GeoJSON (one feature per line) suffixes, parsed by
+# tippecanoe in parallel with -P. join_geometries writes the communes and
+# IRIS levels in this form, so only other inputs go through write_geojson_seq.
+GEOJSON_SEQ_SUFFIXES = {".geojsonl", ".geojsons", ".ndjson"}
+
+# First tippecanoe release that can write .pmtiles output directly
+TIPPECANOE_PMTILES_VERSION = (2, 17)
+
 
 def check_tippecanoe() -> bool:
     """Check if tippecanoe is installed."""
@@ -56,15 +70,52 @@ def check_pmtiles_cli() -> bool:
     return shutil.which("pmtiles") is not None
 
 
+def tippecanoe_supports_pmtiles() -> bool:
+    """Check if the installed tippecanoe can write PMTiles directly (>= 2.17)."""
+    try:
+        result = subprocess.run(["tippecanoe", "--version"], capture_output=True, text=True)
+    except Exception:
+        return False
+    # Version is printed as "tippecanoe v2.53.0" (on stderr)
+    match = re.search(r"v?(\d+)\.(\d+)", result.stderr + result.stdout)
+    if not match:
+        return False
+    return (int(match.group(1)), int(match.group(2))) >= TIPPECANOE_PMTILES_VERSION
+
+
+def write_geojson_seq(input_path: Path, seq_path: Path) -> int:
+    """Rewrite a GeoJSON FeatureCollection with one feature per line.
+    
+    GDAL does the parsing and writing, so the conversion runs outside the
+    GIL and levels converted in parallel threads do not serialize on it.
+    
+    Returns the number of features written.
+    """
+    gdf = pyogrio.read_dataframe(input_path)
+    pyogrio.write_dataframe(gdf, seq_path, driver="GeoJSONSeq")
+    return len(gdf)
+
+
+def log_pmtiles_created(output_path: Path, input_size_mb: float) -> None:
+    """Log the size of the created PMTiles and the compression ratio."""
+    pmtiles_size = output_path.stat().st_size / (1024 * 1024)
+    compression_ratio = input_size_mb / pmtiles_size if pmtiles_size > 0 else 0
+    
+    logger.info(f"PMTiles created: {output_path.name} ({pmtiles_size:.1f} MB)")
+    logger.info(f"Compression: {compression_ratio:.1f}x")
+
+
 def convert_geojson_to_pmtiles(
     input_path: Path,
     output_path: Path,
     layer_name: str,
     min_zoom: int,
     max_zoom: int,
+    direct_pmtiles: bool = False,
 ) -> bool:
     """Convert a GeoJSON file to PMTiles. 
     Uses tippecanoe to create MBTiles, then pmtiles CLI to convert.
+    With direct_pmtiles, tippecanoe writes the PMTiles itself (>= 2.17).
     """
     if not input_path.exists():
         logger.error(f"Input file not found: {input_path}")
@@ -74,13 +125,27 @@ def convert_geojson_to_pmtiles(
     logger.info(f"Converting {input_path.name} ({input_size_mb:.1f} MB)...")
     logger.info(f"Layer: {layer_name}, Zoom: {min_zoom}-{max_zoom}")
     
-    # Intermediate MBTiles file
+    # tippecanoe only parses line-delimited GeoJSON in parallel (-P)
+    if input_path.suffix in GEOJSON_SEQ_SUFFIXES:
+        seq_path = input_path
+    else:
+        seq_path = output_path.with_suffix(".geojsonl")
+        try:
+            n_features = write_geojson_seq(input_path, seq_path)
+            logger.info(f"Wrote {n_features:,} features to {seq_path.name}")
+        except Exception as e:
+            logger.error(f"GeoJSONSeq conversion failed: {e}")
+            seq_path.unlink(missing_ok=True)
+            return False
+    
+    # Intermediate MBTiles file, unless tippecanoe writes PMTiles itself
     mbtiles_path = output_path.with_suffix(".mbtiles")
+    tiles_path = output_path if direct_pmtiles else mbtiles_path
     
     # Run tippecanoe
     cmd = [
         "tippecanoe",
-        "-o", str(mbtiles_path),
+        "-o", str(tiles_path),
         "-Z", str(min_zoom),
         "-z", str(max_zoom),
         "--no-feature-limit",      # Don't limit features per tile
@@ -88,19 +153,32 @@ def convert_geojson_to_pmtiles(
         "--coalesce-densest-as-needed",  # Simplify geometry instead of dropping features
         "--detect-shared-borders", 
         "-l", layer_name,
+        "-P",                      # Parse the line-delimited input in parallel
         "--force",
-        str(input_path),
+        str(seq_path),
     ]
     
     try:
         logger.info("Running tippecanoe...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        finally:
+            if seq_path != input_path:
+                seq_path.unlink(missing_ok=True)
         
         if result.returncode != 0:
             logger.error("tippecanoe failed:")
             logger.error(result.stderr)
+            mbtiles_path.unlink(missing_ok=True)
             return False
         
+        if direct_pmtiles:
+            if not output_path.exists():
+                logger.error("PMTiles not created")
+                return False
+            log_pmtiles_created(output_path, input_size_mb)
+            return True
+        
         if not mbtiles_path.exists():
             logger.error("MBTiles not created")
             return False
@@ -110,9 +188,17 @@ def convert_geojson_to_pmtiles(
         
     except Exception as e:
         logger.error(f"tippecanoe failed: {e}")
+        mbtiles_path.unlink(missing_ok=True)
         return False
     
-    # Convert to PMTiles
+    return convert_mbtiles(mbtiles_path, output_path, input_size_mb)
+
+
+def convert_mbtiles(mbtiles_path: Path, output_path: Path, input_size_mb: float) -> bool:
+    """Convert tippecanoe's MBTiles to PMTiles with the pmtiles CLI.
+    
+    The MBTiles file is deleted afterwards, whether or not the conversion worked.
+    """
     try:
         logger.info("Converting to PMTiles...")
         result = subprocess.run(
@@ -130,20 +216,14 @@ def convert_geojson_to_pmtiles(
             logger.error("PMTiles not created")
             return False
         
-        pmtiles_size = output_path.stat().st_size / (1024 * 1024)
-        compression_ratio = input_size_mb / pmtiles_size if pmtiles_size > 0 else 0
-        
-        logger.info(f"PMTiles created: {output_path.name} ({pmtiles_size:.1f} MB)")
-        logger.info(f"Compression: {compression_ratio:.1f}x")
-        
-        # Clean up MBTiles
-        mbtiles_path.unlink()
-        
+        log_pmtiles_created(output_path, input_size_mb)
         return True
         
     except Exception as e:
         logger.error(f"pmtiles convert failed: {e}")
         return False
+    finally:
+        mbtiles_path.unlink(missing_ok=True)
 
 
 def archive_geojson(input_path: Path, archive_dir: Path) -> bool:
@@ -159,7 +239,14 @@ def archive_geojson(input_path: Path, archive_dir: Path) -> bool:
     dest_path = archive_dir / input_path.name
     
     try:
-        shutil.move(str(input_path), str(dest_path))
+        try:
+            # Same filesystem (the usual case): a single rename
+            os.rename(input_path, dest_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            logger.warning(f"{archive_dir} is on another device, copying {input_path.name}")
+            shutil.move(str(input_path), str(dest_path))
         logger.info(f"Archived: {input_path.name} → {archive_dir}/")
         return True
     except Exception as e:
@@ -167,6 +254,25 @@ def archive_geojson(input_path: Path, archive_dir: Path) -> bool:
         return False
 
 
+def process_level(name: str, config: dict, direct_pmtiles: bool = False) -> bool:
+    """Convert one level to PMTiles and archive its GeoJSON on success."""
+    logger.info(f"Processing: {name}")
+    
+    if not convert_geojson_to_pmtiles(
+        input_path=config["input"],
+        output_path=config["output"],
+        layer_name=config["layer"],
+        min_zoom=config["min_zoom"],
+        max_zoom=config["max_zoom"],
+        direct_pmtiles=direct_pmtiles,
+    ):
+        logger.error(f"Failed to convert {name}")
+        return False
+    
+    archive_geojson(config["input"], config["archive"])
+    return True
+
+
 def main():
     logger.info("=" * 60)
     logger.info("Convert GeoJSON to PMTiles")
@@ -177,33 +283,27 @@ def main():
         logger.error("Install with: sudo apt install tippecanoe")
         return 1
     
-    if not check_pmtiles_cli():
+    direct_pmtiles = tippecanoe_supports_pmtiles()
+    if direct_pmtiles:
+        logger.info("Dependencies found (tippecanoe with PMTiles output)")
+    elif not check_pmtiles_cli():
         logger.error("pmtiles CLI not found!")
         logger.error("Install from: https://github.com/protomaps/go-pmtiles/releases")
         return 1
-    
-    logger.info("Dependencies found (tippecanoe, pmtiles)")
+    else:
+        logger.info("Dependencies found (tippecanoe, pmtiles)")
     
     success_count = 0
     
-    # Convert each level
-    for name, config in PMTILES_CONFIG.items():
-        logger.info("=" * 60)
-        logger.info(f"Processing: {name}")
-        logger.info("=" * 60)
-        
-        if convert_geojson_to_pmtiles(
-            input_path=config["input"],
-            output_path=config["output"],
-            layer_name=config["layer"],
-            min_zoom=config["min_zoom"],
-            max_zoom=config["max_zoom"],
-        ):
-            
-            archive_geojson(config["input"], config["archive"])
-            success_count += 1
-        else:
-            logger.error(f"Failed to convert {name}")
+    # Convert levels concurrently: each runs its own tippecanoe process
+    with ThreadPoolExecutor(max_workers=len(PMTILES_CONFIG)) as executor:
+        futures = [
+            executor.submit(process_level, name, config, direct_pmtiles)
+            for name, config in PMTILES_CONFIG.items()
+        ]
+        for future in as_completed(futures):
+            if future.result():
+                success_count += 1
     
     
     logger.info("=" * 60)
@@ -2,17 +2,20 @@
 Script to download DVF and INSEE data sources.
 """
 
-import gzip
 import os
 import re
 import shutil
 import time
 import zipfile
+import zlib
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import sys 
+import threading
 
+import polars as pl
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 try:
     import py7zr
@@ -44,29 +47,93 @@ GEO_IRIS_URL = "https://data.geopf.fr/telechargement/download/CONTOURS-IRIS-PE/C
 # Cadastre base URL (per commune)
 CADASTRE_BASE_URL = "https://cadastre.data.gouv.fr/data/etalab-cadastre/2025-12-01/geojson/communes/"
 CADASTRE_DIR = GEO_DATA_DIR / "parcelles"
+CADASTRE_MAX_WORKERS = 20
+# Minimum seconds between two download progress updates
+PROGRESS_INTERVAL = 0.5
+# File downloads are small and network-bound, so run more of them in flight
+CADASTRE_DOWNLOAD_WORKERS = 32
+# Seconds to wait for the server to connect or send the next chunk
+DOWNLOAD_TIMEOUT = 60
 
 
-def download_file(url: str, dest_path: Path, chunk_size: int = 8192) -> float:
+def create_session(pool_size: int = CADASTRE_MAX_WORKERS) -> requests.Session:
+    """Create a session keeping up to pool_size keep-alive connections per host.
+    
+    Transient gateway errors (502/503/504) are retried with backoff.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size * 2,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by the cadastre download workers so ~35k small files reuse connections
+_session = create_session(pool_size=CADASTRE_DOWNLOAD_WORKERS)
+
+
+def download_file(url: str, dest_path: Path, chunk_size: int = 1 << 20, gunzip: bool = False) -> float:
     """Download a file from URL with progress indication.
     
+    The body is written to a .part file next to dest_path and only renamed
+    onto dest_path once complete, so an interrupted download never leaves
+    a file that looks finished.
+    
+    Args:
+        gunzip: If True, the body is gzip data and is decompressed into
+            dest_path as it arrives, without writing the .gz file.
+    
     Returns:
         Time taken in seconds.
+    
+    Raises:
+        EOFError: If gunzip is True and the gzip stream is truncated.
     """
     start_time = time.time()
     logger.info(f"Downloading {url}...")
-    response = requests.get(url, stream=True)
+    response = requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT)
     response.raise_for_status()
     
     total_size = int(response.headers.get("content-length", 0))
     downloaded = 0
-    
-    with open(dest_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=chunk_size):
-            f.write(chunk)
-            downloaded += len(chunk)
-            if total_size:
-                percent = (downloaded / total_size) * 100
-                print(f"\rProgress: {percent:.1f}%", end="", flush=True)
+    last_progress = 0.0
+    
+    # 16 + MAX_WBITS: expect a gzip header and trailer
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gunzip else None
+    part_path = dest_path.with_suffix(dest_path.suffix + ".part")
+    
+    try:
+        with open(part_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                downloaded += len(chunk)
+                if decompressor is None:
+                    f.write(chunk)
+                else:
+                    data = chunk
+                    while data:
+                        f.write(decompressor.decompress(data))
+                        # Concatenated gzip members: restart on the leftover bytes
+                        data = decompressor.unused_data if decompressor.eof else b""
+                        if data:
+                            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                now = time.monotonic()
+                if total_size and (now - last_progress >= PROGRESS_INTERVAL or downloaded >= total_size):
+                    last_progress = now
+                    percent = (downloaded / total_size) * 100
+                    print(f"\rProgress: {percent:.1f}%", end="", flush=True)
+            
+            if decompressor is not None:
+                f.write(decompressor.flush())
+                if not decompressor.eof:
+                    raise EOFError(f"Truncated gzip stream from {url}")
+        os.replace(part_path, dest_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
     
     elapsed = time.time() - start_time
     logger.info(f"\nSaved to {dest_path} in {format_duration(elapsed)}")
@@ -88,19 +155,9 @@ def download_dvf(force: bool = False) -> None:
         logger.info(f"DVF data already exists at {csv_path}")
         return
     
-    gz_path = RAW_DATA_DIR / "dvf.csv.gz"
-    
-    # Download the gzipped file
-    download_file(DVF_URL, gz_path)
-    
-    # Extract to CSV
-    logger.info(f"Extracting to {csv_path}...")
-    with gzip.open(gz_path, "rb") as f_in:
-        with open(csv_path, "wb") as f_out:
-            shutil.copyfileobj(f_in, f_out)
+    # Download and decompress in one pass (no intermediate .gz on disk)
+    download_file(DVF_URL, csv_path, gunzip=True)
     
-    # Remove the gz file
-    gz_path.unlink()
     elapsed = time.time() - start_time
     logger.info(f"DVF data extracted to {csv_path} (total: {format_duration(elapsed)})")
 
@@ -184,30 +241,28 @@ def download_admin_express_gpkg(force: bool = False) -> None:
     archive_path = GEO_DATA_DIR / "admin_express.7z"
     download_file(GEO_ADMIN_EXPRESS_URL, archive_path)
     
-    # Extract 7z
+    # Extract only the target GeoPackage from the 7z
     if py7zr:
-        logger.info(f"Extracting Admin Express to {GEO_DATA_DIR}...")
+        logger.info(f"Extracting {TARGET_GPKG_NAME} to {GEO_DATA_DIR}...")
         
-        # Temporary extraction directory
+        # Temporary extraction directory (holds the archive's folder layout)
         temp_dir = GEO_DATA_DIR / "temp_admin_express"
         temp_dir.mkdir(exist_ok=True)
         
         with py7zr.SevenZipFile(archive_path, mode='r') as z:
-            z.extractall(temp_dir)
-            
-        # Find the .gpkg file recursively
-        gpkg_files = list(temp_dir.rglob("*.gpkg"))
-        
-        # Find the specific target file
-        source_gpkg = next((f for f in gpkg_files if f.name == TARGET_GPKG_NAME), None)
+            names = z.getnames()
+            gpkg_names = [name for name in names if name.endswith(".gpkg")]
+            source_name = next((name for name in gpkg_names if Path(name).name == TARGET_GPKG_NAME), None)
+            if source_name:
+                z.extract(path=temp_dir, targets=[source_name])
         
-        if not source_gpkg:
+        if not source_name:
             logger.error(f"Error: {TARGET_GPKG_NAME} not found in the archive!")
-            if gpkg_files:
-                logger.info(f"Available GPKG files: {[f.name for f in gpkg_files]}")
+            if gpkg_names:
+                logger.info(f"Available GPKG files: {[Path(name).name for name in gpkg_names]}")
         else:
-            logger.info(f"Found GPKG: {source_gpkg.name}")
-            shutil.move(str(source_gpkg), str(target_path))
+            logger.info(f"Found GPKG: {source_name}")
+            (temp_dir / source_name).rename(target_path)
             elapsed = time.time() - start_time
             logger.info(f"Moved to {target_path} (total: {format_duration(elapsed)})")
             
@@ -220,39 +275,99 @@ def download_admin_express_gpkg(force: bool = False) -> None:
         logger.info(f"Archive saved to {archive_path}")
 
 
-def download_all_cadastre(force: bool = False) -> bool:
-    """Download all cadastre parcel files.
+def load_cog_communes() -> dict[str, list[str]] | None:
+    """List cadastre communes by department from the INSEE COG commune file.
     
-    Args:
-        force: If True, re-download even if files already exist.
+    Paris, Lyon and Marseille have cadastre files per arrondissement, so
+    arrondissements (ARM) replace their parent commune.
+    
+    Returns:
+        {dept: [commune codes]}, or None if v_commune_2025.csv is missing.
     """
-    start_time = time.time()
-    CADASTRE_DIR.mkdir(parents=True, exist_ok=True)
+    cog_path = INSEE_DATA_DIR / "v_commune_2025.csv"
+    if not cog_path.exists():
+        return None
+    
+    cog = pl.read_csv(cog_path, infer_schema=False, columns=["TYPECOM", "COM", "DEP", "COMPARENT"])
+    split_communes = cog.filter(pl.col("TYPECOM") == "ARM")["COMPARENT"].unique()
+    communes = (
+        cog
+        .filter(
+            (pl.col("TYPECOM") == "ARM")
+            | ((pl.col("TYPECOM") == "COM") & ~pl.col("COM").is_in(split_communes.implode()))
+        )
+        .filter(pl.col("DEP").is_not_null())
+        .group_by("DEP")
+        .agg(pl.col("COM").sort())
+        .sort("DEP")
+    )
+    return dict(communes.iter_rows())
+
+
+def crawl_cadastre_communes() -> dict[str, list[str]]:
+    """List cadastre communes by department from the cadastre directory pages.
     
+    Returns:
+        {dept: [commune codes]}
+    """
     logger.info(f"Crawling {CADASTRE_BASE_URL}...")
-    session = requests.Session()
+    # One session per crawler thread so each keeps its own connection pool
+    thread_local = threading.local()
     
     def get_links(url: str, pattern: str) -> list[str]:
+        session = getattr(thread_local, "session", None)
+        if session is None:
+            session = thread_local.session = create_session(pool_size=1)
         try:
             resp = session.get(url, timeout=30)
             return re.findall(rf'href="({pattern})"', resp.text)
         except Exception:
             return []
     
-    # Phase 1: Collect all file URLs
-    all_urls = []
     # Pattern matches: 01-99, 2A, 2B (Corsica), 971-976 (overseas)
-    depts = get_links(CADASTRE_BASE_URL, r'(?:\d{2,3}|2[AaBb])/')
+    depts = sorted(get_links(CADASTRE_BASE_URL, r'(?:\d{2,3}|2[AaBb])/'))
     logger.info(f"Found {len(depts)} departments, fetching communes...")
     
-    n_communes = 0
-    for dept in sorted(depts):
-        # Commune pattern: 5 digits OR 2A/2B + 3 digits (Corsica)
-        communes = get_links(CADASTRE_BASE_URL + dept, r'(?:\d{5}|2[AaBb]\d{3})/')
-        n_communes += len(communes)
-        for commune in communes:
-            url = f"{CADASTRE_BASE_URL}{dept}{commune}cadastre-{commune.rstrip('/')}-parcelles.json.gz"
-            all_urls.append(url)
+    # Fetch department listings concurrently (map keeps department order)
+    # Commune pattern: 5 digits OR 2A/2B + 3 digits (Corsica)
+    with ThreadPoolExecutor(max_workers=CADASTRE_MAX_WORKERS) as executor:
+        dept_communes = list(executor.map(
+            lambda dept: get_links(CADASTRE_BASE_URL + dept, r'(?:\d{5}|2[AaBb]\d{3})/'),
+            depts,
+        ))
+    
+    return {
+        dept.rstrip('/'): [commune.rstrip('/') for commune in communes]
+        for dept, communes in zip(depts, dept_communes)
+    }
+
+
+def download_all_cadastre(force: bool = False) -> bool:
+    """Download all cadastre parcel files.
+    
+    File URLs are built from the INSEE COG commune list when it has been
+    downloaded, otherwise the cadastre directory pages are crawled.
+    
+    Args:
+        force: If True, re-download even if files already exist.
+    """
+    start_time = time.time()
+    CADASTRE_DIR.mkdir(parents=True, exist_ok=True)
+    
+    # Phase 1: Collect all file URLs
+    communes_by_dept = load_cog_communes()
+    if communes_by_dept is None:
+        communes_by_dept = crawl_cadastre_communes()
+    else:
+        logger.info(f"Listing communes from INSEE COG ({INSEE_DATA_DIR / 'v_commune_2025.csv'})")
+    
+    all_urls = [
+        f"{CADASTRE_BASE_URL}{dept}/{commune}/cadastre-{commune}-parcelles.json.gz"
+        for dept, communes in communes_by_dept.items()
+        for commune in communes
+    ]
+    depts = list(communes_by_dept)
+    n_communes = len(all_urls)
     
     logger.info(f"Found {len(all_urls):,} files to download")
     
@@ -267,16 +382,20 @@ def download_all_cadastre(force: bool = False) -> bool:
             return True
         dest.parent.mkdir(parents=True, exist_ok=True)
         try:
-            resp = requests.get(url, timeout=60)
-            resp.raise_for_status()
-            dest.write_bytes(resp.content)
+            # Stream the gzip bytes as-is to disk instead of buffering the body
+            with _session.get(url, timeout=60, stream=True) as resp:
+                resp.raise_for_status()
+                with open(dest, "wb") as f:
+                    shutil.copyfileobj(resp.raw, f, length=1 << 16)
             return True
         except Exception as e:
             logger.error(f"Error downloading {url}: {e}")
+            # Don't leave a truncated file that would be skipped next run
+            dest.unlink(missing_ok=True)
             return False
     
     success = 0
-    with ThreadPoolExecutor(max_workers=20) as executor:
+    with ThreadPoolExecutor(max_workers=CADASTRE_DOWNLOAD_WORKERS) as executor:
         futures = {executor.submit(download, url): url for url in all_urls}
         for i, future in enumerate(as_completed(futures), 1):
             if future.result():
@@ -4,29 +4,41 @@ Generate parcel data for the DVF map.
 
 This script:
 1. Loops over each commune cadastre file to join with DVF price aggregates
-2. Saves one GeoJSON per commune 
-3. Converts all commune GeoJSON files to one PMTiles
-4. Cleans up intermediate GeoJSON files
+2. Simplifies each department at once
+3. Streams the parcels straight into tippecanoe to build one PMTiles, or
+   saves one GeoJSON per commune with --keep-geojson / --geojson-only
 
 Requires cadastre files to be downloaded first via download_data.py.
 
 Requires:
 - tippecanoe (install with: sudo apt install tippecanoe)
-- pmtiles CLI (install from: https://github.com/protomaps/go-pmtiles/releases)
+- pmtiles CLI, only with tippecanoe < 2.17 (install from: https://github.com/protomaps/go-pmtiles/releases)
 """
 
 import argparse
-import gzip
+import functools
+import io
 import multiprocessing as mp
 import os
 import shutil
 import subprocess
+import tempfile
 import time
+from multiprocessing import shared_memory
+from multiprocessing.pool import Pool
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
 import geopandas as gpd
 import pandas as pd
+import polars as pl
+import polars.selectors as cs
+import pyarrow as pa
+import pyogrio
+import pyproj
+import shapely
 
+from convert_to_pmtiles import tippecanoe_supports_pmtiles
 from download_data import CADASTRE_DIR
 from utils.logger import get_logger
 from join_geometries import (
@@ -40,82 +52,320 @@ logger = get_logger(__name__)
 PARCELS_GEOJSON_DIR = OUTPUT_DIR / "parcels"
 PMTILES_OUTPUT = OUTPUT_DIR / "parcels.pmtiles"
 
+# Simplification tolerance in degrees (~1 m)
+SIMPLIFY_TOLERANCE = 0.00001
+
+# Decimals kept in output coordinates; GeoJSON otherwise prints ~15 digits
+COORDINATE_PRECISION = 6
+GEOJSON_LAYER_OPTIONS = {"COORDINATE_PRECISION": COORDINATE_PRECISION}
+
 # Number of workers for parallel processing
 NUM_WORKERS = max(1, mp.cpu_count() - 1)  # Leave one core free
 
+# Tasks a worker runs before it is replaced, so GEOS/GDAL heap growth
+# in long-lived workers is returned to the OS
+MAX_TASKS_PER_WORKER = 200
+
+# Department aggregates attached by each pool worker (see attach_department)
+_worker_shm = None
+_worker_dept_agg = None
+
 
+@functools.lru_cache(maxsize=1)
 def check_tippecanoe() -> bool:
-    """Check if tippecanoe is installed."""
+    """Check if tippecanoe is installed (looked up once per run)."""
     return shutil.which("tippecanoe") is not None
 
 
+@functools.lru_cache(maxsize=1)
 def check_pmtiles_cli() -> bool:
-    """Check if pmtiles CLI is installed."""
+    """Check if pmtiles CLI is installed (looked up once per run)."""
     return shutil.which("pmtiles") is not None
 
 
-def process_commune_simple(args: tuple) -> tuple[str, int, str]:
-    """Process a single commune file. Designed for parallel processing.
+def commune_code_from_path(gz_path: Path) -> str:
+    """Extract the commune code from a cadastre-<code>-parcelles.json.gz path."""
+    return gz_path.stem.replace("cadastre-", "").replace("-parcelles.json", "")
+
+
+def ensure_fgb(gz_path: Path) -> Path:
+    """Convert a gzipped cadastre GeoJSON to FlatGeobuf next to it, once.
+    
+    FlatGeobuf is binary, seekable and spatially indexed, so later runs read
+    it much faster than re-parsing the gzipped GeoJSON. The conversion is
+    redone if the .gz file is newer (e.g. after a fresh download).
+    
+    Returns the path to cadastre-<code>-parcelles.fgb.
+    """
+    fgb_path = gz_path.with_name(gz_path.name.replace(".json.gz", ".fgb"))
+    if fgb_path.exists() and fgb_path.stat().st_mtime >= gz_path.stat().st_mtime:
+        return fgb_path
+    
+    cadastre = pyogrio.read_dataframe(f"/vsigzip/{gz_path}", columns=["id"])
+    tmp_path = fgb_path.with_name(f"{fgb_path.stem}.tmp.fgb")  # the driver needs a .fgb name
+    pyogrio.write_dataframe(cadastre, tmp_path, driver="FlatGeobuf")
+    os.replace(tmp_path, fgb_path)
+    return fgb_path
+
+
+def load_commune_parcels(gz_path: Path, dept_agg: pa.Table) -> tuple[str, gpd.GeoDataFrame | None, str]:
+    """Read a commune cadastre file and keep only parcels with price data.
+    
+    Parcels are read as an Arrow table and hash-joined with the department
+    aggregates in Arrow; only the matched parcels become a GeoDataFrame.
     
     Args:
-        args: Tuple of (gz_path, agg_dict, output_dir)
-              agg_dict is {id_parcelle_unique: row_dict} for this department
+        gz_path: Path to the commune's cadastre-*-parcelles.json.gz file
+        dept_agg: This department's aggregates, keyed by id_parcelle_unique
     
     Returns:
-        Tuple of (commune_code, parcel_count, status)
+        Tuple of (commune_code, joined parcels or None, status)
     """
-    gz_path, agg_dict, output_dir = args
-    commune_code = gz_path.stem.replace("cadastre-", "").replace("-parcelles.json", "")
+    commune_code = commune_code_from_path(gz_path)
     
     try:
-        # Load commune parcels
-        with gzip.open(gz_path, "rt", encoding="utf-8") as f:
-            cadastre = gpd.read_file(f)
-        
-        if cadastre is None or len(cadastre) == 0 or "id" not in cadastre.columns:
-            return (commune_code, 0, "no_cadastre")
-        
-        cadastre = cadastre[["id", "geometry"]].rename(columns={"id": "id_parcelle_unique"})
+        # Load commune parcels from the FlatGeobuf copy, only materializing
+        # the id column and the geometry
+        meta, cadastre = pyogrio.read_arrow(ensure_fgb(gz_path), columns=["id"], read_geometry=True)
         
-        # Filter to parcels in this commune that have transaction data
-        parcel_ids = cadastre["id_parcelle_unique"].tolist()
-        matching_rows = [agg_dict[pid] for pid in parcel_ids if pid in agg_dict]
-        
-        if not matching_rows:
-            return (commune_code, 0, "no_transactions")
-        
-        commune_agg = pd.DataFrame(matching_rows)
+        if cadastre.num_rows == 0 or "id" not in cadastre.column_names:
+            return (commune_code, None, "no_cadastre")
         
         # Join: keep only parcels that have price data
-        result = cadastre.merge(commune_agg, on="id_parcelle_unique", how="inner")
-        
-        if len(result) == 0:
-            return (commune_code, 0, "no_match")
-        
-        # Reproject to WGS84 if needed
-        if result.crs and result.crs != "EPSG:4326":
-            result = result.to_crs("EPSG:4326")
+        geometry_name = meta["geometry_name"] or "wkb_geometry"
+        key_type = dept_agg.schema.field("id_parcelle_unique").type
+        cadastre = cadastre.select(["id", geometry_name]).rename_columns(["id_parcelle_unique", geometry_name])
+        cadastre = cadastre.set_column(0, "id_parcelle_unique", cadastre["id_parcelle_unique"].cast(key_type))
+        joined = cadastre.join(dept_agg, keys="id_parcelle_unique", join_type="inner")
         
-        # Simplify geometries for smaller files
-        result["geometry"] = result["geometry"].simplify(0.00001, preserve_topology=True)
+        if joined.num_rows == 0:
+            return (commune_code, None, "no_transactions")
         
-        # Round floats to reduce size
-        float_cols = result.select_dtypes(include=["float64"]).columns
-        for col in float_cols:
-            if col not in ["longitude", "latitude"]:
-                result[col] = result[col].round(2)
-        
-        # Save
-        output_path = Path(output_dir) / f"parcels-{commune_code}.geojson"
-        result.to_file(output_path, driver="GeoJSON")
-        
-        return (commune_code, len(result), "success")
+        result = gpd.GeoDataFrame(
+            joined.drop_columns([geometry_name]).to_pandas(),
+            geometry=shapely.from_wkb(joined[geometry_name].to_numpy(zero_copy_only=False)),
+            crs=meta["crs"],
+        )
+        return (commune_code, result, "success")
         
     except Exception as e:
-        return (commune_code, 0, "error")
+        return (commune_code, None, "error")
+
+
+def prepare_for_web(parcels: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """Reproject, simplify and quantize parcels in one vectorized pass.
+    
+    Geometry work goes straight through shapely 2 ufuncs on the geometry
+    array: pyproj transforms the packed coordinate arrays in one call and
+    shapely.simplify / set_precision run once over all parcels.
+    """
+    geoms = parcels.geometry.to_numpy()
+    
+    # Reproject to WGS84 if needed
+    if parcels.crs and parcels.crs != "EPSG:4326":
+        transformer = pyproj.Transformer.from_crs(parcels.crs, "EPSG:4326", always_xy=True)
+        geoms = shapely.transform(geoms, transformer.transform, interleaved=False)
+    
+    # Simplify geometries for smaller files
+    geoms = shapely.simplify(geoms, SIMPLIFY_TOLERANCE, preserve_topology=True)
+    
+    # Snap to a 1e-6 degree grid (~10 cm), finer than tippecanoe's z16 grid
+    geoms = shapely.set_precision(geoms, grid_size=10 ** -COORDINATE_PRECISION)
+    parcels["geometry"] = gpd.GeoSeries(geoms, index=parcels.index, crs="EPSG:4326" if parcels.crs else None)
+    
+    return parcels
+
+
+def write_commune(parcels: gpd.GeoDataFrame, commune_code: str, output_dir: str | Path) -> None:
+    """Write one commune's parcels to parcels-<code>.geojsonl.
+    
+    Features are newline-delimited (GeoJSONSeq) so tippecanoe -P can split
+    each file across its reader threads.
+    """
+    output_path = Path(output_dir) / f"parcels-{commune_code}.geojsonl"
+    pyogrio.write_dataframe(parcels, output_path, driver="GeoJSONSeq", layer_options=GEOJSON_LAYER_OPTIONS)
+
+
+def process_department(
+    results: list[tuple[str, gpd.GeoDataFrame | None, str]],
+    output_dir: str | Path | None,
+    stream: BinaryIO | None = None,
+) -> list[tuple[str, int, str]]:
+    """Finish a department's communes in one vectorized GeoDataFrame.
+    
+    The joined parcels of every commune are concatenated so reprojection
+    and simplification run once per department, then split back
+    into one GeoJSON file per commune. When a stream is given, the whole
+    department is written to it as GeoJSONSeq instead of to files.
+    
+    Args:
+        results: (commune_code, joined parcels or None, status) per commune
+        output_dir: Directory for the parcels-<code>.geojsonl files
+        stream: Binary stream (e.g. tippecanoe's stdin) to write features to
+    
+    Returns:
+        List of (commune_code, parcel_count, status) per commune
+    """
+    frames = {code: gdf for code, gdf, status in results if gdf is not None}
+    summary = [(code, 0, status) for code, gdf, status in results if gdf is None]
+    if not frames:
+        return summary
+    
+    dept_gdf = pd.concat(frames, names=["commune_code", None]).reset_index(level=0)
+    dept_gdf = prepare_for_web(dept_gdf)
+    
+    if stream is not None:
+        buffer = io.BytesIO()
+        pyogrio.write_dataframe(
+            dept_gdf.drop(columns="commune_code"), buffer, driver="GeoJSONSeq", layer_options=GEOJSON_LAYER_OPTIONS,
+        )
+        stream.write(buffer.getvalue())
+        counts = dept_gdf["commune_code"].value_counts(sort=False)
+        summary.extend((code, int(count), "success") for code, count in counts.items())
+        return summary
+    
+    for commune_code, parcels in dept_gdf.groupby("commune_code", sort=False):
+        try:
+            write_commune(parcels.drop(columns="commune_code"), commune_code, output_dir)
+            summary.append((commune_code, len(parcels), "success"))
+        except Exception as e:
+            summary.append((commune_code, 0, "error"))
+    
+    return summary
+
 
+def publish_department(dept_agg: pl.DataFrame) -> tuple[shared_memory.SharedMemory, int]:
+    """Write department aggregates to shared memory as an Arrow IPC stream.
+    
+    Workers attach to the block by name instead of receiving a pickled
+    copy of the aggregates with every task.
+    
+    Returns:
+        Tuple of (shared memory block, payload size in bytes). The caller
+        must close and unlink the block once the workers are done.
+    """
+    table = dept_agg.to_arrow()
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    payload = sink.getvalue()
+    
+    shm = shared_memory.SharedMemory(create=True, size=max(payload.size, 1))
+    shm.buf[:payload.size] = memoryview(payload).cast("B")
+    return shm, payload.size
+
+
+def attach_department(shm_name: str, shm_size: int) -> None:
+    """Attach a department's aggregates in this worker, once per department.
+    
+    A worker keeps its attachment across tasks and swaps it when the first
+    task of a new department arrives. Workers are recycled every
+    MAX_TASKS_PER_WORKER tasks; a fresh worker re-attaches the current
+    department on its first task. The Arrow table is read in place from
+    shared memory, without copying it into the worker.
+    """
+    global _worker_shm, _worker_dept_agg
+    if _worker_shm is not None:
+        if _worker_shm.name == shm_name:
+            return
+        _worker_dept_agg = None
+        _worker_shm.close()
+    
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    reader = pa.ipc.open_stream(pa.py_buffer(_worker_shm.buf[:shm_size]))
+    _worker_dept_agg = reader.read_all()
 
-def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_WORKERS) -> list[Path]:
+
+def load_commune_shared(args: tuple) -> tuple[str, gpd.GeoDataFrame | None, str]:
+    """Load a commune against its department's shared aggregates.
+    
+    Args:
+        args: Tuple of (gz_path, shm_name, shm_size) as returned by publish_department
+    """
+    gz_path, shm_name, shm_size = args
+    attach_department(shm_name, shm_size)
+    return load_commune_parcels(gz_path, _worker_dept_agg)
+
+
+def process_departments(
+    pool: Pool,
+    dept_jobs: list[tuple[int, pl.DataFrame, list[Path]]],
+    stream: BinaryIO | None = None,
+) -> Iterator[tuple[int, list[tuple[str, int, str]]]]:
+    """Read departments in the pool one step ahead of writing them.
+    
+    The next department's communes are queued with imap_unordered before
+    the current one is simplified and written, so workers keep reading
+    cadastre files while the parent feeds tippecanoe.
+    
+    Args:
+        pool: Worker pool running load_commune_shared
+        dept_jobs: (dept_idx, department aggregates, cadastre files) per department
+        stream: Passed through to process_department
+    
+    Yields:
+        (dept_idx, [(commune_code, parcel_count, status), ...]) per department
+    """
+    in_flight = []
+    try:
+        for dept_idx, dept_agg, dept_files in dept_jobs:
+            shm, shm_size = publish_department(dept_agg)
+            commune_args = [(gz_path, shm.name, shm_size) for gz_path in dept_files]
+            in_flight.append((dept_idx, shm, pool.imap_unordered(load_commune_shared, commune_args, chunksize=4)))
+            
+            if len(in_flight) > 1:
+                yield finish_department(*in_flight.pop(0), stream=stream)
+        
+        while in_flight:
+            yield finish_department(*in_flight.pop(0), stream=stream)
+    finally:
+        for _, shm, _ in in_flight:
+            shm.close()
+            shm.unlink()
+
+
+def finish_department(
+    dept_idx: int,
+    shm: shared_memory.SharedMemory,
+    loaded: Iterator[tuple[str, gpd.GeoDataFrame | None, str]],
+    stream: BinaryIO | None = None,
+) -> tuple[int, list[tuple[str, int, str]]]:
+    """Wait for a department's communes, release its aggregates and write it."""
+    try:
+        loaded = list(loaded)
+    finally:
+        shm.close()
+        shm.unlink()
+    return dept_idx, process_department(loaded, PARCELS_GEOJSON_DIR, stream=stream)
+
+
+def round_prices(agg: pl.DataFrame) -> pl.DataFrame:
+    """Round float aggregate columns to 2 decimals to reduce output size.
+    
+    Done once on the polars aggregate, before it is split by department,
+    rather than per commune on the joined GeoDataFrame.
+    """
+    return agg.with_columns((cs.float() - cs.by_name("longitude", "latitude", require_all=False)).round(2))
+
+
+def partition_by_department(agg: pl.DataFrame) -> dict[str, pl.DataFrame]:
+    """Split parcel aggregates by department, keeping them in Arrow memory.
+    
+    Grouping runs on a Categorical department code, and the key column is
+    dropped from each part since every row of a part shares it.
+    """
+    parts = (
+        agg.with_columns(pl.col("code_departement").cast(pl.Categorical))
+        .partition_by("code_departement", as_dict=True, include_key=False)
+    )
+    return {dept: part for (dept,), part in parts.items()}
+
+
+def generate_parcel_geojson(
+    time_span: str = TIME_SPAN,
+    num_workers: int = NUM_WORKERS,
+    stream: BinaryIO | None = None,
+) -> tuple[list[Path], int]:
     """Generate GeoJSON files for parcels, one per commune.
     
     Processes department by department to limit memory usage.
@@ -124,8 +374,11 @@ def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_W
     Args:
         time_span: Time span for aggregates (default: all)
         num_workers: Number of parallel workers (default: CPU count - 1)
+        stream: If given, write all parcels to this binary stream as
+                GeoJSONSeq instead of creating per-commune files
     
-    Returns list of generated file paths.
+    Returns the generated file paths and their total size in bytes
+    (empty and 0 when streaming).
     """
     logger.info("=" * 60)
     logger.info("Step 1: Generating Parcel GeoJSON files (per commune)")
@@ -133,18 +386,12 @@ def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_W
     
     # Load all parcel aggregates
     logger.info("Loading parcel aggregates...")
-    agg = load_aggregate("parcel", time_span).to_pandas()
+    agg = round_prices(load_aggregate("parcel", time_span))
     logger.info(f"Loaded {len(agg):,} parcel aggregates")
     
     # Group by department for memory-efficient processing
-    # Convert each group to a dict keyed by parcel ID for fast lookup
     logger.info("Grouping aggregates by department...")
-    agg_by_dept = {}
-    for dept, group in agg.groupby("code_departement"):
-        # Convert group to dict of dicts
-        records = group.to_dict("records")
-        group_dict = {row["id_parcelle_unique"]: row for row in records}
-        agg_by_dept[dept] = group_dict
+    agg_by_dept = partition_by_department(agg)
     
     departments_with_data = list(agg_by_dept.keys())
     logger.info(f"Found {len(departments_with_data)} departments with transaction data")
@@ -159,7 +406,7 @@ def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_W
     
     if not all_parcel_files:
         logger.error("No cadastre files found. Run download first.")
-        return []
+        return [], 0
     
     # Group files by department
     files_by_dept = {}
@@ -170,8 +417,9 @@ def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_W
         files_by_dept[dept].append(f)
     
     # Create output directory
-    PARCELS_GEOJSON_DIR.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Output directory: {PARCELS_GEOJSON_DIR}")
+    if stream is None:
+        PARCELS_GEOJSON_DIR.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Output directory: {PARCELS_GEOJSON_DIR}")
     
     # Process department by department
     logger.info(f"Processing {len(files_by_dept)} departments with {num_workers} workers...")
@@ -179,40 +427,46 @@ def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_W
     
     total_parcels = 0
     communes_with_data = 0
-    status_counts = {"no_cadastre": 0, "no_transactions": 0, "no_match": 0, "error": 0, "success": 0}
+    status_counts = {"no_cadastre": 0, "no_transactions": 0, "error": 0, "success": 0}
     
+    # Departments with transactions, in processing order
+    dept_jobs = []
     for dept_idx, (dept_code, dept_files) in enumerate(sorted(files_by_dept.items())):
-        # Get aggregates dict for this department
-        dept_agg_dict = agg_by_dept.get(dept_code, {})
+        dept_agg = agg_by_dept.get(dept_code)
         
-        if not dept_agg_dict:
+        if dept_agg is None or dept_agg.is_empty():
             # No transactions in this department, skip all its communes
             status_counts["no_transactions"] += len(dept_files)
             continue
         
-        # Prepare args for each commune: (gz_path, agg_dict, output_dir)
-        commune_args = [(gz_path, dept_agg_dict, str(PARCELS_GEOJSON_DIR)) for gz_path in dept_files]
-        
-        # Process communes in this department in parallel
-        with mp.Pool(num_workers) as pool:
-            results = pool.map(process_commune_simple, commune_args, chunksize=10)
-        
-        # Aggregate results for this department
-        for commune_code, parcel_count, status in results:
-            status_counts[status] += 1
-            if status == "success":
-                total_parcels += parcel_count
-                communes_with_data += 1
-        
-        # Progress update every 10 departments
-        if (dept_idx + 1) % 10 == 0:
-            elapsed = time.time() - start_time
-            logger.info(f"[{dept_idx + 1}/{len(files_by_dept)}] departments, "
-                  f"{communes_with_data:,} communes with data, {total_parcels:,} parcels, "
-                  f"{elapsed:.0f}s elapsed...")
+        dept_jobs.append((dept_idx, dept_agg, dept_files))
+    
+    # One pool for the whole run: workers import geopandas/pyogrio once and
+    # attach each department's aggregates as its tasks arrive. Workers are
+    # recycled every MAX_TASKS_PER_WORKER tasks; a fresh worker simply
+    # re-attaches the current department on its first task
+    pool = mp.Pool(num_workers, maxtasksperchild=MAX_TASKS_PER_WORKER)
+    try:
+        for dept_idx, results in process_departments(pool, dept_jobs, stream=stream):
+            # Aggregate results for this department
+            for commune_code, parcel_count, status in results:
+                status_counts[status] += 1
+                if status == "success":
+                    total_parcels += parcel_count
+                    communes_with_data += 1
+            
+            # Progress update every 10 departments
+            if (dept_idx + 1) % 10 == 0:
+                elapsed = time.time() - start_time
+                logger.info(f"[{dept_idx + 1}/{len(files_by_dept)}] departments, "
+                      f"{communes_with_data:,} communes with data, {total_parcels:,} parcels, "
+                      f"{elapsed:.0f}s elapsed...")
+    finally:
+        pool.close()
+        pool.join()
     
     # Get list of generated files
-    generated_files = list(PARCELS_GEOJSON_DIR.glob("parcels-*.geojson"))
+    generated_files = [] if stream is not None else list(PARCELS_GEOJSON_DIR.glob("parcels-*.geojsonl"))
     
     elapsed = time.time() - start_time
     logger.info(f"Processing complete in {elapsed:.1f}s ({elapsed/60:.1f} minutes)!")
@@ -220,61 +474,154 @@ def generate_parcel_geojson(time_span: str = TIME_SPAN, num_workers: int = NUM_W
     logger.info(f"Total parcels: {total_parcels:,}")
     logger.info(f"Skipped (no cadastre data): {status_counts['no_cadastre']:,}")
     logger.info(f"Skipped (no transactions): {status_counts['no_transactions']:,}")
-    logger.info(f"Skipped (no parcel match): {status_counts['no_match']:,}")
     logger.info(f"Skipped (errors): {status_counts['error']:,}")
     
     # Calculate total GeoJSON size
+    total_bytes = sum(f.stat().st_size for f in generated_files)
     if generated_files:
-        total_geojson_size = sum(f.stat().st_size for f in generated_files) / (1024 * 1024)
-        logger.info(f"Total GeoJSON size: {total_geojson_size:.1f} MB")
+        logger.info(f"Total GeoJSON size: {total_bytes / (1024 * 1024):.1f} MB")
     
-    return generated_files
+    return generated_files, total_bytes
 
 
-def convert_to_pmtiles(geojson_files: list[Path], min_zoom: int = 13, max_zoom: int = 16) -> bool:
-    """Convert GeoJSON files to PMTiles using tippecanoe + pmtiles CLI.
-    
-    tippecanoe v1.x outputs MBTiles, so we convert to PMTiles afterwards.
+def tippecanoe_command(output: Path, min_zoom: int, max_zoom: int) -> list[str]:
+    """Build the tippecanoe command for the parcels layer (without inputs)."""
+    return [
+        "tippecanoe",
+        "-o", str(output),
+        "-Z", str(min_zoom),  # Min zoom level
+        "-z", str(max_zoom),  # Max zoom level
+        "--drop-densest-as-needed",  # Drop features to fit tile size limit
+        "--extend-zooms-if-still-dropping",  # Extend zoom if needed
+        "-l", "parcels",  # Layer name
+        "--force",  # Overwrite existing file
+        "-P",  # Read line-delimited GeoJSON input in parallel
+    ]
+
+
+def mbtiles_to_pmtiles(mbtiles_output: Path, total_input_size: float | None = None) -> bool:
+    """Convert the intermediate MBTiles to PMTiles and remove it (tippecanoe < 2.17).
     
     Returns True if successful.
     """
-    logger.info("=" * 60)
-    logger.info("Step 2: Converting to PMTiles")
-    logger.info("=" * 60)
+    logger.info("Converting MBTiles → PMTiles...")
+    try:
+        result = subprocess.run(
+            ["pmtiles", "convert", str(mbtiles_output), str(PMTILES_OUTPUT)],
+            capture_output=True,
+            text=True
+        )
+        
+        if result.returncode != 0:
+            logger.error("pmtiles convert failed:")
+            logger.error(result.stderr)
+            return False
+        
+        if not PMTILES_OUTPUT.exists():
+            logger.error("PMTiles file not created")
+            return False
+        
+        pmtiles_size = PMTILES_OUTPUT.stat().st_size / (1024 * 1024)
+        
+        logger.info("Success!")
+        logger.info(f"Output: {PMTILES_OUTPUT.name} ({pmtiles_size:.1f} MB)")
+        if total_input_size is not None:
+            compression_ratio = total_input_size / pmtiles_size if pmtiles_size > 0 else 0
+            logger.info(f"Compression ratio: {compression_ratio:.1f}x")
+        
+
+        mbtiles_output.unlink()
+        logger.info("Cleaned up intermediate MBTiles")
+        
+        return True
+        
+    except Exception as e:
+        logger.error(f"pmtiles convert failed: {e}")
+        return False
+
+
+def resolve_tiles_output() -> Path | None:
+    """Pick tippecanoe's output path and check the tools it needs.
+    
+    tippecanoe >= 2.17 writes PMTiles directly. Older versions write
+    MBTiles, which the pmtiles CLI then converts.
     
+    Returns the path tippecanoe should write, or None if a tool is missing.
+    """
     if not check_tippecanoe():
         logger.error("tippecanoe not found!")
         logger.error("Install with: sudo apt install tippecanoe")
         logger.error("Or build from source: https://github.com/felt/tippecanoe")
-        return False
+        return None
+    
+    if tippecanoe_supports_pmtiles():
+        return PMTILES_OUTPUT
     
+    logger.info("tippecanoe < 2.17: writing MBTiles and converting with pmtiles CLI")
     if not check_pmtiles_cli():
         logger.error("pmtiles CLI not found!")
         logger.error("Install from: https://github.com/protomaps/go-pmtiles/releases")
+        return None
+    
+    return PMTILES_OUTPUT.with_suffix(".mbtiles")
+
+
+def finalize_tiles(tiles_output: Path, total_input_size: float | None = None) -> bool:
+    """Check tippecanoe's output, converting it to PMTiles if it is MBTiles.
+    
+    Returns True if successful.
+    """
+    if not tiles_output.exists():
+        logger.error(f"{tiles_output.name} not created")
+        return False
+    
+    if tiles_output != PMTILES_OUTPUT:
+        mbtiles_size = tiles_output.stat().st_size / (1024 * 1024)
+        logger.info(f"MBTiles created: {mbtiles_size:.1f} MB")
+        return mbtiles_to_pmtiles(tiles_output, total_input_size)
+    
+    pmtiles_size = PMTILES_OUTPUT.stat().st_size / (1024 * 1024)
+    logger.info("Success!")
+    logger.info(f"Output: {PMTILES_OUTPUT.name} ({pmtiles_size:.1f} MB)")
+    if total_input_size is not None:
+        compression_ratio = total_input_size / pmtiles_size if pmtiles_size > 0 else 0
+        logger.info(f"Compression ratio: {compression_ratio:.1f}x")
+    return True
+
+
+def convert_to_pmtiles(
+    geojson_files: list[Path],
+    min_zoom: int = 13,
+    max_zoom: int = 16,
+    total_bytes: int | None = None,
+) -> bool:
+    """Convert GeoJSON files to PMTiles using tippecanoe.
+    
+    total_bytes is the combined size of geojson_files, as returned by
+    generate_parcel_geojson; the files are only stat'ed when it is None.
+    
+    Returns True if successful.
+    """
+    logger.info("=" * 60)
+    logger.info("Step 2: Converting to PMTiles")
+    logger.info("=" * 60)
+    
+    tiles_output = resolve_tiles_output()
+    if tiles_output is None:
         return False
     
     if not geojson_files:
         logger.warning("No GeoJSON files to convert")
         return False
     
-    # Intermediate MBTiles file
-    mbtiles_output = PMTILES_OUTPUT.with_suffix(".mbtiles")
-    
-    total_input_size = sum(f.stat().st_size for f in geojson_files) / (1024 * 1024)
+    if total_bytes is None:
+        total_bytes = sum(f.stat().st_size for f in geojson_files)
+    total_input_size = total_bytes / (1024 * 1024)
     logger.info(f"Input: {len(geojson_files):,} GeoJSON files ({total_input_size:.1f} MB)")
     
 
-    logger.info("Step 2a: Running tippecanoe → MBTiles...")
-    cmd = [
-        "tippecanoe",
-        "-o", str(mbtiles_output),
-        "-Z", str(min_zoom),  # Min zoom level
-        "-z", str(max_zoom),  # Max zoom level
-        "--drop-densest-as-needed",  # Drop features to fit tile size limit
-        "--extend-zooms-if-still-dropping",  # Extend zoom if needed
-        "-l", "parcels",  # Layer name
-        "--force",  # Overwrite existing file
-    ]
+    logger.info(f"Running tippecanoe → {tiles_output.name}...")
+    cmd = tippecanoe_command(tiles_output, min_zoom, max_zoom)
     
     # Add all GeoJSON files
     cmd.extend([str(f) for f in geojson_files])
@@ -290,70 +637,55 @@ def convert_to_pmtiles(geojson_files: list[Path], min_zoom: int = 13, max_zoom:
             logger.error(result.stderr)
             return False
         
-        if not mbtiles_output.exists():
-            logger.error("MBTiles file not created")
-            return False
-        
-        mbtiles_size = mbtiles_output.stat().st_size / (1024 * 1024)
-        logger.info(f"MBTiles created: {mbtiles_size:.1f} MB")
-        
     except Exception as e:
         logger.error(f"tippecanoe failed: {e}")
         return False
     
+    return finalize_tiles(tiles_output, total_input_size)
 
-    logger.info("Step 2b: Converting MBTiles → PMTiles...")
-    try:
-        result = subprocess.run(
-            ["pmtiles", "convert", str(mbtiles_output), str(PMTILES_OUTPUT)],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            logger.error("pmtiles convert failed:")
-            logger.error(result.stderr)
-            return False
-        
-        if not PMTILES_OUTPUT.exists():
-            logger.error("PMTiles file not created")
-            return False
-        
-        pmtiles_size = PMTILES_OUTPUT.stat().st_size / (1024 * 1024)
-        compression_ratio = total_input_size / pmtiles_size if pmtiles_size > 0 else 0
-        
-        logger.info("Success!")
-        logger.info(f"Output: {PMTILES_OUTPUT.name} ({pmtiles_size:.1f} MB)")
-        logger.info(f"Compression ratio: {compression_ratio:.1f}x")
-        
 
-        mbtiles_output.unlink()
-        logger.info("Cleaned up intermediate MBTiles")
-        
-        return True
-        
-    except Exception as e:
-        logger.error(f"pmtiles convert failed: {e}")
-        return False
-
-
-def cleanup_geojson(geojson_files: list[Path]) -> None:
-    """Remove intermediate GeoJSON files to save disk space."""
+def stream_to_pmtiles(min_zoom: int = 13, max_zoom: int = 16, num_workers: int = NUM_WORKERS) -> bool:
+    """Generate parcels and pipe them straight into tippecanoe's stdin.
+    
+    No intermediate GeoJSON is written to disk: each department is
+    written as GeoJSONSeq to tippecanoe as soon as it is processed.
+    
+    Returns True if successful.
+    """
     logger.info("=" * 60)
-    logger.info("Step 3: Cleaning up intermediate files")
+    logger.info("Streaming parcels into tippecanoe")
     logger.info("=" * 60)
     
-    total_size = 0
-    for f in geojson_files:
-        if f.exists():
-            total_size += f.stat().st_size
-            f.unlink()
+    tiles_output = resolve_tiles_output()
+    if tiles_output is None:
+        return False
     
-    # Remove parcels directory if empty
-    if PARCELS_GEOJSON_DIR.exists() and not any(PARCELS_GEOJSON_DIR.iterdir()):
-        PARCELS_GEOJSON_DIR.rmdir()
+    cmd = tippecanoe_command(tiles_output, min_zoom, max_zoom)
     
-    logger.info(f"Removed {len(geojson_files):,} files ({total_size / (1024*1024):.1f} MB)")
+    logger.info(f"Zoom levels: {min_zoom}-{max_zoom}")
+    logger.info("Layer name: parcels")
+    
+    # tippecanoe logs progress continuously, so stderr goes to a file
+    # rather than a pipe that nobody drains while we write stdin
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+            try:
+                generate_parcel_geojson(num_workers=num_workers, stream=proc.stdin)
+            finally:
+                proc.stdin.close()
+            returncode = proc.wait()
+        except Exception as e:
+            logger.error(f"tippecanoe failed: {e}")
+            return False
+        
+        if returncode != 0:
+            stderr.seek(0)
+            logger.error("tippecanoe failed:")
+            logger.error(stderr.read())
+            return False
+    
+    return finalize_tiles(tiles_output)
 
 
 def run(
@@ -366,7 +698,7 @@ def run(
     """Generate parcel PMTiles for DVF map.
     
     Args:
-        keep_geojson: Keep intermediate GeoJSON files after PMTiles creation
+        keep_geojson: Write per-commune GeoJSON files instead of streaming into tippecanoe
         geojson_only: Only generate GeoJSON, skip PMTiles conversion
         min_zoom: Minimum zoom level for PMTiles
         max_zoom: Maximum zoom level for PMTiles
@@ -393,24 +725,25 @@ def run(
         geojson_only = True
         keep_geojson = True
     
-    # Step 1: Generate GeoJSON (per commune)
-    geojson_files = generate_parcel_geojson(num_workers=num_workers)
-    
-    if not geojson_files:
-        logger.warning("No parcel data generated. Exiting.")
-        return
-    
-    # Step 2: Convert to PMTiles (unless skipped)
-    if not geojson_only:
-        success = convert_to_pmtiles(
-            geojson_files,
-            min_zoom=min_zoom,
-            max_zoom=max_zoom
-        )
+    if not geojson_only and not keep_geojson:
+        # No GeoJSON to keep: stream parcels straight into tippecanoe
+        stream_to_pmtiles(min_zoom=min_zoom, max_zoom=max_zoom, num_workers=num_workers)
+    else:
+        # Step 1: Generate GeoJSON (per commune)
+        geojson_files, total_bytes = generate_parcel_geojson(num_workers=num_workers)
+        
+        if not geojson_files:
+            logger.warning("No parcel data generated. Exiting.")
+            return
         
-        # Step 3: Cleanup (unless keeping geojson)
-        if success and not keep_geojson:
-            cleanup_geojson(geojson_files)
+        # Step 2: Convert to PMTiles (unless skipped)
+        if not geojson_only:
+            convert_to_pmtiles(
+                geojson_files,
+                min_zoom=min_zoom,
+                max_zoom=max_zoom,
+                total_bytes=total_bytes,
+            )
     
     elapsed = time.time() - start_time
     
@@ -425,8 +758,8 @@ def run(
         logger.info(f"{PMTILES_OUTPUT.name}: {size_mb:.1f} MB")
     
     if keep_geojson or geojson_only:
-        geojson_count = len(list(PARCELS_GEOJSON_DIR.glob("*.geojson")))
-        total_size = sum(f.stat().st_size for f in PARCELS_GEOJSON_DIR.glob("*.geojson"))
+        geojson_count = len(list(PARCELS_GEOJSON_DIR.glob("*.geojsonl")))
+        total_size = sum(f.stat().st_size for f in PARCELS_GEOJSON_DIR.glob("*.geojsonl"))
         logger.info(f"parcels/: {geojson_count:,} files ({total_size / (1024*1024):.1f} MB)")
 
 
@@ -436,7 +769,7 @@ def main():
     parser.add_argument(
         "--keep-geojson",
         action="store_true",
-        help="Keep intermediate GeoJSON files (default: delete after PMTiles creation)"
+        help="Write per-commune GeoJSON files before PMTiles creation (default: stream into tippecanoe)"
     )
     parser.add_argument(
         "--geojson-only",
@@ -30,6 +30,65 @@ ARRONDISSEMENT_TO_CITY = {
 }
 
 
+def scan_residential(path: Path) -> pl.LazyFrame:
+    """Lazily scan residential transactions with a valid prix_m2.
+    
+    Only the columns used for the city stats are read, and the filters are
+    pushed into the parquet scan so row groups can be skipped from their
+    statistics.
+    """
+    return (
+        pl.scan_parquet(path)
+        .select(["code_commune", "nom_commune", "type_local", "prix_m2"])
+        # Residential properties only (Maison or Appartement) with a valid prix_m2
+        .filter(
+            pl.col("type_local").is_in(["Maison", "Appartement"])
+            & pl.col("prix_m2").is_not_null()
+            & (pl.col("prix_m2") > 0)
+        )
+    )
+
+
+def aggregate_cities(lf: pl.LazyFrame) -> pl.LazyFrame:
+    """Aggregate residential transactions per city with true medians.
+    
+    Arrondissements are grouped under their parent city. Per-type medians
+    are conditional aggregations, so every statistic comes from one group_by.
+    """
+    is_maison = pl.col("type_local") == "Maison"
+    is_appart = pl.col("type_local") == "Appartement"
+    
+    return (
+        lf
+        # Create city_name column: use parent city for arrondissements, otherwise nom_commune
+        .with_columns(
+            pl.when(pl.col("code_commune").is_in(list(ARRONDISSEMENT_TO_CITY.keys())))
+            .then(pl.col("code_commune").replace(ARRONDISSEMENT_TO_CITY))
+            .otherwise(pl.col("nom_commune"))
+            .alias("city_name")
+        )
+        .group_by("city_name")
+        .agg([
+            pl.len().alias("nb_transactions"),
+            is_maison.sum().alias("nb_maisons"),
+            is_appart.sum().alias("nb_appartements"),
+            pl.col("prix_m2").median().alias("prix_m2_median"),
+            pl.col("prix_m2").filter(is_maison).median().alias("prix_m2_maison_median"),
+            pl.col("prix_m2").filter(is_appart).median().alias("prix_m2_appart_median"),
+        ])
+        # Rename and select columns
+        .select([
+            pl.col("city_name").alias("name"),
+            "nb_transactions",
+            "nb_maisons",
+            "nb_appartements",
+            "prix_m2_median",
+            "prix_m2_maison_median",
+            "prix_m2_appart_median",
+        ])
+    )
+
+
 def main():
     logger.info("Generating top cities data from processed DVF transactions...")
     
@@ -37,63 +96,10 @@ def main():
         logger.error(f"DVF data not found at {DVF_PATH}")
         return 1
     
-    logger.info(f"Loading {DVF_PATH}...")
-    df = pl.read_parquet(DVF_PATH)
-    logger.info(f"Loaded {len(df):,} transactions")
-    
-    # Filter to residential properties only (Maison or Appartement)
-    df = df.filter(pl.col("type_local").is_in(["Maison", "Appartement"]))
-    # Filter out rows with missing prix_m2
-    df = df.filter(pl.col("prix_m2").is_not_null() & (pl.col("prix_m2") > 0))
-    logger.info(f"Filtered to {len(df):,} residential transactions with valid prix_m2")
-    
-    # Create city_name column: use parent city for arrondissements, otherwise nom_commune
-    df = df.with_columns(
-        pl.when(pl.col("code_commune").is_in(list(ARRONDISSEMENT_TO_CITY.keys())))
-        .then(pl.col("code_commune").replace(ARRONDISSEMENT_TO_CITY))
-        .otherwise(pl.col("nom_commune"))
-        .alias("city_name")
-    )
-    
-    # Compute aggregates per city with true medians
-    aggregated = df.group_by("city_name").agg([
-        pl.len().alias("nb_transactions"),
-        (pl.col("type_local") == "Maison").sum().alias("nb_maisons"),
-        (pl.col("type_local") == "Appartement").sum().alias("nb_appartements"),
-        pl.col("prix_m2").median().alias("prix_m2_median"),
-    ])
-    
-    # Compute median for maisons only
-    maisons_median = (
-        df.filter(pl.col("type_local") == "Maison")
-        .group_by("city_name")
-        .agg(pl.col("prix_m2").median().alias("prix_m2_maison_median"))
-    )
-    
-    # Compute median for appartements only
-    apparts_median = (
-        df.filter(pl.col("type_local") == "Appartement")
-        .group_by("city_name")
-        .agg(pl.col("prix_m2").median().alias("prix_m2_appart_median"))
-    )
-    
-    # Join all together
-    aggregated = (
-        aggregated
-        .join(maisons_median, on="city_name", how="left")
-        .join(apparts_median, on="city_name", how="left")
-    )
-    
-    # Rename and select columns
-    aggregated = aggregated.select([
-        pl.col("city_name").alias("name"),
-        "nb_transactions",
-        "nb_maisons",
-        "nb_appartements",
-        "prix_m2_median",
-        "prix_m2_maison_median",
-        "prix_m2_appart_median",
-    ])
+    logger.info(f"Scanning {DVF_PATH}...")
+    aggregated = aggregate_cities(scan_residential(DVF_PATH)).collect(engine="streaming")
+    logger.info(f"Aggregated {aggregated['nb_transactions'].sum():,} residential transactions "
+                f"into {len(aggregated):,} cities")
     
     # Sort by transactions and take top 50
     top_cities = aggregated.sort("nb_transactions", descending=True).head(50)
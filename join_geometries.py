@@ -4,8 +4,8 @@ Join price aggregates with administrative geometries.
 Outputs GeoJSON files for map visualization:
 - regions.geojson
 - departments.geojson
-- communes.geojson
-- iris.geojson (neighborhoods)
+- communes.geojsonl (line-delimited, for tippecanoe)
+- iris.geojsonl (neighborhoods, line-delimited, for tippecanoe)
 - parcels/ (one file per department from cadastre)
 
 Uses Admin Express GeoPackage for administrative boundaries.
@@ -14,14 +14,20 @@ Uses Cadastre Etalab for parcel geometries (by department).
 """
 
 import gzip
+import io
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import polars as pl
+import pyogrio
 import requests
+import shapely
 
 from download_data import CADASTRE_DIR
 from utils.logger import get_logger
@@ -36,6 +42,9 @@ OUTPUT_DIR = Path("map/data")
 # Admin Express GeoPackage
 ADMIN_EXPRESS_GPKG = GEOMETRIES_DIR / "ADE_4-0_GPKG_LAMB93_FXX-ED2026-01-19.gpkg"
 
+# GeoParquet copies of the Admin Express and IRIS layers (WGS84)
+GEOMETRY_CACHE_DIR = GEOMETRIES_DIR / "cache"
+
 # IRIS GeoPackage
 IRIS_GPKG = GEOMETRIES_DIR / "CONTOURS-IRIS-PE_3-0__GPKG_LAMB93_FXX_2025-01-01/CONTOURS-IRIS-PE/1_DONNEES_LIVRAISON_2025-09-00130/CONTOURS-IRIS-PE_3-0_GPKG_LAMB93_FXX-ED2025-01-01/contours-iris-pe.gpkg"
 
@@ -45,11 +54,21 @@ IRIS_REFERENCE = Path("data/insee_sources/reference_IRIS_geo2025.xlsx")
 # Cadastre base URL
 CADASTRE_BASE_URL = "https://cadastre.data.gouv.fr/data/etalab-cadastre/2025-12-01/geojson/communes/"
 
+# Threads for geometry simplification (shapely releases the GIL)
+SIMPLIFY_THREADS = os.cpu_count() or 1
+
+# Decimals kept in output coordinates (~1 m); GeoJSON otherwise prints ~15 digits
+COORDINATE_PRECISION = 5
+GEOJSON_LAYER_OPTIONS = {"COORDINATE_PRECISION": COORDINATE_PRECISION}
+
+# Levels joined and saved concurrently in main()
+JOIN_THREADS = 4
+
 # Time span to use for map (can be changed)
 TIME_SPAN = "all"  # Good balance of freshness and volume
 
 # All metropolitan France department codes
-DEPARTMENTS = [
+DEPARTMENTS = frozenset([
     "01", "02", "03", "04", "05", "06", "07", "08", "09", "10",
     "11", "12", "13", "14", "15", "16", "17", "18", "19", "21",
     "22", "23", "24", "25", "26", "27", "28", "29", "2A", "2B",
@@ -60,17 +79,48 @@ DEPARTMENTS = [
     "70", "71", "72", "73", "74", "75", "76", "77", "78", "79",
     "80", "81", "82", "83", "84", "85", "86", "87", "88", "89",
     "90", "91", "92", "93", "94", "95",
-]
+])
+
+# Communes replaced by their arrondissements: Paris, Lyon, Marseille
+PARENT_CODES = np.array(["75056", "69123", "13055"])
+
+
+def _read_layer_cached(
+    gpkg: Path, layer: str | None, columns: list[str], cache_path: Path
+) -> gpd.GeoDataFrame:
+    """Read columns of a GeoPackage layer in WGS84, through a GeoParquet cache.
+    
+    The first read reprojects the layer and writes it to cache_path; later
+    runs read that file and skip both OGR and PROJ. The cache is rebuilt if
+    the GeoPackage is newer or lacks a column.
+    """
+    if cache_path.exists() and cache_path.stat().st_mtime >= gpkg.stat().st_mtime:
+        gdf = gpd.read_parquet(cache_path)
+        if set(columns) <= set(gdf.columns):
+            return gdf[[*columns, "geometry"]]
+    
+    # Only the requested fields are read from the GeoPackage, as Arrow
+    gdf = pyogrio.read_dataframe(gpkg, layer=layer, columns=columns, use_arrow=True)
+    # Reproject to WGS84 for web maps
+    gdf = gdf.to_crs("EPSG:4326")
+    
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.stem}.tmp.parquet")
+    gdf.to_parquet(tmp_path, compression="zstd")
+    os.replace(tmp_path, cache_path)
+    return gdf
+
+
+def _read_admin_layer(layer: str, columns: list[str]) -> gpd.GeoDataFrame:
+    """Read columns of an Admin Express layer (cached as GEOMETRY_CACHE_DIR/<layer>.parquet)."""
+    return _read_layer_cached(ADMIN_EXPRESS_GPKG, layer, columns, GEOMETRY_CACHE_DIR / f"{layer}.parquet")
 
 
 def load_regions_geometry() -> gpd.GeoDataFrame:
     """Load region geometries from Admin Express."""
     logger.info("  Loading regions from Admin Express...")
-    gdf = gpd.read_file(ADMIN_EXPRESS_GPKG, layer="region")
-    # Reproject to WGS84 for web maps
-    gdf = gdf.to_crs("EPSG:4326")
-    # Keep relevant columns and rename for join
-    gdf = gdf[["code_insee", "nom_officiel", "geometry"]]
+    gdf = _read_admin_layer("region", ["code_insee", "nom_officiel"])
+    # Rename for join
     gdf = gdf.rename(columns={"code_insee": "code_region", "nom_officiel": "nom_region_geo"})
     logger.info(f"    Loaded {len(gdf)} regions")
     return gdf
@@ -79,9 +129,7 @@ def load_regions_geometry() -> gpd.GeoDataFrame:
 def load_departments_geometry() -> gpd.GeoDataFrame:
     """Load department geometries from Admin Express."""
     logger.info("  Loading departments from Admin Express...")
-    gdf = gpd.read_file(ADMIN_EXPRESS_GPKG, layer="departement")
-    gdf = gdf.to_crs("EPSG:4326")
-    gdf = gdf[["code_insee", "code_insee_de_la_region", "nom_officiel", "geometry"]]
+    gdf = _read_admin_layer("departement", ["code_insee", "code_insee_de_la_region", "nom_officiel"])
     gdf = gdf.rename(columns={
         "code_insee": "code_departement",
         "code_insee_de_la_region": "code_region",
@@ -94,9 +142,7 @@ def load_departments_geometry() -> gpd.GeoDataFrame:
 def load_communes_geometry() -> gpd.GeoDataFrame:
     """Load commune geometries from Admin Express, including arrondissements."""
     logger.info("  Loading communes from Admin Express...")
-    gdf = gpd.read_file(ADMIN_EXPRESS_GPKG, layer="commune")
-    gdf = gdf.to_crs("EPSG:4326")
-    gdf = gdf[["code_insee", "code_insee_du_departement", "nom_officiel", "geometry"]]
+    gdf = _read_admin_layer("commune", ["code_insee", "code_insee_du_departement", "nom_officiel"])
     gdf = gdf.rename(columns={
         "code_insee": "code_commune",
         "code_insee_du_departement": "code_departement",
@@ -106,10 +152,9 @@ def load_communes_geometry() -> gpd.GeoDataFrame:
     
     # Load arrondissements (Paris, Lyon, Marseille)
     logger.info("  Loading arrondissements from Admin Express...")
-    arr = gpd.read_file(ADMIN_EXPRESS_GPKG, layer="arrondissement_municipal")
-    arr = arr.to_crs("EPSG:4326")
-    arr["code_insee_du_departement"] = arr["code_insee"].str[:2]
-    arr = arr[["code_insee", "code_insee_du_departement", "nom_officiel", "geometry"]]
+    arr = _read_admin_layer("arrondissement_municipal", ["code_insee", "nom_officiel"])
+    # Insert the department code in place so columns already match the communes
+    arr.insert(1, "code_insee_du_departement", arr["code_insee"].str[:2])
     arr = arr.rename(columns={
         "code_insee": "code_commune",
         "code_insee_du_departement": "code_departement",
@@ -118,13 +163,11 @@ def load_communes_geometry() -> gpd.GeoDataFrame:
     logger.info(f"    Loaded {len(arr)} arrondissements")
     
     # Remove parent communes that are replaced by arrondissements
-    # Paris=75056, Lyon=69123, Marseille=13055
-    parent_codes = ["75056", "69123", "13055"]
-    gdf = gdf[~gdf["code_commune"].isin(parent_codes)]
-    logger.info(f"    Removed {len(parent_codes)} parent communes (Paris, Lyon, Marseille)")
+    gdf = gdf.iloc[~np.isin(gdf["code_commune"].to_numpy(), PARENT_CODES)]
+    logger.info(f"    Removed {len(PARENT_CODES)} parent communes (Paris, Lyon, Marseille)")
     
     # Concatenate
-    gdf = pd.concat([gdf, arr], ignore_index=True)
+    gdf = pd.concat([gdf, arr], ignore_index=True, copy=False)
     logger.info(f"    Total: {len(gdf)} communes + arrondissements")
     return gdf
 
@@ -135,16 +178,33 @@ def load_aggregate(level: str, time_span: str = TIME_SPAN) -> pl.DataFrame:
     return pl.read_parquet(path)
 
 
+def join_on_key(geo: gpd.GeoDataFrame, agg: pl.DataFrame, key: str) -> gpd.GeoDataFrame:
+    """Left-join aggregates onto geometries, in Polars.
+    
+    Only the attribute columns go through Polars; the geometry column is
+    reattached by position, since the join keeps the left row order.
+    Overlapping columns get merge's _x/_y suffixes. Raises if agg has
+    duplicate keys (validate="m:1").
+    """
+    attrs = pl.from_pandas(pd.DataFrame(geo.drop(columns="geometry")))
+    overlap = [c for c in attrs.columns if c in agg.columns and c != key]
+    attrs = attrs.rename({c: f"{c}_x" for c in overlap})
+    agg = agg.rename({c: f"{c}_y" for c in overlap})
+    
+    joined = attrs.join(agg, on=key, how="left", validate="m:1", maintain_order="left")
+    return gpd.GeoDataFrame(joined.to_pandas(), geometry=geo.geometry.values, crs=geo.crs)
+
+
 def join_regions(time_span: str = TIME_SPAN) -> gpd.GeoDataFrame:
     """Join region aggregates with geometries."""
     logger.info("\n1. Joining REGIONS...")
     
     # Load geometry and aggregates
     geo = load_regions_geometry()
-    agg = load_aggregate("region", time_span).to_pandas()
+    agg = load_aggregate("region", time_span)
     
     # Join
-    result = geo.merge(agg, on="code_region", how="left")
+    result = join_on_key(geo, agg, "code_region")
     
     # Check for missing data
     missing = result[result["nb_transactions"].isna()]
@@ -159,18 +219,17 @@ def join_country(regions_gdf: gpd.GeoDataFrame, time_span: str = TIME_SPAN) -> g
     """Create country geometry by dissolving regions and adding country aggregate."""
     logger.info("\n0. Creating COUNTRY...")
     
-    # Dissolve regions to single country geometry
-    country = regions_gdf.dissolve()
-    country = country.reset_index(drop=True)
+    # Union regions into a single country geometry
+    geom = shapely.union_all(regions_gdf.geometry.values)
+    country = gpd.GeoDataFrame(geometry=[geom], crs=regions_gdf.crs)
     
-    # Load country aggregate
-    agg = load_aggregate("country", time_span).to_pandas()
+    # Load country aggregate (a single row)
+    stats = load_aggregate("country", time_span).row(0, named=True)
     
-    # Add aggregate data as columns
-    for col in agg.columns:
-        country[col] = agg[col].iloc[0]
+    # Add aggregate data as columns in one assign
+    country = country.assign(**stats)
     
-    logger.info(f"    Created country geometry with {agg['nb_transactions'].iloc[0]:,} transactions")
+    logger.info(f"    Created country geometry with {stats['nb_transactions']:,} transactions")
     return country
 
 
@@ -179,12 +238,12 @@ def join_departments(time_span: str = TIME_SPAN) -> gpd.GeoDataFrame:
     logger.info("\n2. Joining DEPARTMENTS...")
     
     geo = load_departments_geometry()
-    agg = load_aggregate("department", time_span).to_pandas()
+    agg = load_aggregate("department", time_span)
     
     # Drop code_region from agg to avoid duplicate columns
-    agg = agg.drop(columns=["code_region", "nom_region"], errors="ignore")
+    agg = agg.drop(["code_region", "nom_region"], strict=False)
     
-    result = geo.merge(agg, on="code_departement", how="left")
+    result = join_on_key(geo, agg, "code_departement")
     
     missing = result[result["nb_transactions"].isna()]
     if len(missing) > 0:
@@ -199,9 +258,9 @@ def join_communes(time_span: str = TIME_SPAN) -> gpd.GeoDataFrame:
     logger.info("\n3. Joining COMMUNES...")
     
     geo = load_communes_geometry()
-    agg = load_aggregate("commune", time_span).to_pandas()
+    agg = load_aggregate("commune", time_span)
     
-    result = geo.merge(agg, on="code_commune", how="left")
+    result = join_on_key(geo, agg, "code_commune")
     
     # Stats
     with_data = result[result["nb_transactions"].notna()]
@@ -212,6 +271,31 @@ def join_communes(time_span: str = TIME_SPAN) -> gpd.GeoDataFrame:
     return result
 
 
+def _read_iris_reference() -> pd.DataFrame:
+    """Read IRIS codes and names from the INSEE reference, through a parquet cache.
+    
+    The spreadsheet is parsed once into IRIS_REFERENCE with a .parquet
+    suffix; later runs read that file. The cache is rebuilt if the
+    spreadsheet is newer.
+    """
+    cache_path = IRIS_REFERENCE.with_suffix(".parquet")
+    if cache_path.exists() and cache_path.stat().st_mtime >= IRIS_REFERENCE.stat().st_mtime:
+        return pd.read_parquet(cache_path)
+    
+    iris_ref = pd.read_excel(
+        IRIS_REFERENCE, header=5, usecols=["CODE_IRIS", "LIB_IRIS"], dtype={"CODE_IRIS": str}
+    )
+    iris_ref = iris_ref.rename(columns={
+        "CODE_IRIS": "code_iris",
+        "LIB_IRIS": "nom_iris_ref"
+    })
+    
+    tmp_path = cache_path.with_name(f"{cache_path.stem}.tmp.parquet")
+    iris_ref.to_parquet(tmp_path, compression="zstd")
+    os.replace(tmp_path, cache_path)
+    return iris_ref
+
+
 def load_iris_geometry() -> gpd.GeoDataFrame:
     """Load IRIS geometries from CONTOURS-IRIS GeoPackage.
     
@@ -219,11 +303,11 @@ def load_iris_geometry() -> gpd.GeoDataFrame:
     Falls back to original nom_iris from GPKG if reference lookup fails.
     """
     logger.info("  Loading IRIS from CONTOURS-IRIS GPKG...")
-    gdf = gpd.read_file(IRIS_GPKG)
-    # Reproject to WGS84 for web maps
-    gdf = gdf.to_crs("EPSG:4326")
-    # Keep relevant columns - including nom_iris as fallback
-    gdf = gdf[["code_iris", "nom_iris", "code_insee", "nom_commune", "geometry"]]
+    gdf = _read_layer_cached(
+        IRIS_GPKG, None, ["code_iris", "nom_iris", "code_insee", "nom_commune"],
+        GEOMETRY_CACHE_DIR / "iris.parquet",
+    )
+    # nom_iris is kept as fallback
     gdf = gdf.rename(columns={
         "code_insee": "code_commune_iris", 
         "nom_commune": "nom_commune_iris",
@@ -233,14 +317,7 @@ def load_iris_geometry() -> gpd.GeoDataFrame:
     
 
     logger.info("  Loading IRIS names from INSEE reference...")
-    iris_ref = pd.read_excel(IRIS_REFERENCE, header=5)
-    iris_ref = iris_ref[["CODE_IRIS", "LIB_IRIS"]].rename(columns={
-        "CODE_IRIS": "code_iris",
-        "LIB_IRIS": "nom_iris_ref"
-    })
-
-    iris_ref["code_iris"] = iris_ref["code_iris"].astype(str)
-    gdf["code_iris"] = gdf["code_iris"].astype(str)
+    iris_ref = _read_iris_reference()
     logger.info(f"    Loaded {len(iris_ref):,} IRIS names")
     
     # Join IRIS names
@@ -267,13 +344,12 @@ def join_iris(time_span: str = TIME_SPAN) -> gpd.GeoDataFrame:
     logger.info("\n4. Joining IRIS (neighborhoods)...")
     
     geo = load_iris_geometry()
-    agg = load_aggregate("iris", time_span).to_pandas()
+    agg = load_aggregate("iris", time_span)
     
     # Drop nom_iris from aggregates to avoid duplicate (geometry has the enriched version)
-    if "nom_iris" in agg.columns:
-        agg = agg.drop(columns=["nom_iris"])
+    agg = agg.drop("nom_iris", strict=False)
     
-    result = geo.merge(agg, on="code_iris", how="left")
+    result = join_on_key(geo, agg, "code_iris")
     
     # Stats
     with_data = result[result["nb_transactions"].notna()]
@@ -285,42 +361,85 @@ def join_iris(time_span: str = TIME_SPAN) -> gpd.GeoDataFrame:
 
 
 def simplify_for_web(gdf: gpd.GeoDataFrame, tolerance: float = 0.001) -> gpd.GeoDataFrame:
-    """Simplify geometries for smaller file sizes"""
-    gdf = gdf.copy()
-    gdf["geometry"] = gdf["geometry"].simplify(tolerance, preserve_topology=True)
-    return gdf
-
-
-def save_geojson(gdf: gpd.GeoDataFrame, name: str, simplify: bool = True, tolerance: float = 0.001, keep_empty: bool = False) -> None:
-    """Save GeoDataFrame as GeoJSON"""
+    """Simplify geometries for smaller file sizes
+    
+    The geometry array is split into chunks simplified in parallel threads.
+    Returns a new frame; gdf is not modified.
+    """
+    geoms = np.asarray(gdf.geometry.values)
+    chunks = np.array_split(geoms, max(1, min(SIMPLIFY_THREADS, len(geoms))))
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        parts = executor.map(
+            lambda chunk: shapely.simplify(chunk, tolerance, preserve_topology=True), chunks
+        )
+        simplified = np.concatenate(list(parts))
+    return gdf.assign(geometry=gpd.GeoSeries(simplified, index=gdf.index, crs=gdf.crs))
+
+
+def save_geojson(
+    gdf: gpd.GeoDataFrame,
+    name: str,
+    simplify: bool = True,
+    tolerance: float = 0.001,
+    keep_empty: bool = False,
+    seq: bool = False,
+) -> None:
+    """Save GeoDataFrame as GeoJSON.
+    
+    With seq, the features are written one per line to <name>.geojsonl
+    (GeoJSONSeq), which tippecanoe parses in parallel with -P. Use it for
+    the levels that are only served as PMTiles.
+    """
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    # Handle rows without data
-    gdf = gdf[gdf["geometry"].notna()].copy()
+    # Handle rows without data in a single filtering pass
+    mask = gdf["geometry"].notna()
+    if not keep_empty:
+        # Remove rows without price data
+        mask &= gdf["nb_transactions"].notna()
+    gdf = gdf.loc[mask]
     
     if keep_empty:
         # Fill null transaction counts with 0 for zones without data
-        gdf["nb_transactions"] = gdf["nb_transactions"].fillna(0)
-    else:
-        # Remove rows without price data
-        gdf = gdf[gdf["nb_transactions"].notna()].copy()
+        gdf = gdf.assign(nb_transactions=gdf["nb_transactions"].fillna(0))
     
     # Simplify if requested (not for points)
     if simplify and gdf.geom_type.iloc[0] != "Point":
         gdf = simplify_for_web(gdf, tolerance=tolerance)
     
+    # Drop text columns without any value; they only add nulls to every feature
+    empty_cols = [col for col in gdf.select_dtypes(include=["object"]).columns if gdf[col].isna().all()]
+    gdf = gdf.drop(columns=empty_cols)
+    
     # Round float columns for smaller file size
     float_cols = gdf.select_dtypes(include=["float64"]).columns
-    for col in float_cols:
-        if col not in ["longitude", "latitude"]:
-            gdf[col] = gdf[col].round(2)
+    gdf = gdf.assign(**{
+        col: gdf[col].round(2) for col in float_cols if col not in ["longitude", "latitude"]
+    })
+    
+    if seq:
+        path = OUTPUT_DIR / f"{name}.geojsonl"
+        pyogrio.write_dataframe(gdf, path, driver="GeoJSONSeq", layer_options=GEOJSON_LAYER_OPTIONS)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        logger.info(f"    Saved {path} ({size_mb:.1f} MB)")
+        return
+    
+    # Serialize once, then write the plain file and the gzipped copy that
+    # run_map serves to clients accepting gzip
+    buffer = io.BytesIO()
+    pyogrio.write_dataframe(gdf, buffer, driver="GeoJSON", layer=name, layer_options=GEOJSON_LAYER_OPTIONS)
+    data = buffer.getvalue()
     
     path = OUTPUT_DIR / f"{name}.geojson"
-    gdf.to_file(path, driver="GeoJSON")
+    path.write_bytes(data)
+    gz_path = path.with_name(f"{path.name}.gz")
+    with gzip.open(gz_path, "wb", compresslevel=6) as f:
+        f.write(data)
     
     # Get file size
-    size_mb = path.stat().st_size / (1024 * 1024)
-    logger.info(f"    Saved {path} ({size_mb:.1f} MB)")
+    size_mb = len(data) / (1024 * 1024)
+    gz_size_mb = gz_path.stat().st_size / (1024 * 1024)
+    logger.info(f"    Saved {path} ({size_mb:.1f} MB, {gz_size_mb:.1f} MB gzipped)")
 
 
 def main():
@@ -331,23 +450,35 @@ def main():
     logger.info(f"Joining Aggregates with Geometries (time span: {TIME_SPAN})")
     logger.info("=" * 60)
     
-    # Join each level
-    regions = join_regions()
-    country = join_country(regions)
-    departments = join_departments()
-    communes = join_communes()
-    iris = join_iris()
+    # Join each level in parallel: GDAL reads, parquet reads and shapely
+    # operations release the GIL. Country needs the joined regions.
+    with ThreadPoolExecutor(max_workers=JOIN_THREADS) as executor:
+        regions_future = executor.submit(join_regions)
+        departments_future = executor.submit(join_departments)
+        communes_future = executor.submit(join_communes)
+        iris_future = executor.submit(join_iris)
+        regions = regions_future.result()
+        country = join_country(regions)
+        departments = departments_future.result()
+        communes = communes_future.result()
+        iris = iris_future.result()
     
     # Save as GeoJSON
     logger.info("\n" + "=" * 60)
     logger.info("Saving GeoJSON files")
     logger.info("=" * 60)
     
-    save_geojson(country, "country", tolerance=0.005)  # Coarse for country
-    save_geojson(regions, "regions", tolerance=0.002)   # Medium for regions
-    save_geojson(departments, "departments", tolerance=0.001)  # Finer for departments
-    save_geojson(communes, "communes", tolerance=0.0005, keep_empty=True)  # Keep all communes
-    save_geojson(iris, "iris", simplify=False, keep_empty=True)  # Keep all IRIS zones
+    with ThreadPoolExecutor(max_workers=JOIN_THREADS) as executor:
+        futures = [
+            executor.submit(save_geojson, country, "country", tolerance=0.005),  # Coarse for country
+            executor.submit(save_geojson, regions, "regions", tolerance=0.002),   # Medium for regions
+            executor.submit(save_geojson, departments, "departments", tolerance=0.001),  # Finer for departments
+            # Communes and IRIS are only served as PMTiles: write them line-delimited for tippecanoe
+            executor.submit(save_geojson, communes, "communes", tolerance=0.0005, keep_empty=True, seq=True),  # Keep all communes
+            executor.submit(save_geojson, iris, "iris", simplify=False, keep_empty=True, seq=True),  # Keep all IRIS zones
+        ]
+        for future in futures:
+            future.result()
     
     elapsed = time.time() - start_time
     
@@ -357,7 +488,7 @@ def main():
     
     # Summary
     logger.info("\nOutput files:")
-    for f in OUTPUT_DIR.glob("*.geojson"):
+    for f in sorted([*OUTPUT_DIR.glob("*.geojson"), *OUTPUT_DIR.glob("*.geojsonl")]):
         size_mb = f.stat().st_size / (1024 * 1024)
         logger.info(f"  {f.name}: {size_mb:.1f} MB")
 
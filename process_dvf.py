@@ -2,14 +2,20 @@
 Process full DVF data using Polars.
 """
 
-import gc
+import functools
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import geopandas as gpd
+import numpy as np
 import polars as pl
+import shapely
+from pyproj import Transformer
 
 from utils.logger import format_duration, get_logger
+from utils.quantiles import sorted_quantile
 
 logger = get_logger(__name__)
 
@@ -17,9 +23,18 @@ logger = get_logger(__name__)
 RAW_DVF_PATH = Path("data/raw/dvf.csv")
 PROCESSED_DIR = Path("data/processed")
 OUTPUT_PARQUET = PROCESSED_DIR / "dvf_processed.parquet"
+AGGREGATED_PARQUET = PROCESSED_DIR / "dvf_aggregated.parquet"
+# Stored in the cache's Parquet metadata; bump it whenever aggregate_dvf's
+# cleaning or grouping changes so existing caches are rebuilt
+AGGREGATION_VERSION = "1"
+AGGREGATION_VERSION_KEY = "dvf_aggregation_version"
+OUTPUT_ROW_GROUP_SIZE = 250_000
 INSEE_DIR = Path("data/insee_sources")
 IRIS_GPKG = Path("data/geometries/CONTOURS-IRIS-PE_3-0__GPKG_LAMB93_FXX_2025-01-01/CONTOURS-IRIS-PE/1_DONNEES_LIVRAISON_2025-09-00130/CONTOURS-IRIS-PE_3-0_GPKG_LAMB93_FXX-ED2025-01-01/contours-iris-pe.gpkg")
 
+# Threads matching point chunks to IRIS zones
+SPATIAL_JOIN_THREADS = os.cpu_count() or 1
+
 # Schema for DVF CSV (codes as strings, numerics as floats)
 DVF_SCHEMA = {
     "id_mutation": pl.Utf8,
@@ -64,8 +79,24 @@ DVF_SCHEMA = {
     "latitude": pl.Float64,
 }
 
+# Key columns saved as dictionary-encoded categories: downstream group-bys and
+# type_local comparisons then work on integer codes instead of strings
+TYPE_LOCAL_VALUES = ["Maison", "Appartement", "Local industriel. commercial ou assimilé", "Dépendance"]
+CATEGORICAL_DTYPES = {
+    "code_departement": pl.Categorical,
+    "code_commune": pl.Categorical,
+    "type_local": pl.Enum(TYPE_LOCAL_VALUES),
+}
+
+# Year prices are adjusted to by compute_time_adjusted_price
+REFERENCE_YEAR = 2025
+
+# Mutation types kept in the processed data
+SALE_MUTATIONS = ["Vente", "Vente en l'état futur d'achèvement", "Adjudication"]
+
+@functools.lru_cache(maxsize=1)
 def load_region_mapping() -> pl.DataFrame:
-    """Load department to region mapping from INSEE files"""
+    """Load department to region mapping from INSEE files (read once per process)"""
     dept_df = pl.read_csv(
         INSEE_DIR / "v_departement_2025.csv",
         schema_overrides={"DEP": pl.Utf8, "REG": pl.Utf8}
@@ -85,6 +116,17 @@ def load_region_mapping() -> pl.DataFrame:
     return dept_df.join(region_df, on="code_region", how="left")
 
 
+def keep_sale_mutations(df: pl.LazyFrame) -> pl.LazyFrame:
+    """Keep sale mutations only, before the grouping steps.
+    
+    nature_mutation is part of every grouping key used by
+    remove_duplicate_lines and add_dependency, so filtering on it first
+    does not change their results.
+    """
+    logger.info("   Keeping sale mutations...")
+    return df.filter(pl.col("nature_mutation").is_in(SALE_MUTATIONS))
+
+
 def fill_nature_culture_nulls(df: pl.LazyFrame) -> pl.LazyFrame:
     """Fill null values in nature_culture columns with 'unknown' """
     logger.info("   Filling null nature_culture values with 'unknown'...")
@@ -96,26 +138,26 @@ def fill_nature_culture_nulls(df: pl.LazyFrame) -> pl.LazyFrame:
     ])
 
 def remove_duplicate_lines(df: pl.LazyFrame) -> pl.LazyFrame:
-    """Remove rows where nature_culture doesn't match the first value per group."""
+    """Remove rows where nature_culture doesn't match the first value per group.
+    
+    Rows with a null grouping key are dropped, as the former join-back did.
+    """
     logger.info("   Removing duplicate lines...")
     
     group_cols = ["id_mutation", "numero_disposition", "id_parcelle", "nature_mutation"]
     
-    # Get first nature_culture per group
-    first_culture = df.group_by(group_cols).agg(
-        pl.col("nature_culture").first().alias("first_nature_culture")
+    # Compare with the first nature_culture per group in a single window pass
+    return df.filter(
+        pl.all_horizontal(pl.col(group_cols).is_not_null())
+        & (pl.col("nature_culture") == pl.col("nature_culture").first().over(group_cols))
     )
-    
-    # Join back and filter
-    df = df.join(first_culture, on=group_cols, how="left")
-    df = df.filter(pl.col("nature_culture") == pl.col("first_nature_culture"))
-    df = df.drop("first_nature_culture")
-    
-    return df
 
 
 def add_dependency(df: pl.LazyFrame) -> pl.LazyFrame:
-    """Add dependency flag to data"""
+    """Add dependency flag to data
+    
+    The flag is null for rows with a null grouping key, as with the former join.
+    """
     logger.info("   Adding dependencies...")
     
     group_cols = [
@@ -123,11 +165,11 @@ def add_dependency(df: pl.LazyFrame) -> pl.LazyFrame:
         "nature_culture", "nature_culture_speciale", "nature_mutation"
     ]
     
-    dependencies = df.group_by(group_cols).agg(
-        (pl.col("type_local") == "Dépendance").any().alias("has_dependency")
+    return df.with_columns(
+        pl.when(pl.all_horizontal(pl.col(group_cols).is_not_null()))
+        .then((pl.col("type_local") == "Dépendance").any().over(group_cols))
+        .alias("has_dependency")
     )
-    
-    return df.join(dependencies, on=group_cols, how="left")
 
 
 def drop_unwanted_values(df: pl.LazyFrame) -> pl.LazyFrame:
@@ -135,7 +177,7 @@ def drop_unwanted_values(df: pl.LazyFrame) -> pl.LazyFrame:
     logger.info("   Dropping unwanted values...")
     
     return df.filter(
-        pl.col("nature_mutation").is_in(["Vente", "Vente en l'état futur d'achèvement", "Adjudication"])
+        pl.col("nature_mutation").is_in(SALE_MUTATIONS)
         & pl.col("type_local").is_in(["Maison", "Appartement"])
         & (pl.col("valeur_fonciere") > 100)
         & (pl.col("surface_reelle_bati") > 0)
@@ -184,6 +226,7 @@ def reduce_data(df: pl.LazyFrame) -> pl.LazyFrame:
         pl.col("nom_commune").first(),
         pl.col("code_departement").first(),
         pl.col("id_parcelle"),  
+        pl.col("id_parcelle").first().alias("id_parcelle_unique"),
         pl.col("code_type_local").first(),
         pl.col("type_local").first(),
         pl.col("surface_reelle_bati"),  
@@ -203,7 +246,7 @@ def reduce_data(df: pl.LazyFrame) -> pl.LazyFrame:
     return df
 
 
-def add_price_per_sqm(df: pl.DataFrame) -> pl.DataFrame:
+def add_price_per_sqm(df: pl.LazyFrame) -> pl.LazyFrame:
     """Add price per square meter and unique key"""
     logger.info("   Adding price per m²...")
     return df.with_columns([
@@ -213,28 +256,12 @@ def add_price_per_sqm(df: pl.DataFrame) -> pl.DataFrame:
     ])
 
 
-def add_first_parcel_id(df: pl.DataFrame) -> pl.DataFrame:
-    """Add first parcel ID from the parcel list."""
-    logger.info("   Adding first parcel ID...")
-    return df.with_columns([
-        pl.col("id_parcelle").list.first().alias("id_parcelle_unique")
-    ])
-
-
-def add_region_information(df: pl.DataFrame) -> pl.DataFrame:
+def add_region_information(df: pl.LazyFrame) -> pl.LazyFrame:
     """Add region information by joining with INSEE department-region mapping"""
     logger.info("   Adding region information...")
     region_mapping = load_region_mapping()
     
-    df = df.join(region_mapping, on="code_departement", how="left")
-    
-    # Check for missing regions (matching pandas warning)
-    missing = df.filter(pl.col("code_region").is_null()).height
-    if missing > 0:
-        bad_depts = df.filter(pl.col("code_region").is_null()).select("code_departement").unique()
-        logger.warning(f"   Missing region mapping for {missing} rows. Departments: {bad_depts}")
-    
-    return df
+    return df.join(region_mapping.lazy(), on="code_departement", how="left")
 
 
 # =============================================================================
@@ -242,9 +269,9 @@ def add_region_information(df: pl.DataFrame) -> pl.DataFrame:
 # =============================================================================
 
 def compute_time_adjusted_price(
-    df: pl.DataFrame, 
-    reference_year: int = 2025
-) -> pl.DataFrame:
+    df: pl.LazyFrame, 
+    reference_year: int = REFERENCE_YEAR
+) -> pl.LazyFrame:
     """Compute time-adjusted price per sqm based on department and property type.
     
     For each transaction, adjusts the prix_m2 to the reference year's market value
@@ -253,105 +280,58 @@ def compute_time_adjusted_price(
     
     Where medians are computed per (code_departement, type_local, year).
     
-    This function is memory-optimized by:
-    - Pre-computing adjustment factors in a small lookup table
-    - Using a single join instead of multiple joins
+    The medians are window expressions over the transactions themselves, so
+    there is no lookup table to build and join back.
     
     Args:
-        df: DataFrame with prix_m2, code_departement, type_local, date_mutation
+        df: LazyFrame with prix_m2, code_departement, type_local, date_mutation
         reference_year: Target year to adjust prices to (default: 2025)
     
     Returns:
-        DataFrame with added columns:
+        LazyFrame with added columns:
         - annee_mutation: Year of transaction
         - prix_m2_ajuste: Time-adjusted price per sqm
     """
     logger.info(f"   Computing time-adjusted prices (reference year: {reference_year})...")
     
+    group_cols = ["code_departement", "type_local"]
+    
     # Extract year from date_mutation
     df = df.with_columns([
         pl.col("date_mutation").dt.year().alias("annee_mutation")
     ])
     
-    # Compute median prix_m2 per (department, property type, year) - small table
-    median_prices = df.group_by(["code_departement", "type_local", "annee_mutation"]).agg(
-        pl.col("prix_m2").median().alias("median_prix_m2")
-    )
-    
-    # Get reference year medians per (dept, type)
-    reference_medians = (
-        median_prices
-        .filter(pl.col("annee_mutation") == reference_year)
-        .select(["code_departement", "type_local", "median_prix_m2"])
-        .rename({"median_prix_m2": "median_ref"})
-    )
-    
-    # For (dept, type) without reference year data, use latest year's median as fallback
-    latest_medians = (
-        median_prices
-        .sort(["code_departement", "type_local", "annee_mutation"])
-        .group_by(["code_departement", "type_local"])
-        .agg(pl.col("median_prix_m2").last().alias("median_latest"))
-    )
-    
-    # Build adjustment factor lookup: (dept, type, year) -> adjustment_factor
-    # adjustment_factor = median_reference / median_year
-    adjustment_factors = (
-        median_prices
-        .join(reference_medians, on=["code_departement", "type_local"], how="left")
-        .join(latest_medians, on=["code_departement", "type_local"], how="left")
-        .with_columns([
-            # Use reference median if available, otherwise latest
-            pl.when(pl.col("median_ref").is_not_null())
-            .then(pl.col("median_ref"))
-            .otherwise(pl.col("median_latest"))
-            .alias("median_target")
-        ])
-        .with_columns([
-            # Compute adjustment factor, handling division by zero
-            pl.when((pl.col("median_prix_m2") > 0) & (pl.col("median_target").is_not_null()))
-            .then(pl.col("median_target") / pl.col("median_prix_m2"))
-            .otherwise(pl.lit(1.0))
-            .alias("adjustment_factor")
-        ])
-        .select(["code_departement", "type_local", "annee_mutation", "adjustment_factor"])
-    )
-    
-    n_factors = len(adjustment_factors)
-    logger.info(f"   Built adjustment factor lookup table with {n_factors} entries")
-    
-    # Single join to get adjustment factor
-    df = df.join(
-        adjustment_factors,
-        on=["code_departement", "type_local", "annee_mutation"],
-        how="left"
-    )
-    
-    # Compute adjusted price (use factor=1 if no match)
     df = df.with_columns([
-        (pl.col("prix_m2") * pl.coalesce(pl.col("adjustment_factor"), pl.lit(1.0)))
-        .alias("prix_m2_ajuste")
+        # Median prix_m2 per (department, property type, year)
+        pl.col("prix_m2").median().over([*group_cols, "annee_mutation"]).alias("median_prix_m2"),
+        # Reference year median per (dept, type), or the latest year's median
+        # for (dept, type) without reference year data
+        pl.coalesce(
+            pl.col("prix_m2").filter(pl.col("annee_mutation") == reference_year).median(),
+            pl.col("prix_m2").filter(pl.col("annee_mutation") == pl.col("annee_mutation").max()).median(),
+        ).over(group_cols).alias("median_target"),
     ])
     
-    # Log statistics
-    total = len(df)
-    adjusted_count = df.filter(pl.col("adjustment_factor").is_not_null()).height
-    reference_year_count = df.filter(pl.col("annee_mutation") == reference_year).height
-    
-    logger.info(f"   Applied adjustment to {adjusted_count:,}/{total:,} transactions ({100*adjusted_count/total:.1f}%)")
-    logger.info(f"   Transactions from {reference_year} (factor≈1): {reference_year_count:,}")
-    
-    # Drop intermediate column
-    df = df.drop(["adjustment_factor"])
+    # adjustment_factor = median_reference / median_year, handling division by zero
+    adjustment_factor = (
+        pl.when((pl.col("median_prix_m2") > 0) & (pl.col("median_target").is_not_null()))
+        .then(pl.col("median_target") / pl.col("median_prix_m2"))
+        .otherwise(pl.lit(1.0))
+    )
     
-    return df
+    # Compute the adjusted price and drop the medians in a single projection;
+    # the factor itself is never materialized as a column
+    return df.select([
+        pl.exclude(["median_prix_m2", "median_target"]),
+        (pl.col("prix_m2") * adjustment_factor).alias("prix_m2_ajuste"),
+    ])
 
 
 # =============================================================================
 # Outlier removal functions
 # =============================================================================
 
-def remove_extreme_outliers(df: pl.DataFrame) -> pl.DataFrame:
+def remove_extreme_outliers(df: pl.LazyFrame) -> pl.LazyFrame:
     """Remove extreme outliers using hard thresholds.
     
     Thresholds:
@@ -360,24 +340,15 @@ def remove_extreme_outliers(df: pl.DataFrame) -> pl.DataFrame:
     - prix_m2: 400-30,000 €/m²
     - nombre_pieces_principales: 1-20
     """
-    initial_count = len(df)
-    
-    df = df.filter(
-        (pl.col("surface_batie_totale") > 5) & (pl.col("surface_batie_totale") < 1000)
-        & (pl.col("valeur_fonciere") > 10000) & (pl.col("valeur_fonciere") < 10000000)
-        & (pl.col("prix_m2") > 400) & (pl.col("prix_m2") < 30000)
-        & (pl.col("nombre_pieces_principales") > 0) & (pl.col("nombre_pieces_principales") < 20)
+    return df.filter(
+        pl.col("surface_batie_totale").is_between(5, 1000, closed="none")
+        & pl.col("valeur_fonciere").is_between(10000, 10000000, closed="none")
+        & pl.col("prix_m2").is_between(400, 30000, closed="none")
+        & pl.col("nombre_pieces_principales").is_between(0, 20, closed="none")
     )
-    
-    removed = initial_count - len(df)
-    if initial_count > 0:
-        logger.info(f"   Removed {removed:,} extreme outliers ({100*removed/initial_count:.1f}%)")
-    else:
-        logger.info("   No rows to filter for extreme outliers")
-    return df
 
 
-def remove_iqr_outliers(df: pl.DataFrame) -> pl.DataFrame:
+def remove_iqr_outliers(df: pl.LazyFrame) -> pl.LazyFrame:
     """Remove outliers using IQR method per commune.
     
     For communes with 10+ transactions, removes values outside:
@@ -387,16 +358,25 @@ def remove_iqr_outliers(df: pl.DataFrame) -> pl.DataFrame:
     - surface_batie_totale
     - nombre_pieces_principales
     """
-    initial_count = len(df)
-    
     # Columns to apply IQR filtering
     iqr_cols = ["valeur_fonciere", "prix_m2", "surface_batie_totale", "nombre_pieces_principales"]
     
-    # Compute Q1, Q3, IQR bounds per commune
-    bounds = df.group_by("code_commune").agg([
-        pl.len().alias("commune_count"),
-        *[pl.col(col).quantile(0.25).alias(f"{col}_q1") for col in iqr_cols],
-        *[pl.col(col).quantile(0.75).alias(f"{col}_q3") for col in iqr_cols],
+    # Count transactions per commune; small communes are kept as is, so
+    # their bounds are never computed
+    sizes = df.group_by("code_commune").agg(pl.len().alias("commune_count"))
+    large_communes = sizes.filter(pl.col("commune_count") >= 10)
+    
+    # Compute Q1, Q3 per large commune from one sorted list per column, so
+    # each group is sorted once instead of once per quantile
+    bounds = df.join(large_communes, on="code_commune", how="semi").group_by("code_commune").agg([
+        *[pl.col(col).drop_nulls().sort().implode().alias(f"{col}_sorted") for col in iqr_cols],
+    ]).with_columns([
+        expr
+        for col in iqr_cols
+        for expr in (
+            sorted_quantile(pl.col(f"{col}_sorted"), 0.25).alias(f"{col}_q1"),
+            sorted_quantile(pl.col(f"{col}_sorted"), 0.75).alias(f"{col}_q3"),
+        )
     ])
     
     # Calculate IQR bounds (q1 - 1.5*iqr, q3 + 1.5*iqr)
@@ -408,13 +388,13 @@ def remove_iqr_outliers(df: pl.DataFrame) -> pl.DataFrame:
     
     # Keep only the bounds columns we need
     bounds = bounds.select([
-        "code_commune", "commune_count",
+        "code_commune",
         *[f"{col}_min" for col in iqr_cols],
         *[f"{col}_max" for col in iqr_cols],
     ])
     
-    # Join bounds to main dataframe
-    df = df.join(bounds, on="code_commune", how="left")
+    # Join counts and bounds to main dataframe (null bounds for small communes)
+    df = df.join(sizes, on="code_commune", how="left").join(bounds, on="code_commune", how="left")
     
     # Apply IQR filter only for communes with 10+ transactions
     df = df.filter(
@@ -432,107 +412,90 @@ def remove_iqr_outliers(df: pl.DataFrame) -> pl.DataFrame:
     )
     
     # Drop the temporary bound columns
-    df = df.drop([
+    return df.drop([
         "commune_count",
         *[f"{col}_min" for col in iqr_cols],
         *[f"{col}_max" for col in iqr_cols],
     ])
-    
-    removed = initial_count - len(df)
-    if initial_count > 0:
-        logger.info(f"   Removed {removed:,} IQR outliers ({100*removed/initial_count:.1f}%)")
-    else:
-        logger.info("   No rows to filter for IQR outliers")
-    return df
-
-
-def remove_outliers(df: pl.DataFrame) -> pl.DataFrame:
-    """Remove outliers using both extreme thresholds and IQR method."""
-    logger.info("   Removing extreme outliers...")
-    df = remove_extreme_outliers(df)
-    
-    logger.info("   Removing IQR outliers per commune...")
-    df = remove_iqr_outliers(df)
-    
-    return df
 
 
 # =============================================================================
 # Spatial join with IRIS
 # =============================================================================
 
+def match_iris_zones(lon: np.ndarray, lat: np.ndarray, iris_geoms: np.ndarray) -> np.ndarray:
+    """Return the position of the IRIS zone containing each point, -1 when unmatched.
+    
+    The points go into an STRtree queried with the IRIS polygons
+    (contains_properly, i.e. the point lies in the zone's interior, like
+    "within"); GEOS prepares each polygon for the query. Results are ordered
+    by zone, so the first zone is kept for points inside several.
+    """
+    # One transformer per call: pyproj transformers are not shared between threads
+    transformer = Transformer.from_crs("EPSG:4326", "EPSG:2154", always_xy=True)
+    # atleast_1d: pyproj returns plain floats for a single point
+    x, y = np.atleast_1d(*transformer.transform(lon, lat))
+    zone_idx, point_idx = shapely.STRtree(shapely.points(x, y)).query(
+        iris_geoms, predicate="contains_properly"
+    )
+    
+    point_idx, first = np.unique(point_idx, return_index=True)
+    iris_idx = np.full(len(lon), -1, dtype=np.int64)
+    iris_idx[point_idx] = zone_idx[first]
+    return iris_idx
+
+
 def spatial_join_iris(df: pl.DataFrame, chunk_size: int = 500_000) -> pl.DataFrame:
-    """Spatial join DVF transactions with IRIS polygons to get code_iris."""
+    """Spatial join DVF transactions with IRIS polygons to get code_iris.
+    
+    Points are projected to Lambert 93 straight from the coordinate arrays,
+    without building a GeoDataFrame, and matched chunk by chunk in
+    SPATIAL_JOIN_THREADS threads (GEOS releases the GIL).
+    
+    The polygons are not prepared up front: a prepared geometry is not safe
+    to share between threads, so each query prepares its own.
+    """
     logger.info("   Loading IRIS geometries...")
     iris_gdf = gpd.read_file(IRIS_GPKG)
     iris_gdf = iris_gdf[["code_iris", "nom_iris", "geometry"]]
     logger.info(f"   Loaded {len(iris_gdf):,} IRIS zones")
-    
-    logger.info("   Building spatial index...")
-    _ = iris_gdf.sindex
+    iris_geoms = iris_gdf.geometry.to_numpy()
     
     total_rows = len(df)
     n_chunks = (total_rows + chunk_size - 1) // chunk_size
     logger.info(f"   Processing {total_rows:,} rows in {n_chunks} chunks of {chunk_size:,}...")
     
-    all_iris_codes = []
-    all_iris_names = []
-    matched_total = 0
-    
-    for i in range(n_chunks):
-        start_idx = i * chunk_size
-        end_idx = min((i + 1) * chunk_size, total_rows)
-        chunk_len = end_idx - start_idx
-        
-        chunk = df.slice(start_idx, chunk_len)
-        coords = chunk.select(["latitude", "longitude"]).to_pandas()
-        coords["_chunk_idx"] = range(chunk_len)
-        
-        geometry = gpd.points_from_xy(coords["longitude"], coords["latitude"])
-        points_gdf = gpd.GeoDataFrame(coords[["_chunk_idx"]], geometry=geometry, crs="EPSG:4326")
-        points_gdf = points_gdf.to_crs("EPSG:2154")
-        
-        joined = gpd.sjoin(points_gdf, iris_gdf[["code_iris", "nom_iris", "geometry"]], 
-                          how="left", predicate="within")
-        joined = joined.drop_duplicates(subset=["_chunk_idx"], keep="first")
-        joined = joined.sort_values("_chunk_idx")
-        
-        assert len(joined) == chunk_len, f"Length mismatch: {len(joined)} vs {chunk_len}"
-        
-        chunk_codes = joined["code_iris"].tolist()
-        chunk_names = joined["nom_iris"].tolist()
-        all_iris_codes.extend(chunk_codes)
-        all_iris_names.extend(chunk_names)
-        
-        matched = sum(1 for c in chunk_codes if c is not None and str(c) != 'nan')
-        matched_total += matched
-        logger.info(f"   Chunk {i+1}/{n_chunks}: matched {matched:,}")
-        
-        del coords, geometry, points_gdf, joined, chunk
-        gc.collect()
+    lon = df["longitude"].to_numpy()
+    lat = df["latitude"].to_numpy()
+    chunks = [slice(i * chunk_size, min((i + 1) * chunk_size, total_rows)) for i in range(n_chunks)]
     
-    logger.info(f"   Total matched: {matched_total:,}/{total_rows:,} ({100*matched_total/total_rows:.1f}%)")
+    with ThreadPoolExecutor(max_workers=SPATIAL_JOIN_THREADS) as executor:
+        parts = list(executor.map(lambda chunk: match_iris_zones(lon[chunk], lat[chunk], iris_geoms), chunks))
     
-    # Convert NaN to None
-    all_iris_codes = [None if (c is None or (isinstance(c, float) and str(c) == 'nan')) else str(c) for c in all_iris_codes]
-    all_iris_names = [None if (n is None or (isinstance(n, float) and str(n) == 'nan')) else str(n) for n in all_iris_names]
+    for i, part in enumerate(parts):
+        logger.info(f"   Chunk {i+1}/{n_chunks}: matched {int((part >= 0).sum()):,}")
     
-    df = df.with_columns([
-        pl.Series("code_iris", all_iris_codes, dtype=pl.Utf8),
-        pl.Series("nom_iris", all_iris_names, dtype=pl.Utf8),
-    ])
+    # Position of the matching IRIS zone per point, -1 when unmatched
+    iris_idx = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
     
-    return df
+    matched_total = int((iris_idx >= 0).sum())
+    logger.info(f"   Total matched: {matched_total:,}/{total_rows:,} ({100*matched_total/total_rows:.1f}%)")
+    
+    # Gather zone attributes by position, null for unmatched points
+    zones = pl.from_pandas(iris_gdf[["code_iris", "nom_iris"]]).cast(pl.Utf8)
+    zones = zones.select(pl.all().gather(pl.Series(iris_idx).replace(-1, None)))
+    
+    return df.with_columns(zones["code_iris"], zones["nom_iris"])
 
 
 # =============================================================================
 # Main aggregation function
 # =============================================================================
 
-def aggregate_dvf() -> pl.DataFrame:
+def aggregate_dvf() -> pl.LazyFrame:
     """Aggregate DVF transactions using Polars lazy evaluation.
     
-    1. Load DVF data lazily
+    1. Load DVF data lazily, keeping sale mutations only
     2. Fill null nature_culture values with 'unknown'
     3. Remove duplicate lines based on nature_culture
     4. Add dependency flag (with nature_culture grouping)
@@ -540,8 +503,12 @@ def aggregate_dvf() -> pl.DataFrame:
     6. Compute total surface and price per disposition
     7. Aggregate to one row per mutation/disposition
     
+    The property type and value filters stay after step 4: the dependency
+    flag and first nature_culture are computed over all lines of a group.
+    
     Returns:
-        DataFrame with aggregated transactions (one row per mutation/disposition).
+        LazyFrame with aggregated transactions (one row per mutation/disposition),
+        collected once by process_dvf with the rest of the pipeline.
     """
     logger.info("   Loading DVF data (lazy)...")
     df = pl.scan_csv(
@@ -551,6 +518,7 @@ def aggregate_dvf() -> pl.DataFrame:
         ignore_errors=True,
     )
     n_rows = df.select(pl.len()).collect()[0,0]
+    logger.info(f"   Rows before aggregation: {n_rows:,}")
     
     logger.info("   Converting date types...")
     df = df.with_columns([
@@ -558,27 +526,61 @@ def aggregate_dvf() -> pl.DataFrame:
     ])
     
     # Processing steps matching archive/process_dvf.py exactly
+    df = keep_sale_mutations(df)
     df = fill_nature_culture_nulls(df)
     df = remove_duplicate_lines(df)
     df = add_dependency(df)
     df = drop_unwanted_values(df)
     df = compute_total_surface_and_price(df)
-    df = reduce_data(df)
-    
-    logger.info("   Executing query (streaming)...")
-    df = df.collect(streaming=True)
+    return reduce_data(df)
+
+
+def aggregated_cache_is_valid() -> bool:
+    """Check that AGGREGATED_PARQUET was built by this AGGREGATION_VERSION from the current CSV.
     
-    logger.info(f"   Rows before aggregation: {n_rows:,}")
-    logger.info(f"   Rows after aggregation: {len(df):,}")
+    A cache whose raw CSV has since been removed is still used.
+    """
+    try:
+        cache_mtime = AGGREGATED_PARQUET.stat().st_mtime
+        metadata = pl.read_parquet_metadata(AGGREGATED_PARQUET)
+    except (OSError, pl.exceptions.PolarsError):
+        return False
+    if metadata.get(AGGREGATION_VERSION_KEY) != AGGREGATION_VERSION:
+        logger.info("   Cached aggregation is from another version, rebuilding...")
+        return False
+    
+    try:
+        raw_mtime = RAW_DVF_PATH.stat().st_mtime
+    except FileNotFoundError:
+        logger.warning(f"   {RAW_DVF_PATH} not found, using the cached aggregation")
+        return True
+    return cache_mtime >= raw_mtime
+
+
+def load_aggregated_dvf() -> pl.LazyFrame:
+    """Scan the aggregated DVF transactions, through a Parquet cache.
+    
+    The first run streams aggregate_dvf() to AGGREGATED_PARQUET; later runs
+    scan that file and skip the CSV parsing and grouping. The cache is
+    rebuilt if the raw CSV is newer or AGGREGATION_VERSION changed.
+    """
+    if aggregated_cache_is_valid():
+        logger.info(f"   Reading cached aggregation from {AGGREGATED_PARQUET}...")
+        return pl.scan_parquet(AGGREGATED_PARQUET)
     
-    # Verify reduction worked (matching pandas version check)
-    cle_count = df.select(pl.col("id_mutation").cast(pl.Utf8) + "_" + pl.col("numero_disposition").cast(pl.Utf8)).n_unique()
-    if len(df) == cle_count:
-        logger.info(f"   Successfully reduced data to {len(df):,} rows")
-    else:
-        raise RuntimeError("Reduce Failed")
+    df = aggregate_dvf()
     
-    return df
+    logger.info(f"   Writing aggregation to {AGGREGATED_PARQUET} (streaming)...")
+    AGGREGATED_PARQUET.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = AGGREGATED_PARQUET.with_name(f"{AGGREGATED_PARQUET.stem}.tmp.parquet")
+    df.sink_parquet(
+        tmp_path,
+        compression="zstd",
+        statistics=True,
+        metadata={AGGREGATION_VERSION_KEY: AGGREGATION_VERSION},
+    )
+    os.replace(tmp_path, AGGREGATED_PARQUET)
+    return pl.scan_parquet(AGGREGATED_PARQUET)
 
 
 # =============================================================================
@@ -586,7 +588,12 @@ def aggregate_dvf() -> pl.DataFrame:
 # =============================================================================
 
 def process_dvf() -> pl.DataFrame:
-    """Process full DVF data through the complete pipeline."""
+    """Process full DVF data through the complete pipeline.
+    
+    Step 1 is cached as Parquet (see load_aggregated_dvf); steps 2-6 build a
+    single lazy query on it, collected once before the spatial join (which
+    needs the points in memory).
+    """
     logger.info("=" * 60)
     logger.info("Processing DVF data with Polars (final version)")
     logger.info("=" * 60)
@@ -595,23 +602,48 @@ def process_dvf() -> pl.DataFrame:
     
     # Step 1: Aggregate DVF transactions
     logger.info("\n1. Aggregating DVF transactions...")
-    df = aggregate_dvf()
+    df = load_aggregated_dvf()
     
     # Step 2: Add price per square meter
     df = add_price_per_sqm(df)
     
-    # Step 3: Add first parcel ID
-    df = add_first_parcel_id(df)
+    # Step 3: Remove extreme outliers (hard thresholds only need prix_m2 and
+    # the aggregated columns, so the enrichment below skips those rows)
+    logger.info("   Removing extreme outliers...")
+    df = remove_extreme_outliers(df)
     
     # Step 4: Add region information
     df = add_region_information(df)
     
-    # Step 5: Remove outliers (before time adjustment to avoid skewing medians)
-    df = remove_outliers(df)
+    # Step 5: Remove IQR outliers per commune (before time adjustment to avoid skewing medians)
+    logger.info("   Removing IQR outliers per commune...")
+    df = remove_iqr_outliers(df)
     
     # Step 6: Compute time-adjusted prices (on clean data)
     logger.info("\n6. Computing time-adjusted prices...")
-    df = compute_time_adjusted_price(df, reference_year=2025)
+    df = compute_time_adjusted_price(df, reference_year=REFERENCE_YEAR)
+    
+    logger.info("   Executing query (streaming)...")
+    df = df.collect(engine="streaming")
+    
+    # Counts for the checks and logs below, in a single pass
+    cle_count, missing_regions, reference_year_count = df.select([
+        pl.struct(["id_mutation", "numero_disposition"]).n_unique(),
+        pl.col("code_region").is_null().sum(),
+        (pl.col("annee_mutation") == REFERENCE_YEAR).sum(),
+    ]).row(0)
+    logger.info(f"   Rows after outlier removal: {len(df):,}")
+    logger.info(f"   Transactions from {REFERENCE_YEAR} (factor≈1): {reference_year_count:,}")
+    
+    # Verify reduction worked (matching pandas version check); outlier
+    # filters only drop rows, so the key is still unique if it was after reduce_data
+    if len(df) != cle_count:
+        raise RuntimeError("Reduce Failed")
+    
+    # Check for missing regions (matching pandas warning)
+    if missing_regions > 0:
+        bad_depts = df.filter(pl.col("code_region").is_null()).select("code_departement").unique()
+        logger.warning(f"   Missing region mapping for {missing_regions} rows. Departments: {bad_depts}")
     
     # Step 7: Spatial join with IRIS
     logger.info("\n7. Spatial join with IRIS zones...")
@@ -628,6 +660,12 @@ def process_dvf() -> pl.DataFrame:
     return df
 
 
+def encode_categoricals(df: pl.LazyFrame) -> pl.LazyFrame:
+    """Cast the CATEGORICAL_DTYPES key columns present in df."""
+    columns = df.collect_schema().names()
+    return df.cast({col: dtype for col, dtype in CATEGORICAL_DTYPES.items() if col in columns})
+
+
 def main():
     """Process DVF and save to Parquet."""
     PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
@@ -636,25 +674,37 @@ def main():
     
     # Save to Parquet
     logger.info(f"\nSaving to {OUTPUT_PARQUET}...")
-    df.write_parquet(OUTPUT_PARQUET)
-    logger.info(f"Saved {len(df):,} rows to {OUTPUT_PARQUET}")
+    # Sorted by date with row-group statistics so date-filtered scans
+    # (aggregate_prices time spans) skip older row groups. The sorted,
+    # encoded frame is streamed to disk instead of materialized as a copy.
+    encode_categoricals(df.lazy()).sort("date_mutation").sink_parquet(
+        OUTPUT_PARQUET,
+        compression="zstd",
+        compression_level=3,
+        statistics=True,
+        row_group_size=OUTPUT_ROW_GROUP_SIZE,
+    )
+    del df
+    
+    saved = pl.scan_parquet(OUTPUT_PARQUET)
+    logger.info(f"Saved {saved.select(pl.len()).collect().item():,} rows to {OUTPUT_PARQUET}")
     
     # Show stats
     logger.info("\nPrice per m² statistics for France:")
-    logger.info(df.select([
+    logger.info(saved.select([
         pl.col("prix_m2").mean().alias("mean"),
         pl.col("prix_m2").median().alias("median"),
         pl.col("prix_m2").min().alias("min"),
         pl.col("prix_m2").max().alias("max"),
-    ]))
+    ]).collect())
 
     logger.info("\nPrice per m² statistics for France adjusted:")
-    logger.info(df.select([
+    logger.info(saved.select([
         pl.col("prix_m2_ajuste").mean().alias("mean"),
         pl.col("prix_m2_ajuste").median().alias("median"),
         pl.col("prix_m2_ajuste").min().alias("min"),
         pl.col("prix_m2_ajuste").max().alias("max"),
-    ]))
+    ]).collect())
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ Usage:
 
 import argparse
 import os
+import stat
 from pathlib import Path
 
 import uvicorn
@@ -28,41 +29,59 @@ DATA_DIR = MAP_DIR / "data"
 app = FastAPI()
 
 
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Check if an Accept-Encoding header allows gzip (or *) with a non-zero q."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.lower()] = quality
+    return accepted.get("gzip", accepted.get("*", 0.0)) > 0
+
+
 @app.get("/data/{filename}")
 async def serve_data(filename: str, request: Request):
-    """Serve data files with Range request support for PMTiles."""
-    file_path = DATA_DIR / filename
-    if not file_path.exists():
-        return Response(status_code=404)
+    """Serve data files with Range request support for PMTiles.
     
-    file_size = file_path.stat().st_size
-    range_header = request.headers.get("range")
+    FileResponse answers Range requests itself (206 + Content-Range) and reads
+    the file in a worker thread, so tile reads never block the event loop;
+    servers supporting the pathsend extension send the file without copying
+    it through Python.
     
-    if range_header and filename.endswith(".pmtiles"):
-        # Parse Range header: bytes=start-end
-        range_str = range_header.replace("bytes=", "")
-        start, end = range_str.split("-")
-        start = int(start)
-        end = int(end) if end else file_size - 1
-        end = min(end, file_size - 1)
-        length = end - start + 1
-        
-        with open(file_path, "rb") as f:
-            f.seek(start)
-            data = f.read(length)
-        
-        return Response(
-            content=data,
-            status_code=206,
-            headers={
-                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(length),
-            },
-            media_type="application/octet-stream",
-        )
+    GeoJSON files are answered with the .geojson.gz copy written by
+    join_geometries when the client accepts gzip with a non-zero q-value.
+    """
+    file_path = DATA_DIR / filename
+    if filename.endswith(".geojson") and accepts_gzip(request.headers.get("accept-encoding", "")):
+        gz_path = file_path.with_name(f"{filename}.gz")
+        try:
+            gz_stat = gz_path.stat()
+        except FileNotFoundError:
+            gz_stat = None
+        if gz_stat is not None and stat.S_ISREG(gz_stat.st_mode):
+            return FileResponse(
+                gz_path,
+                stat_result=gz_stat,
+                media_type="application/geo+json",
+                headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+            )
+    
+    try:
+        # Single stat per request, handed to FileResponse so it does not stat again
+        stat_result = file_path.stat()
+    except FileNotFoundError:
+        return Response(status_code=404)
+    if not stat.S_ISREG(stat_result.st_mode):
+        return Response(status_code=404)
     
-    return FileResponse(file_path)
+    return FileResponse(file_path, stat_result=stat_result)
 
 
 # Serve static files (index.html, etc.)
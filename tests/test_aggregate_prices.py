@@ -0,0 +1,278 @@
+"""
+Unit tests for aggregate_prices.py
+
+Tests the price statistics computed at each geographic level from the
+processed DVF parquet file.
+"""
+
+from datetime import date
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+import aggregate_prices
+from aggregate_prices import (
+    aggregate_commune,
+    aggregate_country,
+    aggregate_parcel,
+)
+
+
+# --- Fixtures ---
+
+@pytest.fixture
+def processed_dvf(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Write a small processed DVF parquet file and point PROCESSED_DVF to it."""
+    df = pl.DataFrame({
+        "date_mutation": [
+            date(2022, 3, 1), date(2023, 6, 1), date(2024, 2, 1),
+            date(2024, 9, 1), date(2025, 1, 15), date(2025, 4, 1),
+        ],
+        "type_local": ["Maison", "Appartement", "Maison", "Appartement", "Appartement", "Maison"],
+        "prix_m2": [2000.0, 4000.0, 3000.0, 5000.0, 6000.0, 2500.0],
+        "prix_m2_ajuste": [2200.0, 4400.0, 3100.0, 5200.0, 6000.0, 2500.0],
+        "code_region": ["11"] * 6,
+        "nom_region": ["Île-de-France"] * 6,
+        "code_departement": ["75", "75", "75", "92", "92", "92"],
+        "code_commune": ["75101", "75101", "75101", "92004", "92004", "92004"],
+        "nom_commune": ["Paris 1er"] * 3 + ["Asnières-sur-Seine"] * 3,
+        "code_iris": ["751010101", "751010101", None, "920040101", "920040101", "920040102"],
+        "nom_iris": ["Les Halles", "Les Halles", None, "Centre", "Centre", "Gare"],
+        "id_parcelle_unique": ["P1", "P1", "P2", "P3", "P3", "P4"],
+    })
+    path = tmp_path / "dvf_processed.parquet"
+    df.write_parquet(path)
+    monkeypatch.setattr(aggregate_prices, "PROCESSED_DVF", path)
+    return path
+
+
+# --- Tests for aggregations ---
+
+def test_aggregate_country_counts_by_property_type(processed_dvf: Path):
+    """Country aggregate counts all transactions and each property type."""
+    # Act
+    result = aggregate_country()
+
+    # Assert
+    assert len(result) == 1
+    assert result["nb_transactions"][0] == 6
+    assert result["nb_maisons"][0] == 3
+    assert result["nb_appartements"][0] == 3
+
+
+def test_aggregate_country_computes_stats_per_property_type(processed_dvf: Path):
+    """Per-type statistics only use transactions of that property type."""
+    # Act
+    result = aggregate_country()
+
+    # Assert
+    assert result["prix_m2_median"][0] == pytest.approx(3500.0)
+    assert result["prix_m2_maison_median"][0] == pytest.approx(2500.0)
+    assert result["prix_m2_maison_mean"][0] == pytest.approx(2500.0)
+    assert result["prix_m2_appart_median"][0] == pytest.approx(5000.0)
+    appart_prices = pl.Series([4000.0, 5000.0, 6000.0])
+    assert result["prix_m2_appart_q25"][0] == appart_prices.quantile(0.25)
+    assert result["prix_m2_appart_q75"][0] == appart_prices.quantile(0.75)
+    assert result["prix_m2_ajuste_maison_median"][0] == pytest.approx(2500.0)
+    assert result["prix_m2_ajuste_appart_median"][0] == pytest.approx(5200.0)
+
+
+def test_aggregate_country_filters_by_start_date(processed_dvf: Path):
+    """Only transactions on or after start_date are aggregated."""
+    # Act
+    result = aggregate_country(date(2025, 1, 1))
+
+    # Assert
+    assert result["nb_transactions"][0] == 2
+    assert result["nb_maisons"][0] == 1
+    assert result["nb_appartements"][0] == 1
+
+
+def test_aggregate_commune_returns_null_for_missing_property_type(processed_dvf: Path):
+    """Communes without a property type get null stats for that type."""
+    # Act
+    result = aggregate_commune(date(2024, 1, 1))
+
+    # Assert
+    paris = result.filter(pl.col("code_commune") == "75101")
+    assert paris["nb_transactions"][0] == 1
+    assert paris["nb_appartements"][0] == 0
+    assert paris["prix_m2_appart_median"][0] is None
+    assert paris["prix_m2_maison_median"][0] == pytest.approx(3000.0)
+
+
+def test_aggregate_parcel_sorts_by_department_then_parcel(processed_dvf: Path):
+    """Parcel aggregates are grouped by department, then ordered by parcel id."""
+    # Act
+    result = aggregate_parcel()
+
+    # Assert
+    assert result.select(["code_departement", "id_parcelle_unique"]).rows() == [
+        ("75", "P1"), ("75", "P2"), ("92", "P3"), ("92", "P4"),
+    ]
+
+
+def test_aggregate_parcel_keeps_department_and_commune(processed_dvf: Path):
+    """Parcel aggregates carry their department and commune codes."""
+    # Act
+    result = aggregate_parcel()
+
+    # Assert
+    assert set(result["id_parcelle_unique"]) == {"P1", "P2", "P3", "P4"}
+    p3 = result.filter(pl.col("id_parcelle_unique") == "P3")
+    assert p3["code_departement"][0] == "92"
+    assert p3["code_commune"][0] == "92004"
+    assert p3["nb_transactions"][0] == 2
+
+
+def test_aggregate_commune_quartiles_match_polars_quantile(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Quartiles from the sorted lists equal Expr.quantile / Expr.median."""
+    # Arrange
+    n = 500
+    df = pl.DataFrame({
+        "date_mutation": [date(2024, 1, 1)] * n,
+        "type_local": ["Maison" if i % 3 else "Appartement" for i in range(n)],
+        "prix_m2": [float((i * 7919) % 9973) for i in range(n)],
+        "prix_m2_ajuste": [float((i * 104729) % 7907) for i in range(n)],
+        "code_commune": [f"{i % 23:05d}" for i in range(n)],
+        "nom_commune": [f"Commune {i % 23}" for i in range(n)],
+    })
+    path = tmp_path / "dvf_processed.parquet"
+    df.write_parquet(path)
+    monkeypatch.setattr(aggregate_prices, "PROCESSED_DVF", path)
+
+    expected = (
+        df.group_by("code_commune")
+        .agg([
+            pl.col("prix_m2").quantile(0.25).alias("prix_m2_q25"),
+            pl.col("prix_m2").median().alias("prix_m2_median"),
+            pl.col("prix_m2").quantile(0.75).alias("prix_m2_q75"),
+            pl.col("prix_m2").filter(pl.col("type_local") == "Maison").quantile(0.25).alias("prix_m2_maison_q25"),
+            pl.col("prix_m2").filter(pl.col("type_local") == "Maison").median().alias("prix_m2_maison_median"),
+            pl.col("prix_m2").filter(pl.col("type_local") == "Appartement").quantile(0.75).alias("prix_m2_appart_q75"),
+        ])
+        .sort("code_commune")
+    )
+
+    # Act
+    result = aggregate_commune().select(expected.columns)
+
+    # Assert
+    assert result.equals(expected)
+    assert not any(col.endswith("_sorted") for col in aggregate_commune().columns)
+
+
+# --- Tests for main ---
+
+def test_main_writes_every_level_for_every_span(processed_dvf: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """main() collects all levels together and matches the per-level functions."""
+    # Arrange
+    monkeypatch.setattr(aggregate_prices, "AGGREGATES_DIR", tmp_path / "aggregates")
+
+    # Act
+    aggregate_prices.main()
+
+    # Assert
+    for span_name in aggregate_prices.TIME_SPANS:
+        for level_name in aggregate_prices.AGGREGATORS:
+            assert (tmp_path / "aggregates" / span_name / f"agg_{level_name}.parquet").exists()
+    saved = pl.read_parquet(tmp_path / "aggregates" / "2024" / "agg_commune.parquet")
+    assert saved.equals(aggregate_commune(date(2024, 1, 1)))
+
+
+def test_get_span_scan_tags_nested_spans(processed_dvf: Path):
+    """Each row appears once for every span it falls into."""
+    # Act
+    result = aggregate_prices.aggregate_country_lf(
+        aggregate_prices.get_span_scan(aggregate_prices.TIME_SPANS)
+    ).collect()
+
+    # Assert
+    counts = dict(zip(result["span"], result["nb_transactions"]))
+    assert counts == {"2025": 2, "2024": 4, "2023": 5, "all": 6}
+
+
+# --- Tests for save_aggregates ---
+
+def test_save_aggregates_writes_zstd(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Parquet files are zstd compressed."""
+    # Arrange
+    import pyarrow.parquet as pq
+    monkeypatch.setattr(aggregate_prices, "AGGREGATES_DIR", tmp_path)
+    parcels = pl.DataFrame({
+        "id_parcelle_unique": ["A", "B", "C"],
+        "code_departement": ["92", "75", "92"],
+    })
+
+    # Act
+    aggregate_prices.save_aggregates({"parcel": parcels}, "all")
+
+    # Assert
+    path = tmp_path / "all" / "agg_parcel.parquet"
+    assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+def test_save_aggregates_writes_categorical_keys_as_strings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Categorical and Enum columns are saved as plain strings."""
+    # Arrange
+    monkeypatch.setattr(aggregate_prices, "AGGREGATES_DIR", tmp_path)
+    communes = pl.DataFrame({
+        "code_commune": pl.Series(["75101"], dtype=pl.Categorical),
+        "type_local": pl.Series(["Maison"], dtype=pl.Enum(["Maison", "Appartement"])),
+    })
+
+    # Act
+    aggregate_prices.save_aggregates({"commune": communes}, "all")
+
+    # Assert
+    saved = pl.read_parquet(tmp_path / "all" / "agg_commune.parquet")
+    assert saved.schema == {"code_commune": pl.String, "type_local": pl.String}
+
+
+def test_span_scan_pushes_date_filter_and_projection_into_parquet(processed_dvf: Path):
+    """The span date filter and the level's columns reach the parquet scan."""
+    # Act
+    plan = aggregate_prices.aggregate_region_lf(
+        aggregate_prices.get_span_scan({"2024": date(2024, 1, 1)})
+    ).explain()
+
+    # Assert
+    assert "SELECTION" in plan
+    assert "PROJECT */" not in plan
+
+
+def test_span_source_is_the_only_parquet_scan_of_the_level_plans(processed_dvf: Path):
+    """All levels and spans are built on one decode of the processed parquet."""
+    # Arrange
+    source_lf = aggregate_prices.scan_span_source(aggregate_prices.TIME_SPANS)
+    lf = aggregate_prices.get_span_scan(aggregate_prices.TIME_SPANS, source_lf.collect().lazy())
+
+    # Act
+    source_plan = source_lf.explain()
+    level_plans = pl.explain_all([
+        lf.group_by("span").len(),
+        *[aggregate(lf) for aggregate in aggregate_prices.AGGREGATORS.values()],
+    ])
+
+    # Assert
+    assert source_plan.count("Parquet SCAN") == 1
+    assert "Parquet SCAN" not in level_plans
+
+
+def test_span_source_gives_the_same_levels_as_the_parquet_scans(processed_dvf: Path):
+    """Building a level on the decoded source matches scanning per span."""
+    # Arrange
+    source = aggregate_prices.scan_span_source(aggregate_prices.TIME_SPANS).collect()
+
+    # Act
+    from_source = aggregate_prices.aggregate_department_lf(
+        aggregate_prices.get_span_scan(aggregate_prices.TIME_SPANS, source.lazy())
+    ).collect()
+    from_parquet = aggregate_prices.aggregate_department_lf(
+        aggregate_prices.get_span_scan(aggregate_prices.TIME_SPANS)
+    ).collect()
+
+    # Assert
+    key = ["span", "code_departement"]
+    assert from_source.sort(key).equals(from_parquet.sort(key))
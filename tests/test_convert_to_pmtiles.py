@@ -5,11 +5,13 @@ Tests the conversion of GeoJSON files to PMTiles format for efficient
 web map tile delivery.
 """
 
+import errno
 import json
 import shutil
 import subprocess
 from pathlib import Path
-from unittest.mock import MagicMock, patch, call
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
 
@@ -23,96 +25,100 @@ from convert_to_pmtiles import (
 )
 
 
-# --- Fixtures ---
+_SAMPLE_GEOJSON_BYTES = json.dumps({
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"name": "Test Commune", "code_commune": "75101"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[2.34, 48.85], [2.35, 48.85], [2.35, 48.86], [2.34, 48.86], [2.34, 48.85]]]
+            }
+        },
+        {
+            "type": "Feature",
+            "properties": {"name": "Test Commune 2", "code_commune": "75102"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[2.35, 48.85], [2.36, 48.85], [2.36, 48.86], [2.35, 48.86], [2.35, 48.85]]]
+            }
+        }
+    ]
+}).encode()
 
-@pytest.fixture
-def temp_dir(tmp_path: Path) -> Path:
-    """Create a temporary directory for test outputs."""
-    return tmp_path
 
+# --- Fixtures ---
 
-@pytest.fixture
-def sample_geojson_file(tmp_path: Path) -> Path:
-    """Create a sample GeoJSON file for testing."""
-    geojson_content = {
-        "type": "FeatureCollection",
-        "features": [
-            {
-                "type": "Feature",
-                "properties": {"name": "Test Commune", "code_commune": "75101"},
-                "geometry": {
-                    "type": "Polygon",
-                    "coordinates": [[[2.34, 48.85], [2.35, 48.85], [2.35, 48.86], [2.34, 48.86], [2.34, 48.85]]]
-                }
-            },
-            {
-                "type": "Feature",
-                "properties": {"name": "Test Commune 2", "code_commune": "75102"},
-                "geometry": {
-                    "type": "Polygon",
-                    "coordinates": [[[2.35, 48.85], [2.36, 48.85], [2.36, 48.86], [2.35, 48.86], [2.35, 48.85]]]
-                }
-            }
-        ]
-    }
+class FakeRun:
+    """Stand-in for subprocess.run that records commands and delegates to a script."""
     
-    geojson_path = tmp_path / "test.geojson"
-    with open(geojson_path, "w") as f:
-        json.dump(geojson_content, f)
+    def __init__(self):
+        self.script = None
+        self.calls = []
     
-    return geojson_path
+    def __call__(self, cmd, **kwargs):
+        self.calls.append(cmd)
+        return self.script(cmd, **kwargs)
 
 
-# --- Tests for check_tippecanoe ---
+@pytest.fixture
+def fake_subprocess(monkeypatch: pytest.MonkeyPatch) -> FakeRun:
+    """Replace subprocess.run with a FakeRun; tests set its script."""
+    fake_run = FakeRun()
+    monkeypatch.setattr(convert_to_pmtiles.subprocess, "run", fake_run)
+    return fake_run
 
-def test_check_tippecanoe_when_installed():
-    """Test that check_tippecanoe returns True when tippecanoe is in PATH."""
-    # Arrange
-    with patch("shutil.which", return_value="/usr/bin/tippecanoe"):
-        # Act
-        result = check_tippecanoe()
+
+@pytest.fixture
+def no_subprocess(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fail the test if it tries to spawn a process."""
+    def forbidden_run(*args, **kwargs):
+        pytest.fail("subprocess.run called unexpectedly")
     
-    # Assert
-    assert result is True
+    monkeypatch.setattr(convert_to_pmtiles.subprocess, "run", forbidden_run)
 
 
-def test_check_tippecanoe_when_not_installed():
-    """Test that check_tippecanoe returns False when tippecanoe is not found."""
-    # Arrange
-    with patch("shutil.which", return_value=None):
-        # Act
-        result = check_tippecanoe()
+@pytest.fixture
+def no_shutil_move(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Fail the test if archiving falls back to the copy-based shutil.move."""
+    def forbidden_move(*args, **kwargs):
+        pytest.fail("shutil.move called for a same-device archive")
     
-    # Assert
-    assert result is False
+    monkeypatch.setattr(convert_to_pmtiles.shutil, "move", forbidden_move)
 
 
-# --- Tests for check_pmtiles_cli ---
+@pytest.fixture
+def sample_geojson_file(tmp_path: Path) -> Path:
+    """Create a sample GeoJSON file for testing (tests may move or delete it)."""
+    geojson_path = tmp_path / "test.geojson"
+    geojson_path.write_bytes(_SAMPLE_GEOJSON_BYTES)
+    return geojson_path
 
-def test_check_pmtiles_cli_when_installed():
-    """Test that check_pmtiles_cli returns True when pmtiles is in PATH."""
-    # Arrange
-    with patch("shutil.which", return_value="/usr/local/bin/pmtiles"):
-        # Act
-        result = check_pmtiles_cli()
-    
-    # Assert
-    assert result is True
 
+# --- Tests for check_tippecanoe / check_pmtiles_cli ---
 
-def test_check_pmtiles_cli_when_not_installed():
-    """Test that check_pmtiles_cli returns False when pmtiles is not found."""
+@pytest.mark.parametrize("check, which_result, expected", [
+    (check_tippecanoe, "/usr/bin/tippecanoe", True),
+    (check_tippecanoe, None, False),
+    (check_pmtiles_cli, "/usr/local/bin/pmtiles", True),
+    (check_pmtiles_cli, None, False),
+])
+def test_check_cli_tools(check, which_result, expected: bool, monkeypatch: pytest.MonkeyPatch):
+    """Test that the CLI checks report whether the tool is in PATH."""
     # Arrange
-    with patch("shutil.which", return_value=None):
-        # Act
-        result = check_pmtiles_cli()
+    monkeypatch.setattr(shutil, "which", lambda name: which_result)
+    
+    # Act
+    result = check()
     
     # Assert
-    assert result is False
+    assert result is expected
 
 
 # --- Tests for convert_geojson_to_pmtiles ---
 
+@pytest.mark.usefixtures("no_subprocess")
 def test_convert_geojson_to_pmtiles_file_not_found(tmp_path: Path):
     """Test that conversion fails gracefully when input file doesn't exist."""
     # Arrange
@@ -132,180 +138,223 @@ def test_convert_geojson_to_pmtiles_file_not_found(tmp_path: Path):
     assert result is False
 
 
-def test_convert_geojson_to_pmtiles_tippecanoe_failure(sample_geojson_file: Path, tmp_path: Path):
-    """Test that conversion handles tippecanoe failure."""
+def _run_result(returncode: int, stderr: str = "", stdout: str = "") -> SimpleNamespace:
+    """Build a fake CompletedProcess."""
+    return SimpleNamespace(returncode=returncode, stdout=stdout, stderr=stderr)
+
+
+def _tiles_path(cmd: list[str]) -> Path:
+    """Path tippecanoe was told to write with -o."""
+    return Path(cmd[cmd.index("-o") + 1])
+
+
+def _tippecanoe_fail(*args, **kwargs):
+    return _run_result(1, "tippecanoe error message")
+
+
+def _tippecanoe_raise(*args, **kwargs):
+    raise Exception("subprocess error")
+
+
+def _no_mbtiles(*args, **kwargs):
+    return _run_result(0)  # Success return code but no file created
+
+
+def _pmtiles_fail(cmd, **kwargs):
+    if cmd[0] == "tippecanoe":
+        _tiles_path(cmd).write_bytes(b"fake mbtiles content")
+        return _run_result(0)
+    return _run_result(1, "pmtiles convert error")
+
+
+def _success(cmd, **kwargs):
+    if cmd[0] == "tippecanoe":
+        _tiles_path(cmd).write_bytes(b"fake mbtiles content")
+    elif cmd[0] == "pmtiles":
+        Path(cmd[-1]).write_bytes(b"fake pmtiles content")
+    return _run_result(0)
+
+
+@pytest.mark.parametrize("script", [_tippecanoe_fail, _tippecanoe_raise, _no_mbtiles, _pmtiles_fail])
+def test_convert_geojson_to_pmtiles_failure_cleans_up(
+    script, sample_geojson_file: Path, tmp_path: Path, fake_subprocess: FakeRun
+):
+    """Test that a failed tippecanoe / pmtiles step returns False and leaves no temporary files."""
     # Arrange
     output_path = tmp_path / "output.pmtiles"
+    fake_subprocess.script = script
     
-    mock_result = MagicMock()
-    mock_result.returncode = 1
-    mock_result.stderr = "tippecanoe error message"
-    
-    with patch("subprocess.run", return_value=mock_result):
-        # Act
-        result = convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="test",
-            min_zoom=9,
-            max_zoom=14,
-        )
+    # Act
+    result = convert_geojson_to_pmtiles(
+        input_path=sample_geojson_file,
+        output_path=output_path,
+        layer_name="communes",
+        min_zoom=9,
+        max_zoom=14,
+    )
     
     # Assert
     assert result is False
+    assert not output_path.with_suffix(".geojsonl").exists()
+    assert not output_path.with_suffix(".mbtiles").exists()
 
 
-def test_convert_geojson_to_pmtiles_tippecanoe_exception(sample_geojson_file: Path, tmp_path: Path):
-    """Test that conversion handles tippecanoe exceptions."""
+def test_convert_geojson_to_pmtiles_success(sample_geojson_file: Path, tmp_path: Path, fake_subprocess: FakeRun):
+    """Test successful conversion creates PMTiles and cleans up the temporary files."""
     # Arrange
     output_path = tmp_path / "output.pmtiles"
+    mbtiles_path = output_path.with_suffix(".mbtiles")
+    fake_subprocess.script = _success
     
-    with patch("subprocess.run", side_effect=Exception("subprocess error")):
-        # Act
-        result = convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="test",
-            min_zoom=9,
-            max_zoom=14,
-        )
+    # Act
+    result = convert_geojson_to_pmtiles(
+        input_path=sample_geojson_file,
+        output_path=output_path,
+        layer_name="communes",
+        min_zoom=9,
+        max_zoom=14,
+    )
     
     # Assert
-    assert result is False
+    assert result is True
+    assert output_path.exists()
+    assert not mbtiles_path.exists()  # MBTiles should be cleaned up
+    assert not output_path.with_suffix(".geojsonl").exists()  # Cleaned up
 
 
-def test_convert_geojson_to_pmtiles_mbtiles_not_created(sample_geojson_file: Path, tmp_path: Path):
-    """Test that conversion fails when tippecanoe doesn't create MBTiles."""
+def test_convert_geojson_to_pmtiles_calls_tippecanoe_with_correct_args(
+    sample_geojson_file: Path, tmp_path: Path, fake_subprocess: FakeRun
+):
+    """Test that tippecanoe is called with correct arguments."""
     # Arrange
     output_path = tmp_path / "output.pmtiles"
+    mbtiles_path = output_path.with_suffix(".mbtiles")
+    fake_subprocess.script = _success
     
-    mock_result = MagicMock()
-    mock_result.returncode = 0  # Success return code but no file created
-    
-    with patch("subprocess.run", return_value=mock_result):
-        # Act
-        result = convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="test",
-            min_zoom=9,
-            max_zoom=14,
-        )
+    # Act
+    convert_geojson_to_pmtiles(
+        input_path=sample_geojson_file,
+        output_path=output_path,
+        layer_name="communes",
+        min_zoom=9,
+        max_zoom=14,
+    )
     
     # Assert
-    assert result is False
+    cmd = fake_subprocess.calls[0]
+    assert cmd[0] == "tippecanoe"
+    assert "-o" in cmd
+    assert str(mbtiles_path) in cmd
+    assert "-Z" in cmd
+    assert "9" in cmd
+    assert "-z" in cmd
+    assert "14" in cmd
+    assert "-l" in cmd
+    assert "communes" in cmd
+    assert "-P" in cmd
+    assert cmd[-1] == str(output_path.with_suffix(".geojsonl"))
 
 
-def test_convert_geojson_to_pmtiles_pmtiles_convert_failure(sample_geojson_file: Path, tmp_path: Path):
-    """Test that conversion handles pmtiles convert failure."""
+def test_convert_geojson_to_pmtiles_passes_geojson_seq_input_through(tmp_path: Path, fake_subprocess: FakeRun):
+    """Test that line-delimited input is handed to tippecanoe as-is."""
     # Arrange
+    input_path = tmp_path / "test.geojsonl"
+    input_path.write_text('{"type":"Feature","properties":{},"geometry":null}\n')
     output_path = tmp_path / "output.pmtiles"
-    mbtiles_path = output_path.with_suffix(".mbtiles")
     
     def run_side_effect(cmd, **kwargs):
-        mock_result = MagicMock()
         if cmd[0] == "tippecanoe":
-            # Create fake MBTiles file
-            mbtiles_path.write_bytes(b"fake mbtiles content")
-            mock_result.returncode = 0
-        else:  # pmtiles convert
-            mock_result.returncode = 1
-            mock_result.stderr = "pmtiles convert error"
-        return mock_result
-    
-    with patch("subprocess.run", side_effect=run_side_effect):
-        # Act
-        result = convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="test",
-            min_zoom=9,
-            max_zoom=14,
-        )
+            output_path.write_bytes(b"fake")
+        return _run_result(0)
+    
+    fake_subprocess.script = run_side_effect
+    
+    # Act
+    convert_geojson_to_pmtiles(
+        input_path=input_path,
+        output_path=output_path,
+        layer_name="test",
+        min_zoom=9,
+        max_zoom=14,
+        direct_pmtiles=True,
+    )
     
     # Assert
-    assert result is False
+    assert fake_subprocess.calls[-1][-1] == str(input_path)
+    assert input_path.exists()  # Source is not deleted
+
 
+# --- Tests for write_geojson_seq ---
 
-def test_convert_geojson_to_pmtiles_success(sample_geojson_file: Path, tmp_path: Path):
-    """Test successful conversion creates PMTiles and cleans up MBTiles."""
+def test_write_geojson_seq_writes_one_feature_per_line(sample_geojson_file: Path, tmp_path: Path):
+    """Test that each feature of the collection is written on its own line."""
     # Arrange
-    output_path = tmp_path / "output.pmtiles"
-    mbtiles_path = output_path.with_suffix(".mbtiles")
+    seq_path = tmp_path / "test.geojsonl"
     
-    def run_side_effect(cmd, **kwargs):
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_result.stderr = ""
-        
-        if cmd[0] == "tippecanoe":
-            # Create fake MBTiles file
-            mbtiles_path.write_bytes(b"fake mbtiles content")
-        elif cmd[0] == "pmtiles":
-            # Create fake PMTiles file
-            output_path.write_bytes(b"fake pmtiles content")
-        
-        return mock_result
-    
-    with patch("subprocess.run", side_effect=run_side_effect):
-        # Act
-        result = convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="test",
-            min_zoom=9,
-            max_zoom=14,
-        )
+    # Act
+    count = convert_to_pmtiles.write_geojson_seq(sample_geojson_file, seq_path)
     
     # Assert
-    assert result is True
-    assert output_path.exists()
-    assert not mbtiles_path.exists()  # MBTiles should be cleaned up
+    lines = seq_path.read_text().splitlines()
+    assert count == 2
+    assert len(lines) == 2
+    assert json.loads(lines[0])["properties"]["code_commune"] == "75101"
+    assert json.loads(lines[1])["properties"]["code_commune"] == "75102"
 
 
-def test_convert_geojson_to_pmtiles_calls_tippecanoe_with_correct_args(sample_geojson_file: Path, tmp_path: Path):
-    """Test that tippecanoe is called with correct arguments."""
+def test_convert_geojson_to_pmtiles_direct_pmtiles_skips_convert(sample_geojson_file: Path, tmp_path: Path, fake_subprocess: FakeRun):
+    """Test that direct_pmtiles makes tippecanoe write the PMTiles without pmtiles convert."""
     # Arrange
     output_path = tmp_path / "output.pmtiles"
-    mbtiles_path = output_path.with_suffix(".mbtiles")
     
     def run_side_effect(cmd, **kwargs):
-        mock_result = MagicMock()
-        mock_result.returncode = 0
         if cmd[0] == "tippecanoe":
-            mbtiles_path.write_bytes(b"fake")
-        elif cmd[0] == "pmtiles":
-            output_path.write_bytes(b"fake")
-        return mock_result
+            output_path.write_bytes(b"fake pmtiles")
+        return _run_result(0)
     
-    with patch("subprocess.run", side_effect=run_side_effect) as mock_run:
-        # Act
-        convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="communes",
-            min_zoom=9,
-            max_zoom=14,
-        )
-    
-    # Assert - Check tippecanoe call
-    tippecanoe_call = mock_run.call_args_list[0]
-    cmd = tippecanoe_call[0][0]
+    fake_subprocess.script = run_side_effect
     
-    assert cmd[0] == "tippecanoe"
-    assert "-o" in cmd
-    assert str(mbtiles_path) in cmd
-    assert "-Z" in cmd
-    assert "9" in cmd
-    assert "-z" in cmd
-    assert "14" in cmd
-    assert "-l" in cmd
-    assert "communes" in cmd
-    assert str(sample_geojson_file) in cmd
+    # Act
+    result = convert_geojson_to_pmtiles(
+        input_path=sample_geojson_file,
+        output_path=output_path,
+        layer_name="test",
+        min_zoom=9,
+        max_zoom=14,
+        direct_pmtiles=True,
+    )
+    
+    # Assert
+    assert result is True
+    assert len(fake_subprocess.calls) == 1
+    cmd = fake_subprocess.calls[0]
+    assert cmd[cmd.index("-o") + 1] == str(output_path)
+    assert not output_path.with_suffix(".mbtiles").exists()
+
+
+# --- Tests for tippecanoe_supports_pmtiles ---
+
+@pytest.mark.parametrize("version_output, expected", [
+    ("tippecanoe v2.53.0", True),
+    ("tippecanoe v2.17.0", True),
+    ("tippecanoe v1.36.0", False),
+    ("", False),
+])
+def test_tippecanoe_supports_pmtiles(version_output: str, expected: bool, fake_subprocess: FakeRun):
+    """Test that PMTiles output is detected from the tippecanoe version."""
+    # Arrange
+    fake_subprocess.script = lambda cmd, **kwargs: _run_result(0, stderr=version_output)
+    
+    # Act
+    result = convert_to_pmtiles.tippecanoe_supports_pmtiles()
+    
+    # Assert
+    assert result is expected
 
 
 # --- Tests for archive_geojson ---
 
+@pytest.mark.usefixtures("no_subprocess")
 def test_archive_geojson_file_not_found(tmp_path: Path):
     """Test that archive returns False when source file doesn't exist."""
     # Arrange
@@ -319,6 +368,7 @@ def test_archive_geojson_file_not_found(tmp_path: Path):
     assert result is False
 
 
+@pytest.mark.usefixtures("no_shutil_move")
 def test_archive_geojson_success(sample_geojson_file: Path, tmp_path: Path):
     """Test successful archiving moves file to archive directory."""
     # Arrange
@@ -338,6 +388,7 @@ def test_archive_geojson_success(sample_geojson_file: Path, tmp_path: Path):
     assert archived_file.read_text() == original_content
 
 
+@pytest.mark.usefixtures("no_shutil_move")
 def test_archive_geojson_creates_directory(sample_geojson_file: Path, tmp_path: Path):
     """Test that archive creates the archive directory if it doesn't exist."""
     # Arrange
@@ -357,12 +408,56 @@ def test_archive_geojson_handles_move_failure(sample_geojson_file: Path, tmp_pat
     # Arrange
     archive_dir = tmp_path / "archive"
     
-    with patch("shutil.move", side_effect=Exception("Permission denied")):
+    with patch("os.rename", side_effect=PermissionError(errno.EACCES, "Permission denied")), \
+            patch("shutil.move") as mock_move:
         # Act
         result = archive_geojson(sample_geojson_file, archive_dir)
     
     # Assert
     assert result is False
+    mock_move.assert_not_called()
+
+
+def test_archive_geojson_falls_back_to_move_across_devices(sample_geojson_file: Path, tmp_path: Path):
+    """Test that archive copies with shutil.move when rename crosses devices."""
+    # Arrange
+    archive_dir = tmp_path / "archive"
+    
+    with patch("os.rename", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")), \
+            patch("shutil.move") as mock_move:
+        # Act
+        result = archive_geojson(sample_geojson_file, archive_dir)
+    
+    # Assert
+    assert result is True
+    mock_move.assert_called_once_with(str(sample_geojson_file), str(archive_dir / sample_geojson_file.name))
+
+
+# --- Tests for process_level ---
+
+def test_process_level_archives_only_after_successful_conversion(sample_geojson_file: Path, tmp_path: Path):
+    """Test that the GeoJSON is archived only when the conversion succeeds."""
+    # Arrange
+    config = {
+        "input": sample_geojson_file,
+        "output": tmp_path / "output.pmtiles",
+        "archive": tmp_path / "archive",
+        "layer": "test",
+        "min_zoom": 9,
+        "max_zoom": 14,
+    }
+    
+    with patch("convert_to_pmtiles.convert_geojson_to_pmtiles", return_value=False):
+        # Act
+        failed = convert_to_pmtiles.process_level("test", config)
+    
+    with patch("convert_to_pmtiles.convert_geojson_to_pmtiles", return_value=True):
+        succeeded = convert_to_pmtiles.process_level("test", config)
+    
+    # Assert
+    assert failed is False
+    assert succeeded is True
+    assert (tmp_path / "archive" / sample_geojson_file.name).exists()
 
 
 # --- Tests for PMTILES_CONFIG ---
@@ -384,6 +479,13 @@ def test_pmtiles_config_has_required_keys():
         assert required_keys <= set(config.keys()), f"{name} missing keys: {required_keys - set(config.keys())}"
 
 
+def test_pmtiles_config_inputs_are_line_delimited():
+    """Test that the configured inputs skip the write_geojson_seq conversion."""
+    # Assert
+    for name, config in PMTILES_CONFIG.items():
+        assert config["input"].suffix in convert_to_pmtiles.GEOJSON_SEQ_SUFFIXES, f"{name} input is not GeoJSONSeq"
+
+
 def test_pmtiles_config_zoom_levels_valid():
     """Test that zoom levels are valid (min < max, within reasonable range)."""
     # Assert
@@ -395,7 +497,8 @@ def test_pmtiles_config_zoom_levels_valid():
 
 # --- Integration test ---
 
-def test_full_conversion_workflow(sample_geojson_file: Path, tmp_path: Path):
+@pytest.mark.usefixtures("no_shutil_move")
+def test_full_conversion_workflow(sample_geojson_file: Path, tmp_path: Path, fake_subprocess: FakeRun):
     """Test the full workflow: convert + archive."""
     # Arrange
     output_path = tmp_path / "output.pmtiles"
@@ -403,28 +506,25 @@ def test_full_conversion_workflow(sample_geojson_file: Path, tmp_path: Path):
     archive_dir = tmp_path / "archive"
     
     def run_side_effect(cmd, **kwargs):
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_result.stderr = ""
-        
         if cmd[0] == "tippecanoe":
             mbtiles_path.write_bytes(b"fake mbtiles")
         elif cmd[0] == "pmtiles":
             output_path.write_bytes(b"fake pmtiles")
         
-        return mock_result
+        return _run_result(0)
     
-    with patch("subprocess.run", side_effect=run_side_effect):
-        # Act
-        convert_result = convert_geojson_to_pmtiles(
-            input_path=sample_geojson_file,
-            output_path=output_path,
-            layer_name="test",
-            min_zoom=9,
-            max_zoom=14,
-        )
-        
-        archive_result = archive_geojson(sample_geojson_file, archive_dir)
+    fake_subprocess.script = run_side_effect
+    
+    # Act
+    convert_result = convert_geojson_to_pmtiles(
+        input_path=sample_geojson_file,
+        output_path=output_path,
+        layer_name="test",
+        min_zoom=9,
+        max_zoom=14,
+    )
+    
+    archive_result = archive_geojson(sample_geojson_file, archive_dir)
     
     # Assert
     assert convert_result is True
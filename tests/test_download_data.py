@@ -189,7 +189,7 @@ def test_download_file_uses_stream_mode(mock_get: MagicMock, tmp_path: Path):
     download_data.download_file(url, dest)
     
     # Assert
-    mock_get.assert_called_once_with(url, stream=True)
+    mock_get.assert_called_once_with(url, stream=True, timeout=download_data.DOWNLOAD_TIMEOUT)
 
 
 @patch("download_data.requests.get")
@@ -226,6 +226,88 @@ def test_download_file_works_without_content_length(mock_get: MagicMock, tmp_pat
     assert dest.read_bytes() == content
 
 
+@patch("download_data.requests.get")
+def test_download_file_gunzips_chunks_as_they_arrive(mock_get: MagicMock, tmp_path: Path):
+    """download_file with gunzip=True decompresses split and multi-member gzip bodies."""
+    # Arrange
+    gzipped = gzip.compress(b"id,price\n1,100\n") + gzip.compress(b"2,200\n")
+    mock_resp = MagicMock()
+    mock_resp.headers = {"content-length": str(len(gzipped))}
+    mock_resp.iter_content.return_value = [gzipped[i:i + 7] for i in range(0, len(gzipped), 7)]
+    mock_resp.raise_for_status.return_value = None
+    mock_get.return_value = mock_resp
+    dest = tmp_path / "dvf.csv"
+    
+    # Act
+    download_data.download_file("http://example.com/file.gz", dest, gunzip=True)
+    
+    # Assert
+    assert dest.read_bytes() == b"id,price\n1,100\n2,200\n"
+
+
+@patch("download_data.requests.get")
+def test_download_file_raises_on_truncated_gzip(mock_get: MagicMock, tmp_path: Path):
+    """A truncated gzip body raises and leaves neither the CSV nor a .part file."""
+    # Arrange
+    gzipped = gzip.compress(b"id,price\n" + b"1,100\n" * 1000)
+    mock_resp = MagicMock()
+    mock_resp.headers = {"content-length": str(len(gzipped))}
+    mock_resp.iter_content.return_value = [gzipped[:len(gzipped) // 2]]
+    mock_resp.raise_for_status.return_value = None
+    mock_get.return_value = mock_resp
+    dest = tmp_path / "dvf.csv"
+    
+    # Act & Assert
+    with pytest.raises(EOFError):
+        download_data.download_file("http://example.com/file.gz", dest, gunzip=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+@patch("download_data.requests.get")
+def test_download_file_keeps_previous_file_on_dropped_connection(mock_get: MagicMock, tmp_path: Path):
+    """A connection error mid-download leaves the existing destination untouched."""
+    # Arrange
+    def dropped_stream(chunk_size):
+        yield b"partial"
+        raise requests.ConnectionError("connection reset")
+    
+    mock_resp = MagicMock()
+    mock_resp.headers = {}
+    mock_resp.iter_content.side_effect = dropped_stream
+    mock_resp.raise_for_status.return_value = None
+    mock_get.return_value = mock_resp
+    dest = tmp_path / "file.bin"
+    dest.write_bytes(b"previous")
+    
+    # Act & Assert
+    with pytest.raises(requests.ConnectionError):
+        download_data.download_file("http://example.com/file", dest)
+    assert dest.read_bytes() == b"previous"
+    assert not dest.with_suffix(".bin.part").exists()
+
+
+@patch("download_data.requests.get")
+def test_download_file_rate_limits_progress_output(
+    mock_get: MagicMock, tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    """download_file prints progress at most once per interval, plus the final 100%."""
+    # Arrange
+    chunks = [b"x"] * 100
+    mock_resp = MagicMock()
+    mock_resp.headers = {"content-length": str(len(chunks))}
+    mock_resp.iter_content.return_value = chunks
+    mock_resp.raise_for_status.return_value = None
+    mock_get.return_value = mock_resp
+    
+    # Act
+    download_data.download_file("http://example.com/file", tmp_path / "file.bin")
+    
+    # Assert
+    progress_lines = [line for line in capsys.readouterr().out.split("\r") if line.startswith("Progress")]
+    assert len(progress_lines) <= 2
+    assert progress_lines[-1].startswith("Progress: 100.0%")
+
+
 # --- Tests for download_insee_cog ---
 
 def _create_zip_with_files(file_dict: dict[str, bytes]) -> bytes:
@@ -431,17 +513,72 @@ def test_download_admin_express_gpkg_redownloads_with_force(mock_download: Magic
     assert called_url == download_data.GEO_ADMIN_EXPRESS_URL
 
 
+# --- Tests for create_session ---
+
+def test_create_session_mounts_pooled_adapter_with_retries():
+    """create_session mounts an adapter sized to the worker pool that retries 5xx."""
+    # Act
+    session = download_data.create_session(pool_size=8)
+    
+    # Assert
+    adapter = session.get_adapter("https://cadastre.data.gouv.fr/")
+    assert adapter._pool_connections == 8
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == 3
+    assert 503 in adapter.max_retries.status_forcelist
+
+
+@pytest.mark.skipif(download_data.py7zr is None, reason="py7zr not installed")
+@patch("download_data.download_file")
+def test_download_admin_express_gpkg_extracts_only_target(mock_download: MagicMock, temp_geo_dir: Path, tmp_path: Path):
+    """download_admin_express_gpkg extracts just the target GeoPackage from the 7z."""
+    # Arrange
+    source_dir = tmp_path / "archive_src"
+    nested = source_dir / "ADMIN-EXPRESS" / "1_DONNEES_LIVRAISON"
+    nested.mkdir(parents=True)
+    (nested / download_data.TARGET_GPKG_NAME).write_bytes(b"target gpkg")
+    (nested / "OTHER.gpkg").write_bytes(b"other gpkg")
+    archive_bytes = io.BytesIO()
+    with download_data.py7zr.SevenZipFile(archive_bytes, mode="w") as z:
+        z.writeall(source_dir / "ADMIN-EXPRESS", "ADMIN-EXPRESS")
+    
+    def fake_download(url, dest_path):
+        dest_path.write_bytes(archive_bytes.getvalue())
+    mock_download.side_effect = fake_download
+    
+    # Act
+    download_data.download_admin_express_gpkg()
+    
+    # Assert
+    target_path = temp_geo_dir / download_data.TARGET_GPKG_NAME
+    assert target_path.read_bytes() == b"target gpkg"
+    assert sorted(p.name for p in temp_geo_dir.iterdir()) == [download_data.TARGET_GPKG_NAME]
+
+
 # --- Tests for download_all_cadastre ---
 
 @pytest.fixture
 def temp_cadastre_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
-    """Override CADASTRE_DIR to use a temporary directory."""
+    """Override CADASTRE_DIR to use a temporary directory.
+    
+    INSEE_DATA_DIR points to an empty directory so communes are crawled.
+    """
     cadastre_dir = tmp_path / "data" / "geometries" / "parcelles"
     monkeypatch.setattr(download_data, "CADASTRE_DIR", cadastre_dir)
+    monkeypatch.setattr(download_data, "INSEE_DATA_DIR", tmp_path / "data" / "insee_sources")
     return cadastre_dir
 
 
-@patch("download_data.requests.get")
+def _make_streamed_response(content: bytes) -> MagicMock:
+    """Helper to create a mock streamed response usable as a context manager."""
+    mock_resp = MagicMock()
+    mock_resp.raw = io.BytesIO(content)
+    mock_resp.raise_for_status.return_value = None
+    mock_resp.__enter__.return_value = mock_resp
+    return mock_resp
+
+
+@patch("download_data._session.get")
 @patch("download_data.requests.Session")
 def test_download_all_cadastre_creates_directory(
     mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path
@@ -462,7 +599,7 @@ def test_download_all_cadastre_creates_directory(
     assert temp_cadastre_dir.exists()
 
 
-@patch("download_data.requests.get")
+@patch("download_data._session.get")
 @patch("download_data.requests.Session")
 def test_download_all_cadastre_parses_departments_and_communes(
     mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path
@@ -491,10 +628,7 @@ def test_download_all_cadastre_parses_departments_and_communes(
     mock_session.get.side_effect = fake_get
     
     # Mock the actual file downloads
-    mock_file_resp = MagicMock()
-    mock_file_resp.content = b"parcel data"
-    mock_file_resp.raise_for_status.return_value = None
-    mock_get.return_value = mock_file_resp
+    mock_get.side_effect = lambda *args, **kwargs: _make_streamed_response(b"parcel data")
     
     # Act
     result = download_data.download_all_cadastre()
@@ -505,7 +639,7 @@ def test_download_all_cadastre_parses_departments_and_communes(
     assert mock_get.call_count == 4
 
 
-@patch("download_data.requests.get")
+@patch("download_data._session.get")
 @patch("download_data.requests.Session")
 def test_download_all_cadastre_skips_existing_files(
     mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path
@@ -541,7 +675,7 @@ def test_download_all_cadastre_skips_existing_files(
     assert existing_file.read_bytes() == b"existing data"  # File unchanged
 
 
-@patch("download_data.requests.get")
+@patch("download_data._session.get")
 @patch("download_data.requests.Session")
 def test_download_all_cadastre_redownloads_with_force(
     mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path
@@ -569,10 +703,7 @@ def test_download_all_cadastre_redownloads_with_force(
     existing_file.write_bytes(b"old data")
     
     # Mock the download response
-    mock_file_resp = MagicMock()
-    mock_file_resp.content = b"new data"
-    mock_file_resp.raise_for_status.return_value = None
-    mock_get.return_value = mock_file_resp
+    mock_get.return_value = _make_streamed_response(b"new data")
     
     # Act
     result = download_data.download_all_cadastre(force=True)
@@ -583,7 +714,7 @@ def test_download_all_cadastre_redownloads_with_force(
     assert existing_file.read_bytes() == b"new data"  # File updated
 
 
-@patch("download_data.requests.get")
+@patch("download_data._session.get")
 @patch("download_data.requests.Session")
 def test_download_all_cadastre_returns_false_on_no_files(
     mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path
@@ -601,4 +732,71 @@ def test_download_all_cadastre_returns_false_on_no_files(
     result = download_data.download_all_cadastre()
     
     # Assert
-    assert result is False
\ No newline at end of file
+    assert result is False
+
+
+@patch("download_data._session.get")
+@patch("download_data.requests.Session")
+def test_download_all_cadastre_removes_partial_file_on_error(
+    mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path
+):
+    """download_all_cadastre deletes a file whose download failed midway."""
+    # Arrange
+    mock_session = MagicMock()
+    mock_session_class.return_value = mock_session
+    
+    def fake_get(url, timeout=None):
+        resp = MagicMock()
+        if url == download_data.CADASTRE_BASE_URL:
+            resp.text = '<a href="01/">01</a>'
+        elif "01/" in url:
+            resp.text = '<a href="01001/">01001</a>'
+        else:
+            resp.text = ""
+        return resp
+    
+    mock_session.get.side_effect = fake_get
+    mock_file_resp = _make_streamed_response(b"")
+    mock_file_resp.raw = MagicMock()
+    mock_file_resp.raw.read.side_effect = requests.ConnectionError("connection reset")
+    mock_get.return_value = mock_file_resp
+    
+    # Act
+    result = download_data.download_all_cadastre()
+    
+    # Assert
+    assert result is False
+    assert not (temp_cadastre_dir / "01" / "01001" / "cadastre-01001-parcelles.json.gz").exists()
+
+
+@patch("download_data._session.get")
+@patch("download_data.requests.Session")
+def test_download_all_cadastre_uses_cog_communes_without_crawling(
+    mock_session_class: MagicMock, mock_get: MagicMock, temp_cadastre_dir: Path, temp_insee_dir: Path
+):
+    """download_all_cadastre builds URLs from v_commune_2025.csv when it exists."""
+    # Arrange
+    temp_insee_dir.mkdir(parents=True, exist_ok=True)
+    (temp_insee_dir / "v_commune_2025.csv").write_text(
+        "TYPECOM,COM,REG,DEP,COMPARENT\n"
+        "COM,01001,84,01,\n"
+        "COMD,01002,84,01,01001\n"
+        "COM,2A004,94,2A,\n"
+        "COM,75056,11,75,\n"
+        "ARM,75101,11,75,75056\n"
+    )
+    mock_get.side_effect = lambda *args, **kwargs: _make_streamed_response(b"parcel data")
+    
+    # Act
+    result = download_data.download_all_cadastre()
+    
+    # Assert
+    assert result is True
+    mock_session_class.return_value.get.assert_not_called()
+    called_urls = sorted(call.args[0] for call in mock_get.call_args_list)
+    assert called_urls == [
+        f"{download_data.CADASTRE_BASE_URL}01/01001/cadastre-01001-parcelles.json.gz",
+        f"{download_data.CADASTRE_BASE_URL}2A/2A004/cadastre-2A004-parcelles.json.gz",
+        f"{download_data.CADASTRE_BASE_URL}75/75101/cadastre-75101-parcelles.json.gz",
+    ]
+    assert (temp_cadastre_dir / "75" / "75101" / "cadastre-75101-parcelles.json.gz").exists()
@@ -10,6 +10,8 @@ from unittest.mock import MagicMock, patch, call
 
 import geopandas as gpd
 import pandas as pd
+import polars as pl
+import pyarrow as pa
 import pytest
 from shapely.geometry import Polygon, box
 
@@ -17,13 +19,27 @@ import generate_parcels
 from generate_parcels import (
     check_tippecanoe,
     check_pmtiles_cli,
-    process_commune_simple,
-    cleanup_geojson,
+    load_commune_parcels,
+    load_commune_shared,
+    partition_by_department,
+    attach_department,
+    process_department,
+    publish_department,
 )
 
 
 # --- Fixtures ---
 
+@pytest.fixture(autouse=True)
+def clear_tool_checks():
+    """Reset the cached tippecanoe / pmtiles lookups around each test."""
+    check_tippecanoe.cache_clear()
+    check_pmtiles_cli.cache_clear()
+    yield
+    check_tippecanoe.cache_clear()
+    check_pmtiles_cli.cache_clear()
+
+
 @pytest.fixture
 def temp_dir(tmp_path: Path):
     """Create a temporary directory for test outputs."""
@@ -44,26 +60,21 @@ def sample_cadastre_gdf() -> gpd.GeoDataFrame:
 
 
 @pytest.fixture
-def sample_aggregates_dict() -> dict:
-    """Create a sample aggregates dictionary."""
-    return {
-        "75101000AA0001": {
-            "id_parcelle_unique": "75101000AA0001",
-            "nb_transactions": 5,
-            "prix_m2_median": 12500.0,
-            "prix_m2_mean": 12800.0,
-            "code_departement": "75",
-            "code_commune": "75101",
-        },
-        "75101000AA0002": {
-            "id_parcelle_unique": "75101000AA0002",
-            "nb_transactions": 3,
-            "prix_m2_median": 11000.0,
-            "prix_m2_mean": 11200.0,
-            "code_departement": "75",
-            "code_commune": "75101",
-        },
-    }
+def sample_aggregates() -> pa.Table:
+    """Create sample department aggregates as an Arrow table."""
+    return pa.table({
+        "id_parcelle_unique": ["75101000AA0001", "75101000AA0002"],
+        "nb_transactions": [5, 3],
+        "prix_m2_median": [12500.0, 11000.0],
+        "prix_m2_mean": [12800.0, 11200.0],
+        "code_departement": ["75", "75"],
+        "code_commune": ["75101", "75101"],
+    })
+
+
+def make_dept_agg(rows: list[dict]) -> pa.Table:
+    """Build department aggregates as an Arrow table from row dicts."""
+    return pa.Table.from_pylist(rows)
 
 
 @pytest.fixture
@@ -80,6 +91,16 @@ def sample_cadastre_gz_file(tmp_path: Path, sample_cadastre_gdf: gpd.GeoDataFram
     return gz_path
 
 
+@pytest.fixture
+def detach_worker():
+    """Release the department aggregates attached by attach_department after the test."""
+    yield
+    generate_parcels._worker_dept_agg = None
+    if generate_parcels._worker_shm is not None:
+        generate_parcels._worker_shm.close()
+        generate_parcels._worker_shm = None
+
+
 # --- Tests for check_tippecanoe ---
 
 def test_check_tippecanoe_when_installed():
@@ -102,6 +123,17 @@ def test_check_tippecanoe_when_not_installed():
     assert result is False
 
 
+def test_check_tippecanoe_looks_up_path_once():
+    """Repeated checks reuse the first PATH lookup."""
+    # Arrange & Act
+    with patch("shutil.which", return_value="/usr/local/bin/tippecanoe") as mock_which:
+        results = [check_tippecanoe() for _ in range(3)]
+    
+    # Assert
+    assert results == [True, True, True]
+    mock_which.assert_called_once_with("tippecanoe")
+
+
 # --- Tests for check_pmtiles_cli ---
 
 def test_check_pmtiles_cli_when_installed():
@@ -124,26 +156,26 @@ def test_check_pmtiles_cli_when_not_installed():
     assert result is False
 
 
-# --- Tests for process_commune_simple ---
+# --- Tests for load_commune_parcels ---
 
-def test_process_commune_simple_success(
+def test_load_commune_parcels_success(
     sample_cadastre_gz_file: Path,
-    sample_aggregates_dict: dict,
+    sample_aggregates: pa.Table,
     temp_dir: Path,
 ):
-    """Test successful processing of a commune."""
+    """Test successful loading and writing of a commune."""
     # Arrange
-    args = (sample_cadastre_gz_file, sample_aggregates_dict, str(temp_dir))
+    loaded = load_commune_parcels(sample_cadastre_gz_file, sample_aggregates)
     
     # Act
-    commune_code, parcel_count, status = process_commune_simple(args)
+    summary = process_department([loaded], temp_dir)
     
     # Assert
-    assert commune_code == "75101"
-    assert parcel_count == 2
-    assert status == "success"
+    assert loaded[0] == "75101"
+    assert loaded[2] == "success"
+    assert summary == [("75101", 2, "success")]
     
-    output_file = temp_dir / "parcels-75101.geojson"
+    output_file = temp_dir / "parcels-75101.geojsonl"
     assert output_file.exists()
     
     result_gdf = gpd.read_file(output_file)
@@ -151,25 +183,28 @@ def test_process_commune_simple_success(
     assert "id_parcelle_unique" in result_gdf.columns
 
 
-def test_process_commune_simple_no_transactions(
+def test_load_commune_parcels_no_transactions(
     sample_cadastre_gz_file: Path,
     temp_dir: Path,
 ):
-    """Test processing when no parcels have transaction data."""
+    """Test loading when no parcels have transaction data."""
     # Arrange
-    args = (sample_cadastre_gz_file, {}, str(temp_dir))
+    dept_agg = make_dept_agg([{"id_parcelle_unique": "other_id"}])
     
     # Act
-    commune_code, parcel_count, status = process_commune_simple(args)
+    commune_code, parcels, status = load_commune_parcels(sample_cadastre_gz_file, dept_agg)
+    summary = process_department([(commune_code, parcels, status)], temp_dir)
     
     # Assert
     assert commune_code == "75101"
-    assert parcel_count == 0
+    assert parcels is None
     assert status == "no_transactions"
+    assert summary == [("75101", 0, "no_transactions")]
+    assert not any(temp_dir.glob("*.geojsonl"))
 
 
-def test_process_commune_simple_empty_cadastre(tmp_path: Path, temp_dir: Path):
-    """Test processing when cadastre file is empty."""
+def test_load_commune_parcels_empty_cadastre(tmp_path: Path):
+    """Test loading when cadastre file is empty."""
     # Arrange
     commune_dir = tmp_path / "75" / "75102"
     commune_dir.mkdir(parents=True, exist_ok=True)
@@ -179,104 +214,498 @@ def test_process_commune_simple_empty_cadastre(tmp_path: Path, temp_dir: Path):
     with gzip.open(gz_path, "wt", encoding="utf-8") as f:
         f.write(empty_gdf.to_json())
     
-    args = (gz_path, {"some_id": {}}, str(temp_dir))
-    
     # Act
-    commune_code, parcel_count, status = process_commune_simple(args)
+    commune_code, parcels, status = load_commune_parcels(gz_path, make_dept_agg([{"id_parcelle_unique": "some_id"}]))
     
     # Assert
     assert commune_code == "75102"
-    assert parcel_count == 0
+    assert parcels is None
     assert status == "no_cadastre"
 
 
-def test_process_commune_simple_handles_error(temp_dir: Path):
+def test_load_commune_parcels_handles_error():
     """Test that errors are handled gracefully."""
     # Arrange
     fake_path = Path("/nonexistent/cadastre-99999-parcelles.json.gz")
-    args = (fake_path, {}, str(temp_dir))
     
     # Act
-    commune_code, parcel_count, status = process_commune_simple(args)
+    commune_code, parcels, status = load_commune_parcels(fake_path, make_dept_agg([{"id_parcelle_unique": "some_id"}]))
     
     # Assert
     assert commune_code == "99999"
-    assert parcel_count == 0
+    assert parcels is None
     assert status == "error"
 
 
-# --- Tests for cleanup_geojson ---
+def test_load_commune_parcels_reads_only_id_and_geometry(tmp_path: Path, temp_dir: Path):
+    """Other cadastre properties are not carried into the output."""
+    # Arrange
+    gz_path = tmp_path / "cadastre-75101-parcelles.json.gz"
+    gdf = gpd.GeoDataFrame({
+        "id": ["P1"],
+        "contenance": [120],
+        "section": ["AA"],
+        "geometry": [box(2.34, 48.85, 2.35, 48.86)],
+    }, crs="EPSG:4326")
+    with gzip.open(gz_path, "wt", encoding="utf-8") as f:
+        f.write(gdf.to_json())
+    dept_agg = make_dept_agg([{"id_parcelle_unique": "P1", "nb_transactions": 1}])
+    
+    # Act
+    summary = process_department([load_commune_parcels(gz_path, dept_agg)], temp_dir)
+    
+    # Assert
+    assert summary == [("75101", 1, "success")]
+    result = gpd.read_file(temp_dir / "parcels-75101.geojsonl")
+    assert set(result.columns) == {"id_parcelle_unique", "nb_transactions", "geometry"}
+
+
+# --- Tests for ensure_fgb ---
+
+def test_ensure_fgb_converts_once_next_to_gz(sample_cadastre_gz_file: Path):
+    """The FlatGeobuf copy is written beside the .gz and reused afterwards."""
+    # Act
+    fgb_path = generate_parcels.ensure_fgb(sample_cadastre_gz_file)
+    mtime = fgb_path.stat().st_mtime_ns
+    with patch("generate_parcels.pyogrio.write_dataframe") as mock_write:
+        again = generate_parcels.ensure_fgb(sample_cadastre_gz_file)
+    
+    # Assert
+    assert fgb_path == sample_cadastre_gz_file.with_name("cadastre-75101-parcelles.fgb")
+    assert fgb_path.is_file()
+    assert again == fgb_path
+    mock_write.assert_not_called()
+    assert fgb_path.stat().st_mtime_ns == mtime
+    assert sorted(gpd.read_file(fgb_path)["id"]) == ["75101000AA0001", "75101000AA0002", "75101000AA0003"]
+    assert [p.name for p in fgb_path.parent.iterdir() if "tmp" in p.name] == []
+
 
-def test_cleanup_geojson_removes_files(temp_dir: Path):
-    """Test that cleanup_geojson removes all specified files."""
+# --- Tests for prepare_for_web ---
+
+def test_prepare_for_web_reprojects_and_simplifies():
+    """Lambert-93 parcels come out in WGS84 with redundant vertices removed."""
     # Arrange
-    files = []
-    for i in range(3):
-        f = temp_dir / f"parcels-{i}.geojson"
-        f.write_text('{"type": "FeatureCollection", "features": []}')
-        files.append(f)
+    parcel = Polygon([(650000, 6860000), (650050, 6860000), (650100, 6860000),
+                      (650100, 6860100), (650000, 6860100)])
+    gdf = gpd.GeoDataFrame({"id_parcelle_unique": ["P1"], "geometry": [parcel]}, crs="EPSG:2154")
     
-    assert all(f.exists() for f in files)
+    # Act
+    result = generate_parcels.prepare_for_web(gdf)
+    
+    # Assert
+    assert result.crs == "EPSG:4326"
+    assert result.geometry.name == "geometry"
+    assert len(result.geometry[0].exterior.coords) == 5
+    x, y = result.geometry[0].exterior.coords[0]
+    assert (round(x, 6), round(y, 6)) == (x, y)
+    minx, miny, _, _ = result.total_bounds
+    assert minx == pytest.approx(2.32, abs=0.01)
+    assert miny == pytest.approx(48.84, abs=0.01)
+
+
+# --- Tests for process_departments ---
+
+def test_process_departments_yields_departments_in_order(tmp_path: Path, temp_dir: Path):
+    """Departments are read ahead in the pool but written in order."""
+    # Arrange
+    import multiprocessing as mp
+    from multiprocessing import shared_memory
+    
+    dept_jobs = []
+    for dept_idx, (commune, parcel_id) in enumerate([("75101", "P75"), ("92004", "P92")]):
+        gz_path = tmp_path / f"cadastre-{commune}-parcelles.json.gz"
+        gdf = gpd.GeoDataFrame({"id": [parcel_id], "geometry": [box(2.3, 48.8, 2.31, 48.81)]}, crs="EPSG:4326")
+        with gzip.open(gz_path, "wt", encoding="utf-8") as f:
+            f.write(gdf.to_json())
+        agg = pl.DataFrame({"id_parcelle_unique": [parcel_id], "nb_transactions": [dept_idx + 1]})
+        dept_jobs.append((dept_idx, agg, [gz_path]))
+    
+    published = []
+    real_publish = generate_parcels.publish_department
+    
+    def tracking_publish(dept_agg):
+        shm, size = real_publish(dept_agg)
+        published.append(shm.name)
+        return shm, size
     
     # Act
-    with patch.object(generate_parcels, "PARCELS_GEOJSON_DIR", temp_dir):
-        cleanup_geojson(files)
+    with patch.object(generate_parcels, "PARCELS_GEOJSON_DIR", temp_dir), \
+         patch.object(generate_parcels, "publish_department", side_effect=tracking_publish), \
+         mp.Pool(2) as pool:
+        yielded = list(generate_parcels.process_departments(pool, dept_jobs))
     
     # Assert
-    assert all(not f.exists() for f in files)
+    assert yielded == [(0, [("75101", 1, "success")]), (1, [("92004", 1, "success")])]
+    assert gpd.read_file(temp_dir / "parcels-92004.geojsonl")["nb_transactions"][0] == 2
+    for name in published:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
 
 
-# --- Integration test ---
+# --- Tests for round_prices ---
 
-def test_aggregate_dict_creation_includes_id_parcelle_unique():
-    """Test that the dict creation method preserves id_parcelle_unique in values.
-    """
+def test_round_prices_rounds_float_columns_except_coordinates():
+    """Prices are rounded to 2 decimals; coordinates and other columns are untouched."""
+    # Arrange
+    agg = pl.DataFrame({
+        "id_parcelle_unique": ["P1"],
+        "nb_transactions": [3],
+        "prix_m2_median": [1234.5678],
+        "longitude": [2.3456789],
+    })
+    
+    # Act
+    result = generate_parcels.round_prices(agg)
+    
+    # Assert
+    assert result.row(0) == ("P1", 3, 1234.57, 2.3456789)
+
+
+# --- Tests for process_department ---
+
+def test_process_department_writes_one_file_per_commune(temp_dir: Path):
+    """A department is simplified as one frame and split back per commune."""
+    # Arrange
+    def parcels(ids: list[str], price: float) -> gpd.GeoDataFrame:
+        return gpd.GeoDataFrame({
+            "id_parcelle_unique": ids,
+            "prix_m2_median": [price] * len(ids),
+            "geometry": [box(2.34 + i / 100, 48.85, 2.35 + i / 100, 48.86) for i in range(len(ids))],
+        }, crs="EPSG:4326")
+    
+    loaded = [
+        ("75101", parcels(["A1", "A2"], 12000.123), "success"),
+        ("75102", None, "no_transactions"),
+        ("75103", parcels(["C1"], 9000.0), "success"),
+    ]
+    
+    # Act
+    summary = process_department(loaded, temp_dir)
+    
+    # Assert
+    assert sorted(summary) == [
+        ("75101", 2, "success"),
+        ("75102", 0, "no_transactions"),
+        ("75103", 1, "success"),
+    ]
+    result = gpd.read_file(temp_dir / "parcels-75101.geojsonl")
+    assert list(result["id_parcelle_unique"]) == ["A1", "A2"]
+    assert "commune_code" not in result.columns
+    assert result["prix_m2_median"][0] == pytest.approx(12000.123)
+    coords = json.loads((temp_dir / "parcels-75101.geojsonl").read_text().splitlines()[0])["geometry"]["coordinates"]
+    assert all(len(repr(value).split(".")[1]) <= 6 for ring in coords for point in ring for value in point)
+    assert len(gpd.read_file(temp_dir / "parcels-75103.geojsonl")) == 1
+    assert not (temp_dir / "parcels-75102.geojsonl").exists()
+
+
+def test_process_department_streams_geojsonseq(temp_dir: Path):
+    """With a stream, the department is written as newline-delimited features."""
     # Arrange
-    import pandas as pd
+    import io
+    gdf = gpd.GeoDataFrame({
+        "id_parcelle_unique": ["A1", "A2"],
+        "geometry": [box(2.34, 48.85, 2.35, 48.86), box(2.35, 48.85, 2.36, 48.86)],
+    }, crs="EPSG:4326")
+    stream = io.BytesIO()
+    
+    # Act
+    summary = process_department([("75101", gdf, "success")], None, stream=stream)
+    
+    # Assert
+    assert summary == [("75101", 2, "success")]
+    features = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [f["properties"]["id_parcelle_unique"] for f in features] == ["A1", "A2"]
+    assert "commune_code" not in features[0]["properties"]
+    assert list(temp_dir.iterdir()) == []
+
+
+# --- Tests for convert_to_pmtiles ---
+
+def test_convert_to_pmtiles_reads_geojsonseq_in_parallel(tmp_path: Path):
+    """tippecanoe is run with -P on the line-delimited commune files."""
+    # Arrange
+    files = [tmp_path / "parcels-75101.geojsonl", tmp_path / "parcels-75102.geojsonl"]
+    for f in files:
+        f.write_text("{}\n")
+    pmtiles = tmp_path / "parcels.pmtiles"
+    
+    def fake_run(cmd, **kwargs):
+        pmtiles.write_bytes(b"tiles")
+        return MagicMock(returncode=0, stderr="")
+    
+    # Act
+    with patch.object(generate_parcels, "PMTILES_OUTPUT", pmtiles), \
+         patch.object(generate_parcels, "check_tippecanoe", return_value=True), \
+         patch.object(generate_parcels, "tippecanoe_supports_pmtiles", return_value=True), \
+         patch("generate_parcels.subprocess.run", side_effect=fake_run) as mock_run:
+        result = generate_parcels.convert_to_pmtiles(files)
+    
+    # Assert
+    assert result is True
+    cmd = mock_run.call_args[0][0]
+    assert "-P" in cmd
+    assert cmd[-2:] == [str(f) for f in files]
+
+
+def test_convert_to_pmtiles_writes_pmtiles_directly(tmp_path: Path):
+    """Recent tippecanoe writes the PMTiles itself; pmtiles convert is not run."""
+    # Arrange
+    geojson = tmp_path / "parcels-75101.geojsonl"
+    geojson.write_text("{}\n")
+    pmtiles = tmp_path / "parcels.pmtiles"
+    
+    def fake_run(cmd, **kwargs):
+        pmtiles.write_bytes(b"tiles")
+        return MagicMock(returncode=0, stderr="")
+    
+    # Act
+    with patch.object(generate_parcels, "PMTILES_OUTPUT", pmtiles), \
+         patch.object(generate_parcels, "check_tippecanoe", return_value=True), \
+         patch.object(generate_parcels, "tippecanoe_supports_pmtiles", return_value=True), \
+         patch.object(generate_parcels, "check_pmtiles_cli") as mock_check_pmtiles, \
+         patch("generate_parcels.subprocess.run", side_effect=fake_run) as mock_run:
+        result = generate_parcels.convert_to_pmtiles([geojson])
     
-    # Simulate a department group from the aggregates DataFrame
-    group = pd.DataFrame({
+    # Assert
+    assert result is True
+    assert mock_run.call_count == 1
+    cmd = mock_run.call_args[0][0]
+    assert cmd[cmd.index("-o") + 1] == str(pmtiles)
+    mock_check_pmtiles.assert_not_called()
+
+
+def test_convert_to_pmtiles_falls_back_to_mbtiles_on_old_tippecanoe(tmp_path: Path):
+    """Old tippecanoe writes MBTiles, which is then converted with pmtiles CLI."""
+    # Arrange
+    geojson = tmp_path / "parcels-75101.geojsonl"
+    geojson.write_text("{}\n")
+    mbtiles = tmp_path / "parcels.mbtiles"
+    
+    def fake_run(cmd, **kwargs):
+        mbtiles.write_bytes(b"tiles")
+        return MagicMock(returncode=0, stderr="")
+    
+    # Act
+    with patch.object(generate_parcels, "PMTILES_OUTPUT", tmp_path / "parcels.pmtiles"), \
+         patch.object(generate_parcels, "check_tippecanoe", return_value=True), \
+         patch.object(generate_parcels, "tippecanoe_supports_pmtiles", return_value=False), \
+         patch.object(generate_parcels, "check_pmtiles_cli", return_value=True), \
+         patch("generate_parcels.subprocess.run", side_effect=fake_run) as mock_run, \
+         patch.object(generate_parcels, "mbtiles_to_pmtiles", return_value=True) as mock_convert:
+        result = generate_parcels.convert_to_pmtiles([geojson])
+    
+    # Assert
+    assert result is True
+    cmd = mock_run.call_args[0][0]
+    assert cmd[cmd.index("-o") + 1] == str(mbtiles)
+    mock_convert.assert_called_once_with(mbtiles, pytest.approx(geojson.stat().st_size / (1024 * 1024)))
+
+
+def test_convert_to_pmtiles_reuses_given_input_size(tmp_path: Path):
+    """A total_bytes from generate_parcel_geojson is used instead of stat'ing again."""
+    # Arrange
+    geojson = tmp_path / "parcels-75101.geojsonl"
+    geojson.write_text("{}\n")
+    mbtiles = tmp_path / "parcels.mbtiles"
+    
+    def fake_run(cmd, **kwargs):
+        mbtiles.write_bytes(b"tiles")
+        return MagicMock(returncode=0, stderr="")
+    
+    # Act
+    with patch.object(generate_parcels, "PMTILES_OUTPUT", tmp_path / "parcels.pmtiles"), \
+         patch.object(generate_parcels, "check_tippecanoe", return_value=True), \
+         patch.object(generate_parcels, "tippecanoe_supports_pmtiles", return_value=False), \
+         patch.object(generate_parcels, "check_pmtiles_cli", return_value=True), \
+         patch("generate_parcels.subprocess.run", side_effect=fake_run), \
+         patch.object(generate_parcels, "mbtiles_to_pmtiles", return_value=True) as mock_convert:
+        result = generate_parcels.convert_to_pmtiles([geojson], total_bytes=3 * 1024 * 1024)
+    
+    # Assert
+    assert result is True
+    mock_convert.assert_called_once_with(mbtiles, pytest.approx(3.0))
+
+
+# --- Tests for stream_to_pmtiles ---
+
+def test_stream_to_pmtiles_pipes_parcels_into_tippecanoe_stdin(tmp_path: Path):
+    """Parcels are written to tippecanoe's stdin, which is closed afterwards."""
+    # Arrange
+    pmtiles = tmp_path / "parcels.pmtiles"
+    pmtiles.write_bytes(b"tiles")
+    proc = MagicMock()
+    proc.wait.return_value = 0
+    
+    # Act
+    with patch.object(generate_parcels, "PMTILES_OUTPUT", pmtiles), \
+         patch.object(generate_parcels, "resolve_tiles_output", return_value=pmtiles), \
+         patch("generate_parcels.subprocess.Popen", return_value=proc) as mock_popen, \
+         patch.object(generate_parcels, "generate_parcel_geojson") as mock_generate:
+        result = generate_parcels.stream_to_pmtiles(num_workers=2)
+    
+    # Assert
+    assert result is True
+    cmd = mock_popen.call_args[0][0]
+    assert cmd[cmd.index("-o") + 1] == str(pmtiles)
+    assert not any(arg.endswith(".geojsonl") for arg in cmd)
+    mock_generate.assert_called_once_with(num_workers=2, stream=proc.stdin)
+    proc.stdin.close.assert_called_once()
+
+
+# --- Tests for shared department aggregates ---
+
+def test_publish_department_round_trips_through_attach_department(sample_aggregates: pa.Table, detach_worker: None):
+    """Workers read back the department aggregates from shared memory."""
+    # Arrange
+    shm, shm_size = publish_department(pl.from_arrow(sample_aggregates))
+    
+    try:
+        # Act
+        attach_department(shm.name, shm_size)
+        
+        # Assert
+        assert generate_parcels._worker_dept_agg.to_pylist() == sample_aggregates.to_pylist()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_attach_department_swaps_aggregates_between_departments(detach_worker: None):
+    """A worker keeps its aggregates for a department and swaps on the next one."""
+    # Arrange
+    first, first_size = publish_department(pl.DataFrame({"id_parcelle_unique": ["A"], "nb_transactions": [1]}))
+    second, second_size = publish_department(pl.DataFrame({"id_parcelle_unique": ["B"], "nb_transactions": [2]}))
+    
+    try:
+        # Act
+        attach_department(first.name, first_size)
+        first_ids = generate_parcels._worker_dept_agg["id_parcelle_unique"].to_pylist()
+        first_shm = generate_parcels._worker_shm
+        attach_department(first.name, first_size)
+        reused = generate_parcels._worker_shm is first_shm
+        attach_department(second.name, second_size)
+        
+        # Assert
+        assert reused
+        assert first_ids == ["A"]
+        assert generate_parcels._worker_dept_agg["id_parcelle_unique"].to_pylist() == ["B"]
+        assert generate_parcels._worker_shm.name == second.name
+    finally:
+        for shm in (first, second):
+            shm.close()
+            shm.unlink()
+
+
+def test_generate_parcel_geojson_processes_departments_in_pool(
+    sample_cadastre_gz_file: Path,
+    tmp_path: Path,
+):
+    """Communes are joined in worker processes against the shared aggregates."""
+    # Arrange
+    output_dir = tmp_path / "parcels"
+    agg = pl.DataFrame({
+        "id_parcelle_unique": ["75101000AA0001", "75101000AA0003", "92004000AB0001"],
+        "nb_transactions": [5, 8, 2],
+        "code_departement": ["75", "75", "92"],
+    })
+    
+    # Act
+    with patch.object(generate_parcels, "CADASTRE_DIR", tmp_path), \
+         patch.object(generate_parcels, "PARCELS_GEOJSON_DIR", output_dir), \
+         patch.object(generate_parcels, "load_aggregate", return_value=agg):
+        files, total_bytes = generate_parcels.generate_parcel_geojson(num_workers=2)
+    
+    # Assert
+    assert files == [output_dir / "parcels-75101.geojsonl"]
+    assert total_bytes == files[0].stat().st_size
+    result = gpd.read_file(files[0])
+    assert sorted(result["id_parcelle_unique"]) == ["75101000AA0001", "75101000AA0003"]
+
+
+def test_generate_parcel_geojson_recycles_pool_workers(
+    sample_cadastre_gz_file: Path,
+    tmp_path: Path,
+):
+    """Workers are replaced after MAX_TASKS_PER_WORKER tasks and still find the aggregates."""
+    # Arrange
+    import multiprocessing as mp
+    output_dir = tmp_path / "parcels"
+    agg = pl.DataFrame({
+        "id_parcelle_unique": ["75101000AA0001"],
+        "nb_transactions": [5],
+        "code_departement": ["75"],
+    })
+    
+    # Act
+    with patch.object(generate_parcels, "CADASTRE_DIR", tmp_path), \
+         patch.object(generate_parcels, "PARCELS_GEOJSON_DIR", output_dir), \
+         patch.object(generate_parcels, "load_aggregate", return_value=agg), \
+         patch.object(generate_parcels, "MAX_TASKS_PER_WORKER", 1), \
+         patch("generate_parcels.mp.Pool", wraps=mp.Pool) as mock_pool:
+        files, _ = generate_parcels.generate_parcel_geojson(num_workers=1)
+    
+    # Assert
+    mock_pool.assert_called_once_with(1, maxtasksperchild=1)
+    assert files == [output_dir / "parcels-75101.geojsonl"]
+
+
+def test_generate_parcel_geojson_without_cadastre_files(tmp_path: Path):
+    """No cadastre files gives an empty file list and zero bytes, not a bare list."""
+    # Arrange
+    agg = pl.DataFrame({
+        "id_parcelle_unique": ["75101000AA0001"],
+        "nb_transactions": [5],
+        "code_departement": ["75"],
+    })
+    
+    # Act
+    with patch.object(generate_parcels, "CADASTRE_DIR", tmp_path), \
+         patch.object(generate_parcels, "load_aggregate", return_value=agg):
+        result = generate_parcels.generate_parcel_geojson(num_workers=1)
+    
+    # Assert
+    assert result == ([], 0)
+
+
+# --- Integration test ---
+
+def test_partition_by_department_splits_aggregates():
+    """Each department gets its own polars frame."""
+    # Arrange
+    agg = pl.DataFrame({
         "id_parcelle_unique": ["PARCEL001", "PARCEL002", "PARCEL003"],
         "nb_transactions": [5, 3, 8],
         "prix_m2_median": [12000.0, 11000.0, 13000.0],
-        "code_departement": ["75", "75", "75"],
-        "code_commune": ["75101", "75101", "75102"],
+        "code_departement": ["75", "92", "75"],
+        "code_commune": ["75101", "92004", "75102"],
     })
     
-    # Act - Use the same method as generate_parcel_geojson
-    records = group.to_dict("records")
-    group_dict = {row["id_parcelle_unique"]: row for row in records}
-    
-    # Assert - Each value dict must contain id_parcelle_unique
-    for parcel_id, row_dict in group_dict.items():
-        assert "id_parcelle_unique" in row_dict, \
-            f"id_parcelle_unique missing from dict value for key {parcel_id}"
-        assert row_dict["id_parcelle_unique"] == parcel_id, \
-            f"id_parcelle_unique value mismatch: expected {parcel_id}, got {row_dict['id_parcelle_unique']}"
+    # Act
+    agg_by_dept = partition_by_department(agg)
     
-    # Assert - All expected columns are present
-    expected_cols = {"id_parcelle_unique", "nb_transactions", "prix_m2_median", "code_departement", "code_commune"}
-    for parcel_id, row_dict in group_dict.items():
-        assert expected_cols <= set(row_dict.keys()), \
-            f"Missing columns in dict for {parcel_id}"
+    # Assert
+    assert set(agg_by_dept) == {"75", "92"}
+    assert agg_by_dept["75"]["id_parcelle_unique"].to_list() == ["PARCEL001", "PARCEL003"]
+    assert agg_by_dept["92"]["nb_transactions"].to_list() == [3]
+    assert "code_departement" not in agg_by_dept["75"].columns
 
 
-def test_aggregate_dict_compatible_with_process_commune_simple(
+def test_worker_aggregates_compatible_with_load_commune_shared(
     sample_cadastre_gz_file: Path,
     temp_dir: Path,
+    detach_worker: None,
 ):
-    """Test that dict created with production method works with process_commune_simple.
+    """Test that aggregates published to shared memory work with load_commune_shared.
     
     This integration test verifies the contract between generate_parcel_geojson's
-    dict creation and process_commune_simple's expectations.
+    department split, the shared memory hand-off, load_commune_shared and
+    process_department.
     """
-    # Arrange - Create dict using the SAME method as production code
-    import pandas as pd
-    
+    # Arrange
     # Note: sample_cadastre_gdf has 3 parcels with ids:
     # "75101000AA0001", "75101000AA0002", "75101000AA0003"
     # We'll provide aggregates for all 3 to test the full join
-    agg_df = pd.DataFrame({
+    agg_df = pl.DataFrame({
         "id_parcelle_unique": ["75101000AA0001", "75101000AA0002", "75101000AA0003"],
         "nb_transactions": [5, 3, 8],
         "prix_m2_median": [12000.0, 11000.0, 13000.0],
@@ -284,20 +713,20 @@ def test_aggregate_dict_compatible_with_process_commune_simple(
         "code_commune": ["75101", "75101", "75101"],
     })
     
-    # Use the exact same dict creation as generate_parcel_geojson
-    records = agg_df.to_dict("records")
-    agg_dict = {row["id_parcelle_unique"]: row for row in records}
-    
-    args = (sample_cadastre_gz_file, agg_dict, str(temp_dir))
-    
-    # Act
-    commune_code, parcel_count, status = process_commune_simple(args)
+    shm, shm_size = publish_department(partition_by_department(agg_df)["75"])
+    try:
+        # Act
+        loaded = load_commune_shared((sample_cadastre_gz_file, shm.name, shm_size))
+        [(commune_code, parcel_count, status)] = process_department([loaded], temp_dir)
+    finally:
+        shm.close()
+        shm.unlink()
     
     # Assert
     assert status == "success", f"Expected success but got {status}"
     assert parcel_count == 3, f"Expected 3 parcels but got {parcel_count}"
     
-    output_file = temp_dir / "parcels-75101.geojson"
+    output_file = temp_dir / "parcels-75101.geojsonl"
     assert output_file.exists()
     
     result_gdf = gpd.read_file(output_file)
@@ -327,16 +756,14 @@ def test_full_commune_processing_workflow(tmp_path: Path):
     with gzip.open(gz_path, "wt", encoding="utf-8") as f:
         f.write(gdf.to_json())
     
-    agg_dict = {
-        "PARCEL001": {"id_parcelle_unique": "PARCEL001", "nb_transactions": 10, "prix_m2_median": 15000.0},
-        "PARCEL003": {"id_parcelle_unique": "PARCEL003", "nb_transactions": 5, "prix_m2_median": 12000.0},
-    }
-    
-    args = (gz_path, agg_dict, str(output_dir))
+    dept_agg = make_dept_agg([
+        {"id_parcelle_unique": "PARCEL001", "nb_transactions": 10, "prix_m2_median": 15000.0},
+        {"id_parcelle_unique": "PARCEL003", "nb_transactions": 5, "prix_m2_median": 12000.0},
+    ])
     
     # Act
-    commune_code, parcel_count, status = process_commune_simple(args)
-    result = gpd.read_file(output_dir / "parcels-75101.geojson")
+    [(commune_code, parcel_count, status)] = process_department([load_commune_parcels(gz_path, dept_agg)], output_dir)
+    result = gpd.read_file(output_dir / "parcels-75101.geojsonl")
     
     # Assert
     assert status == "success"
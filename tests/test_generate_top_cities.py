@@ -0,0 +1,106 @@
+"""
+Unit tests for generate_top_cities.py
+
+Tests the per-city statistics computed from the processed DVF parquet file.
+"""
+
+import json
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+import generate_top_cities
+from generate_top_cities import aggregate_cities
+
+
+# --- Fixtures ---
+
+@pytest.fixture
+def transactions() -> pl.DataFrame:
+    """Residential transactions in two Paris arrondissements and Bordeaux."""
+    return pl.DataFrame({
+        "code_commune": ["75101", "75102", "75102", "33063", "33063", "33063"],
+        "nom_commune": ["Paris 1er", "Paris 2e", "Paris 2e", "Bordeaux", "Bordeaux", "Bordeaux"],
+        "type_local": ["Appartement", "Appartement", "Maison", "Maison", "Maison", "Appartement"],
+        "prix_m2": [10000.0, 12000.0, 9000.0, 4000.0, 5000.0, 4500.0],
+    })
+
+
+# --- Tests for aggregate_cities ---
+
+def test_aggregate_cities_groups_arrondissements_under_city(transactions: pl.DataFrame):
+    """Arrondissements are counted under their parent city."""
+    # Act
+    result = aggregate_cities(transactions.lazy()).collect()
+
+    # Assert
+    counts = dict(zip(result["name"], result["nb_transactions"]))
+    assert counts == {"Paris": 3, "Bordeaux": 3}
+
+
+def test_aggregate_cities_computes_per_type_medians(transactions: pl.DataFrame):
+    """Per-type medians only use transactions of that property type."""
+    # Act
+    result = aggregate_cities(transactions.lazy()).collect()
+
+    # Assert
+    paris = result.filter(pl.col("name") == "Paris").row(0, named=True)
+    assert paris["nb_maisons"] == 1
+    assert paris["nb_appartements"] == 2
+    assert paris["prix_m2_median"] == pytest.approx(10000.0)
+    assert paris["prix_m2_maison_median"] == pytest.approx(9000.0)
+    assert paris["prix_m2_appart_median"] == pytest.approx(11000.0)
+
+
+def test_aggregate_cities_returns_null_for_missing_property_type(transactions: pl.DataFrame):
+    """Cities without a property type get a null median for that type."""
+    # Act
+    result = aggregate_cities(transactions.filter(pl.col("type_local") == "Maison").lazy()).collect()
+
+    # Assert
+    bordeaux = result.filter(pl.col("name") == "Bordeaux").row(0, named=True)
+    assert bordeaux["prix_m2_appart_median"] is None
+    assert bordeaux["prix_m2_maison_median"] == pytest.approx(4500.0)
+
+
+# --- Tests for scan_residential ---
+
+def test_scan_residential_pushes_projection_and_filter_into_scan(tmp_path: Path, transactions: pl.DataFrame):
+    """Only the needed columns are read and the filter reaches the parquet scan."""
+    # Arrange
+    path = tmp_path / "dvf_processed.parquet"
+    transactions.with_columns(pl.lit("x").alias("adresse")).write_parquet(path)
+
+    # Act
+    plan = generate_top_cities.scan_residential(path).explain()
+
+    # Assert
+    assert "SELECTION" in plan
+    assert "PROJECT 4/5" in plan
+
+
+# --- Tests for main ---
+
+def test_main_writes_top_cities_json(transactions: pl.DataFrame, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """main() filters residential sales and writes cities sorted by transactions."""
+    # Arrange
+    dvf = transactions.vstack(pl.DataFrame({
+        "code_commune": ["33063", "33063", "33063"],
+        "nom_commune": ["Bordeaux", "Bordeaux", "Bordeaux"],
+        "type_local": ["Appartement", "Local industriel", "Maison"],
+        "prix_m2": [4800.0, 1000.0, None],
+    }))
+    dvf_path = tmp_path / "dvf_processed.parquet"
+    dvf.write_parquet(dvf_path)
+    output_path = tmp_path / "top_cities.json"
+    monkeypatch.setattr(generate_top_cities, "DVF_PATH", dvf_path)
+    monkeypatch.setattr(generate_top_cities, "OUTPUT_PATH", output_path)
+
+    # Act
+    exit_code = generate_top_cities.main()
+
+    # Assert
+    assert exit_code == 0
+    cities = json.loads(output_path.read_text())
+    assert [(city["name"], city["nb_transactions"]) for city in cities] == [("Bordeaux", 4), ("Paris", 3)]
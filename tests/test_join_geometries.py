@@ -5,6 +5,9 @@ Tests the spatial join operations between DVF price aggregates
 and administrative geometries (regions, departments, communes, IRIS).
 """
 
+import gzip
+import json
+import os
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -12,6 +15,7 @@ from unittest.mock import MagicMock, patch
 import geopandas as gpd
 import pandas as pd
 import polars as pl
+import pyogrio
 import pytest
 from shapely.geometry import Polygon, box
 
@@ -189,6 +193,36 @@ def test_join_regions_handles_missing_aggregates(sample_regions_gdf, sample_regi
     assert pd.isna(missing["nb_transactions"].iloc[0])
 
 
+def test_join_regions_keeps_geometry_aligned_with_attributes(sample_regions_gdf, sample_region_agg):
+    """Geometries stay on their own row when aggregates come in another order."""
+    # Arrange
+    reversed_agg = sample_region_agg.reverse()
+    
+    with patch.object(join_geometries, "load_regions_geometry", return_value=sample_regions_gdf):
+        with patch.object(join_geometries, "load_aggregate", return_value=reversed_agg):
+            # Act
+            result = join_regions()
+    
+    # Assert
+    assert isinstance(result, gpd.GeoDataFrame)
+    assert result.crs == "EPSG:4326"
+    assert list(result["code_region"]) == ["11", "44", "75"]
+    assert result.geometry.equals(sample_regions_gdf.geometry)
+    assert list(result["nb_transactions"]) == [50000, 20000, 15000]
+
+
+def test_join_regions_rejects_duplicate_aggregate_keys(sample_regions_gdf, sample_region_agg):
+    """Duplicate keys in the aggregates raise instead of duplicating geometries."""
+    # Arrange
+    duplicated_agg = pl.concat([sample_region_agg, sample_region_agg.head(1)])
+    
+    with patch.object(join_geometries, "load_regions_geometry", return_value=sample_regions_gdf):
+        with patch.object(join_geometries, "load_aggregate", return_value=duplicated_agg):
+            # Act & Assert
+            with pytest.raises(pl.exceptions.ComputeError):
+                join_regions()
+
+
 # --- Tests for join_country ---
 
 def test_join_country_dissolves_regions(sample_regions_gdf, sample_country_agg):
@@ -220,6 +254,18 @@ def test_join_country_adds_aggregate_columns(sample_regions_gdf, sample_country_
     assert result["prix_m2_median"].iloc[0] == 3500.0
 
 
+def test_join_country_keeps_only_country_attributes(sample_regions_gdf, sample_country_agg):
+    """The country covers every region and carries no region attributes."""
+    # Act
+    with patch.object(join_geometries, "load_aggregate", return_value=sample_country_agg):
+        result = join_country(sample_regions_gdf)
+    
+    # Assert
+    assert "code_region" not in result.columns
+    assert result.crs == sample_regions_gdf.crs
+    assert result.geometry.iloc[0].equals(sample_regions_gdf.union_all())
+
+
 # --- Tests for join_departments ---
 
 def test_join_departments_merges_correctly(sample_departments_gdf, sample_department_agg):
@@ -355,6 +401,25 @@ def test_simplify_for_web_does_not_modify_original():
     assert gdf["geometry"].iloc[0].wkt == original_geometry
 
 
+def test_simplify_for_web_matches_geoseries_simplify_across_threads():
+    """Chunked threaded simplification keeps row order and GeoSeries.simplify results."""
+    # Arrange
+    polygons = [
+        Polygon([(i, 0), (i + 0.5, 0.001), (i + 1, 0), (i + 1, 1), (i, 1)])
+        for i in range(10)
+    ]
+    gdf = gpd.GeoDataFrame({"id": range(10), "geometry": polygons}, crs="EPSG:4326")
+    expected = gdf.geometry.simplify(0.01, preserve_topology=True)
+    
+    # Act
+    with patch.object(join_geometries, "SIMPLIFY_THREADS", 3):
+        result = simplify_for_web(gdf, tolerance=0.01)
+    
+    # Assert
+    assert result.geometry.geom_equals(expected).all()
+    assert result.crs == gdf.crs
+
+
 # --- Tests for save_geojson ---
 
 def test_save_geojson_creates_file(temp_output_dir, sample_communes_gdf, sample_commune_agg):
@@ -441,6 +506,70 @@ def test_save_geojson_rounds_float_columns(temp_output_dir, sample_communes_gdf,
     assert loaded["prix_m2_median"].iloc[0] == 14000.12
 
 
+def test_save_geojson_limits_coordinate_precision(temp_output_dir, sample_communes_gdf, sample_commune_agg):
+    """Coordinates are written with COORDINATE_PRECISION decimals under the level's name."""
+    # Arrange
+    gdf = sample_communes_gdf.merge(sample_commune_agg.to_pandas(), on="code_commune")
+    gdf.loc[0, "geometry"] = box(2.3312345678, 48.8512345678, 2.3498765432, 48.8698765432)
+    
+    with patch.object(join_geometries, "OUTPUT_DIR", temp_output_dir):
+        # Act
+        save_geojson(gdf, "test_communes", simplify=False)
+    
+    # Assert
+    data = json.loads((temp_output_dir / "test_communes.geojson").read_text())
+    assert data["name"] == "test_communes"
+    x, y = data["features"][0]["geometry"]["coordinates"][0][0]
+    assert x == round(x, 5) and y == round(y, 5)
+
+
+def test_save_geojson_drops_empty_text_columns(temp_output_dir, sample_communes_gdf, sample_commune_agg):
+    """Text columns with no values are not written."""
+    # Arrange
+    gdf = sample_communes_gdf.merge(sample_commune_agg.to_pandas(), on="code_commune")
+    gdf["nom_iris"] = None
+    
+    with patch.object(join_geometries, "OUTPUT_DIR", temp_output_dir):
+        # Act
+        save_geojson(gdf, "test_communes", simplify=False)
+    
+    # Assert
+    loaded = gpd.read_file(temp_output_dir / "test_communes.geojson")
+    assert "nom_iris" not in loaded.columns
+    assert "nom_commune_geo" in loaded.columns
+
+
+def test_save_geojson_writes_gzipped_copy(temp_output_dir, sample_communes_gdf, sample_commune_agg):
+    """A .geojson.gz with the same content is written next to the GeoJSON."""
+    # Arrange
+    gdf = sample_communes_gdf.merge(sample_commune_agg.to_pandas(), on="code_commune")
+    
+    with patch.object(join_geometries, "OUTPUT_DIR", temp_output_dir):
+        # Act
+        save_geojson(gdf, "test_communes", simplify=False)
+    
+    # Assert
+    plain = (temp_output_dir / "test_communes.geojson").read_bytes()
+    with gzip.open(temp_output_dir / "test_communes.geojson.gz", "rb") as f:
+        assert f.read() == plain
+
+
+def test_save_geojson_seq_writes_one_feature_per_line(temp_output_dir, sample_communes_gdf, sample_commune_agg):
+    """With seq=True, features are written line-delimited to <name>.geojsonl only."""
+    # Arrange
+    gdf = sample_communes_gdf.merge(sample_commune_agg.to_pandas(), on="code_commune")
+    
+    with patch.object(join_geometries, "OUTPUT_DIR", temp_output_dir):
+        # Act
+        save_geojson(gdf, "test_communes", simplify=False, seq=True)
+    
+    # Assert
+    lines = (temp_output_dir / "test_communes.geojsonl").read_text().splitlines()
+    assert len(lines) == len(gdf)
+    assert all(json.loads(line)["type"] == "Feature" for line in lines)
+    assert sorted(path.name for path in temp_output_dir.iterdir()) == ["test_communes.geojsonl"]
+
+
 def test_save_geojson_applies_simplification(temp_output_dir, sample_communes_gdf, sample_commune_agg):
     """Test that simplification is applied when simplify=True."""
     # Arrange
@@ -457,6 +586,141 @@ def test_save_geojson_applies_simplification(temp_output_dir, sample_communes_gd
     mock_simplify.assert_called_once()
 
 
+# --- Tests for Admin Express layers ---
+
+@pytest.fixture
+def admin_express_gpkg(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Write a one-layer Admin Express GeoPackage in Lambert 93 and point to it."""
+    gpkg = tmp_path / "admin_express.gpkg"
+    regions = gpd.GeoDataFrame({
+        "code_insee": ["11"],
+        "nom_officiel": ["Île-de-France"],
+        "nom_officiel_en_majuscules": ["ILE-DE-FRANCE"],
+        "geometry": [box(600000, 6800000, 700000, 6900000)],
+    }, crs="EPSG:2154")
+    regions.to_file(gpkg, layer="region", driver="GPKG")
+    monkeypatch.setattr(join_geometries, "ADMIN_EXPRESS_GPKG", gpkg)
+    monkeypatch.setattr(join_geometries, "GEOMETRY_CACHE_DIR", tmp_path / "cache")
+    return gpkg
+
+
+def test_load_regions_geometry_caches_layer_as_geoparquet(admin_express_gpkg: Path, tmp_path: Path):
+    """The first read writes a WGS84 GeoParquet copy that later reads use."""
+    # Act
+    first = join_geometries.load_regions_geometry()
+    with patch.object(join_geometries.pyogrio, "read_dataframe") as mock_read:
+        second = join_geometries.load_regions_geometry()
+    
+    # Assert
+    cached = gpd.read_parquet(tmp_path / "cache" / "region.parquet")
+    assert list(cached.columns) == ["code_insee", "nom_officiel", "geometry"]
+    mock_read.assert_not_called()
+    assert second.crs == "EPSG:4326"
+    assert second.equals(first)
+
+
+def test_read_admin_layer_refreshes_stale_cache(admin_express_gpkg: Path, tmp_path: Path):
+    """A GeoPackage newer than its cached copy is read again."""
+    # Arrange
+    join_geometries.load_regions_geometry()
+    cache = tmp_path / "cache" / "region.parquet"
+    os.utime(cache, (0, 0))
+    
+    # Act
+    with patch.object(join_geometries.pyogrio, "read_dataframe", wraps=pyogrio.read_dataframe) as mock_read:
+        join_geometries.load_regions_geometry()
+    
+    # Assert
+    mock_read.assert_called_once()
+    assert cache.stat().st_mtime >= admin_express_gpkg.stat().st_mtime
+
+
+def test_load_communes_geometry_replaces_parents_with_arrondissements(admin_express_gpkg: Path):
+    """Paris is replaced by its arrondissements, on the first read and from the cache."""
+    # Arrange
+    gpd.GeoDataFrame({
+        "code_insee": ["75056", "92004"],
+        "code_insee_du_departement": ["75", "92"],
+        "nom_officiel": ["Paris", "Asnières-sur-Seine"],
+        "geometry": [box(648000, 6858000, 656000, 6866000), box(644000, 6869000, 647000, 6872000)],
+    }, crs="EPSG:2154").to_file(admin_express_gpkg, layer="commune", driver="GPKG")
+    gpd.GeoDataFrame({
+        "code_insee": ["75101"],
+        "nom_officiel": ["Paris 1er Arrondissement"],
+        "geometry": [box(650000, 6861000, 652000, 6863000)],
+    }, crs="EPSG:2154").to_file(admin_express_gpkg, layer="arrondissement_municipal", driver="GPKG")
+    
+    # Act
+    first = join_geometries.load_communes_geometry()
+    second = join_geometries.load_communes_geometry()
+    
+    # Assert
+    for result in (first, second):
+        assert sorted(result["code_commune"]) == ["75101", "92004"]
+        assert result.loc[result["code_commune"] == "75101", "code_departement"].iloc[0] == "75"
+        assert list(result.columns) == ["code_commune", "code_departement", "nom_commune_geo", "geometry"]
+
+
+# --- Tests for the IRIS reference ---
+
+@pytest.fixture
+def iris_reference(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Write an INSEE IRIS reference spreadsheet (5 header lines) and point to it."""
+    reference = tmp_path / "reference_IRIS_geo2025.xlsx"
+    header = pd.DataFrame([[None, None, None]] * 4, columns=["a", "b", "c"])
+    rows = pd.DataFrame({"CODE_IRIS": [751010101], "LIB_IRIS": ["Les Halles"], "LIBCOM": ["Paris 1er"]})
+    with pd.ExcelWriter(reference) as writer:
+        header.to_excel(writer, index=False)
+        rows.to_excel(writer, index=False, startrow=5)
+    monkeypatch.setattr(join_geometries, "IRIS_REFERENCE", reference)
+    return reference
+
+
+def test_read_iris_reference_caches_spreadsheet_as_parquet(iris_reference: Path, tmp_path: Path):
+    """The spreadsheet is parsed once; later reads use the parquet copy."""
+    # Act
+    first = join_geometries._read_iris_reference()
+    with patch.object(join_geometries.pd, "read_excel") as mock_read_excel:
+        second = join_geometries._read_iris_reference()
+    
+    # Assert
+    mock_read_excel.assert_not_called()
+    assert (tmp_path / "reference_IRIS_geo2025.parquet").exists()
+    assert first.to_dict("list") == {"code_iris": ["751010101"], "nom_iris_ref": ["Les Halles"]}
+    assert second.equals(first)
+
+
+def test_load_iris_geometry_reads_needed_columns_as_strings(
+    iris_reference: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """IRIS codes stay strings, names come from the reference (else the GPKG), and the layer is cached."""
+    # Arrange
+    gpkg = tmp_path / "contours-iris-pe.gpkg"
+    gpd.GeoDataFrame({
+        "code_iris": ["751010101", "751010102"],
+        "nom_iris": ["Halles (GPKG)", "Palais Royal"],
+        "code_insee": ["75101", "75101"],
+        "nom_commune": ["Paris 1er", "Paris 1er"],
+        "type_iris": ["H", "H"],
+        "geometry": [box(651000, 6862000, 652000, 6863000), box(650000, 6862000, 651000, 6863000)],
+    }, crs="EPSG:2154").to_file(gpkg, driver="GPKG")
+    monkeypatch.setattr(join_geometries, "IRIS_GPKG", gpkg)
+    monkeypatch.setattr(join_geometries, "GEOMETRY_CACHE_DIR", tmp_path / "cache")
+    
+    # Act
+    result = join_geometries.load_iris_geometry()
+    with patch.object(join_geometries.pyogrio, "read_dataframe") as mock_read:
+        cached = join_geometries.load_iris_geometry()
+    
+    # Assert
+    mock_read.assert_not_called()
+    assert cached.equals(result)
+    assert "type_iris" not in result.columns
+    assert result["code_iris"].tolist() == ["751010101", "751010102"]
+    assert result["nom_iris"].tolist() == ["Les Halles", "Palais Royal"]
+    assert result.crs == "EPSG:4326"
+
+
 # --- Tests for load_aggregate ---
 
 def test_load_aggregate_reads_parquet(tmp_path: Path, sample_region_agg):
@@ -557,3 +821,45 @@ def test_full_join_workflow_all_levels(
     halles = iris[iris["code_iris"] == "751010101"]
     assert halles["nb_transactions"].iloc[0] == 50
     assert halles["prix_m2_median"].iloc[0] == 15000.0
+
+
+def test_main_joins_and_saves_every_level(
+    temp_output_dir,
+    sample_regions_gdf,
+    sample_departments_gdf,
+    sample_communes_gdf,
+    sample_iris_gdf,
+    sample_region_agg,
+    sample_department_agg,
+    sample_commune_agg,
+    sample_iris_agg,
+    sample_country_agg,
+):
+    """main() joins the levels concurrently and writes one GeoJSON per level."""
+    # Arrange
+    aggregates = {
+        "region": sample_region_agg,
+        "country": sample_country_agg,
+        "department": sample_department_agg,
+        "commune": sample_commune_agg,
+        "iris": sample_iris_agg,
+    }
+    
+    with patch.object(join_geometries, "OUTPUT_DIR", temp_output_dir), \
+         patch.object(join_geometries, "load_regions_geometry", return_value=sample_regions_gdf), \
+         patch.object(join_geometries, "load_departments_geometry", return_value=sample_departments_gdf), \
+         patch.object(join_geometries, "load_communes_geometry", return_value=sample_communes_gdf), \
+         patch.object(join_geometries, "load_iris_geometry", return_value=sample_iris_gdf), \
+         patch.object(join_geometries, "load_aggregate", side_effect=lambda level, time_span="all": aggregates[level]):
+        
+        # Act
+        join_geometries.main()
+    
+    # Assert
+    for name in ["country", "regions", "departments"]:
+        assert (temp_output_dir / f"{name}.geojson").exists(), f"{name}.geojson not written"
+    for name in ["communes", "iris"]:
+        assert (temp_output_dir / f"{name}.geojsonl").exists(), f"{name}.geojsonl not written"
+        assert not (temp_output_dir / f"{name}.geojson").exists()
+    communes = gpd.read_file(temp_output_dir / "communes.geojsonl")
+    assert len(communes) == 3
@@ -24,6 +24,11 @@ def temp_processed_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
         "OUTPUT_PARQUET", 
         processed_dir / "dvf_processed.parquet"
     )
+    monkeypatch.setattr(
+        process_dvf, 
+        "AGGREGATED_PARQUET", 
+        processed_dir / "dvf_aggregated.parquet"
+    )
     return processed_dir
 
 
@@ -298,6 +303,70 @@ def test_remove_duplicate_lines_groups_by_all_four_columns():
     assert disp2["nature_culture"].to_list() == ["Jardin"]
 
 
+def test_remove_duplicate_lines_drops_rows_with_null_group_key():
+    """Rows without a parcel id are dropped, as with the former join-back."""
+    # Arrange
+    from process_dvf import remove_duplicate_lines
+    
+    df = pl.LazyFrame({
+        "id_mutation": ["M1", "M2"],
+        "numero_disposition": [1, 1],
+        "id_parcelle": ["P1", None],
+        "nature_mutation": ["Vente", "Vente"],
+        "nature_culture": ["Sol", "Sol"],
+    })
+    
+    # Act
+    result = remove_duplicate_lines(df).collect()
+    
+    # Assert
+    assert result["id_mutation"].to_list() == ["M1"]
+
+
+# --- Tests for add_dependency ---
+
+def test_add_dependency_flags_every_line_of_group_with_dependency():
+    """All lines of a group get has_dependency when one of them is a Dépendance."""
+    # Arrange
+    from process_dvf import add_dependency
+    
+    df = pl.LazyFrame({
+        "id_mutation": ["M1", "M1", "M2"],
+        "numero_disposition": [1, 1, 1],
+        "id_parcelle": ["P1", "P1", "P2"],
+        "nature_culture": ["Sol", "Sol", "Sol"],
+        "nature_culture_speciale": ["unknown", "unknown", "unknown"],
+        "nature_mutation": ["Vente", "Vente", "Vente"],
+        "type_local": ["Maison", "Dépendance", "Appartement"],
+    })
+    
+    # Act
+    result = add_dependency(df).collect()
+    
+    # Assert
+    assert result["has_dependency"].to_list() == [True, True, False]
+
+
+# --- Tests for keep_sale_mutations ---
+
+def test_keep_sale_mutations_keeps_all_lines_of_sale_mutations():
+    """Sale mutations keep every line, including dependencies; other mutations are dropped."""
+    # Arrange
+    from process_dvf import keep_sale_mutations
+    
+    df = pl.LazyFrame({
+        "nature_mutation": ["Vente", "Vente", "Echange", "Adjudication"],
+        "type_local": ["Maison", "Dépendance", "Maison", None],
+    })
+    
+    # Act
+    result = keep_sale_mutations(df).collect()
+    
+    # Assert
+    assert result["nature_mutation"].to_list() == ["Vente", "Vente", "Adjudication"]
+    assert result["type_local"].to_list() == ["Maison", "Dépendance", None]
+
+
 # --- Tests for drop_unwanted_values ---
 
 def test_drop_unwanted_values_keeps_valid_nature_mutation():
@@ -812,6 +881,8 @@ def test_reduce_data_takes_first_for_scalar_columns():
     assert result["type_local"].to_list()[0] == "Maison"
     assert result["longitude"].to_list()[0] == 2.3522
     assert result["latitude"].to_list()[0] == 48.8566
+    assert result["id_parcelle_unique"].to_list() == ["P1"]
+    assert result["id_parcelle"].to_list() == [["P1", "P2"]]
 
 
 def test_reduce_data_sums_nombre_pieces_principales():
@@ -996,6 +1067,35 @@ def test_reduce_data_list_columns_contain_all_values():
     assert set(result["surface_terrain"].to_list()[0]) == {500.0, 200.0, 100.0}
 
 
+# --- Tests for load_region_mapping ---
+
+def test_load_region_mapping_reads_insee_files_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """The INSEE CSVs are parsed on the first call only."""
+    # Arrange
+    from process_dvf import load_region_mapping
+    
+    (tmp_path / "v_departement_2025.csv").write_text("DEP,REG\n75,11\n13,93\n")
+    (tmp_path / "v_region_2025.csv").write_text("REG,LIBELLE\n11,Île-de-France\n93,Provence-Alpes-Côte d'Azur\n")
+    monkeypatch.setattr(process_dvf, "INSEE_DIR", tmp_path)
+    load_region_mapping.cache_clear()
+    
+    try:
+        # Act
+        with patch.object(process_dvf.pl, "read_csv", wraps=pl.read_csv) as mock_read_csv:
+            first = load_region_mapping()
+            second = load_region_mapping()
+    finally:
+        load_region_mapping.cache_clear()
+    
+    # Assert
+    assert mock_read_csv.call_count == 2
+    assert second is first
+    assert dict(zip(first["code_departement"], first["nom_region"])) == {
+        "75": "Île-de-France",
+        "13": "Provence-Alpes-Côte d'Azur",
+    }
+
+
 # --- Tests for add_region_information ---
 
 @pytest.fixture
@@ -1034,7 +1134,7 @@ def test_add_region_information_adds_code_region_and_nom_region(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert
     assert "code_region" in result.columns
@@ -1059,7 +1159,7 @@ def test_add_region_information_maps_departments_to_correct_regions(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert
     # Paris (75) -> Île-de-France (11)
@@ -1098,7 +1198,7 @@ def test_add_region_information_preserves_existing_columns(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert
     assert result["id_mutation"].to_list() == ["M1", "M2"]
@@ -1125,7 +1225,7 @@ def test_add_region_information_handles_multiple_rows_same_department(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert
     assert result["code_region"].to_list() == ["11", "11", "11"]
@@ -1150,7 +1250,7 @@ def test_add_region_information_handles_overseas_departments(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert - DOM regions have their own codes
     guadeloupe_row = result.filter(pl.col("code_departement") == "971")
@@ -1183,7 +1283,7 @@ def test_add_region_information_handles_unknown_department(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert
     valid_row = result.filter(pl.col("code_departement") == "75")
@@ -1211,12 +1311,62 @@ def test_add_region_information_preserves_row_count(
     })
     
     # Act
-    result = add_region_information(df)
+    result = add_region_information(df.lazy()).collect()
     
     # Assert
     assert len(result) == 5
 
 
+# --- Tests for compute_time_adjusted_price ---
+
+@pytest.fixture
+def priced_transactions() -> pl.DataFrame:
+    """Transactions of two (department, property type) groups over several years."""
+    from datetime import date
+    
+    return pl.DataFrame({
+        "id_mutation": ["M1", "M2", "M3", "M4", "M5"],
+        "date_mutation": [
+            date(2024, 3, 1), date(2024, 6, 1), date(2025, 1, 1),
+            date(2023, 5, 1), date(2024, 5, 1),
+        ],
+        "code_departement": ["75", "75", "75", "69", "69"],
+        "type_local": ["Appartement", "Appartement", "Appartement", "Maison", "Maison"],
+        "prix_m2": [4000.0, 6000.0, 5500.0, 2000.0, 3000.0],
+    })
+
+
+def test_compute_time_adjusted_price_scales_to_reference_year_median(priced_transactions: pl.DataFrame):
+    """Prices are scaled by the reference year median over the transaction year median."""
+    # Act
+    result = process_dvf.compute_time_adjusted_price(priced_transactions.lazy(), reference_year=2025).collect()
+    
+    # Assert
+    paris = result.filter(pl.col("code_departement") == "75").sort("id_mutation")
+    assert paris["annee_mutation"].to_list() == [2024, 2024, 2025]
+    assert paris["prix_m2_ajuste"].to_list() == pytest.approx([4400.0, 6600.0, 5500.0])
+
+
+def test_compute_time_adjusted_price_falls_back_to_latest_year(priced_transactions: pl.DataFrame):
+    """Groups without reference year data are scaled to their latest year's median."""
+    # Act
+    result = process_dvf.compute_time_adjusted_price(priced_transactions.lazy(), reference_year=2025).collect()
+    
+    # Assert
+    lyon = result.filter(pl.col("code_departement") == "69").sort("id_mutation")
+    assert lyon["prix_m2_ajuste"].to_list() == pytest.approx([3000.0, 3000.0])
+
+
+def test_compute_time_adjusted_price_keeps_rows_and_drops_intermediate_columns(priced_transactions: pl.DataFrame):
+    """Only annee_mutation and prix_m2_ajuste are added, in the original row order."""
+    # Act
+    result = process_dvf.compute_time_adjusted_price(priced_transactions.lazy()).collect()
+    
+    # Assert
+    assert result.columns == [*priced_transactions.columns, "annee_mutation", "prix_m2_ajuste"]
+    assert result["id_mutation"].to_list() == priced_transactions["id_mutation"].to_list()
+
+
 # --- Tests for remove_extreme_outliers ---
 
 def test_remove_extreme_outliers_keeps_valid_rows():
@@ -1232,7 +1382,7 @@ def test_remove_extreme_outliers_keeps_valid_rows():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 3
@@ -1251,7 +1401,7 @@ def test_remove_extreme_outliers_filters_small_surface():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1271,7 +1421,7 @@ def test_remove_extreme_outliers_filters_large_surface():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1291,7 +1441,7 @@ def test_remove_extreme_outliers_filters_low_valeur_fonciere():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1311,7 +1461,7 @@ def test_remove_extreme_outliers_filters_high_valeur_fonciere():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1331,7 +1481,7 @@ def test_remove_extreme_outliers_filters_low_prix_m2():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1351,7 +1501,7 @@ def test_remove_extreme_outliers_filters_high_prix_m2():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1371,7 +1521,7 @@ def test_remove_extreme_outliers_filters_zero_pieces():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1391,7 +1541,7 @@ def test_remove_extreme_outliers_filters_high_pieces():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1411,7 +1561,7 @@ def test_remove_extreme_outliers_handles_empty_dataframe():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 0
@@ -1432,7 +1582,7 @@ def test_remove_extreme_outliers_preserves_other_columns():
     })
     
     # Act
-    result = remove_extreme_outliers(df)
+    result = remove_extreme_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 2
@@ -1457,7 +1607,7 @@ def test_remove_iqr_outliers_keeps_small_communes_unchanged():
     })
     
     # Act
-    result = remove_iqr_outliers(df)
+    result = remove_iqr_outliers(df.lazy()).collect()
     
     # Assert - all 5 rows should be kept because commune has < 10 transactions
     assert len(result) == 5
@@ -1495,7 +1645,7 @@ def test_remove_iqr_outliers_filters_outliers_in_large_communes():
     })
     
     # Act
-    result = remove_iqr_outliers(df)
+    result = remove_iqr_outliers(df.lazy()).collect()
     
     # Assert - outliers should be removed
     assert len(result) < 12
@@ -1533,7 +1683,7 @@ def test_remove_iqr_outliers_handles_multiple_communes():
     })
     
     # Act
-    result = remove_iqr_outliers(df)
+    result = remove_iqr_outliers(df.lazy()).collect()
     
     # Assert
     small_commune_result = result.filter(pl.col("code_commune") == "75101")
@@ -1559,7 +1709,7 @@ def test_remove_iqr_outliers_handles_empty_dataframe():
     })
     
     # Act
-    result = remove_iqr_outliers(df)
+    result = remove_iqr_outliers(df.lazy()).collect()
     
     # Assert
     assert len(result) == 0
@@ -1581,7 +1731,7 @@ def test_remove_iqr_outliers_preserves_other_columns():
     })
     
     # Act
-    result = remove_iqr_outliers(df)
+    result = remove_iqr_outliers(df.lazy()).collect()
     
     # Assert - small commune, all kept
     assert len(result) == 5
@@ -1603,7 +1753,7 @@ def test_remove_iqr_outliers_removes_temporary_columns():
     })
     
     # Act
-    result = remove_iqr_outliers(df)
+    result = remove_iqr_outliers(df.lazy()).collect()
     
     # Assert - temporary columns should not be in output
     assert "commune_count" not in result.columns
@@ -1613,6 +1763,41 @@ def test_remove_iqr_outliers_removes_temporary_columns():
     assert "prix_m2_max" not in result.columns
 
 
+def test_remove_iqr_outliers_bounds_match_polars_quantile():
+    """Q1/Q3 picked from the sorted lists give the same bounds as Expr.quantile."""
+    # Arrange
+    from process_dvf import remove_iqr_outliers
+    
+    n = 300
+    df = pl.DataFrame({
+        "code_commune": [f"{i % 7:05d}" for i in range(n)],
+        "valeur_fonciere": [float((i * 7919) % 99991) for i in range(n)],
+        "prix_m2": [None if i % 11 == 0 else float((i * 104729) % 9973) for i in range(n)],
+        "surface_batie_totale": [float((i * 31) % 257) for i in range(n)],
+        "nombre_pieces_principales": [(i * 13) % 9 for i in range(n)],
+    })
+    iqr_cols = ["valeur_fonciere", "prix_m2", "surface_batie_totale", "nombre_pieces_principales"]
+    bounds = df.group_by("code_commune").agg([
+        *[pl.col(col).quantile(0.25).alias(f"{col}_q1") for col in iqr_cols],
+        *[pl.col(col).quantile(0.75).alias(f"{col}_q3") for col in iqr_cols],
+    ])
+    expected = df.join(bounds, on="code_commune").filter(pl.all_horizontal([
+        pl.col(col).is_between(
+            pl.col(f"{col}_q1") - 1.5 * (pl.col(f"{col}_q3") - pl.col(f"{col}_q1")),
+            pl.col(f"{col}_q3") + 1.5 * (pl.col(f"{col}_q3") - pl.col(f"{col}_q1")),
+            closed="none",
+        )
+        for col in iqr_cols
+    ])).select(df.columns)
+    
+    # Act
+    result = remove_iqr_outliers(df.lazy()).collect()
+    
+    # Assert
+    assert result.columns == df.columns
+    assert result.sort(df.columns).equals(expected.sort(df.columns))
+
+
 # --- Tests for spatial_join_iris ---
 
 @pytest.fixture
@@ -1799,6 +1984,284 @@ def test_spatial_join_iris_code_iris_is_string_type(
     assert result["nom_iris"].dtype == pl.Utf8
 
 
+def test_spatial_join_iris_matches_points_across_chunks(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_iris_gdf,
+):
+    """Each point gets its own zone, in row order, whatever the chunk boundaries."""
+    # Arrange
+    from process_dvf import spatial_join_iris
+    
+    monkeypatch.setattr(process_dvf.gpd, "read_file", lambda path: mock_iris_gdf)
+    
+    df = pl.DataFrame({
+        "id_mutation": ["M1", "M2", "M3", "M4", "M5"],
+        "latitude": [48.8606, 45.7512, 0.0, 48.8606, 45.7512],
+        "longitude": [2.3376, 4.8331, 0.0, 2.3376, 4.8331],
+    })
+    
+    # Act
+    result = spatial_join_iris(df, chunk_size=2)
+    
+    # Assert
+    assert result["id_mutation"].to_list() == df["id_mutation"].to_list()
+    assert result["code_iris"].to_list() == ["751010101", "693810101", None, "751010101", "693810101"]
+    assert result["nom_iris"].to_list() == ["Palais Royal", "Terreaux", None, "Palais Royal", "Terreaux"]
+
+
+def test_match_iris_zones_keeps_first_zone_for_overlapping_polygons():
+    """Points inside overlapping zones get the first one, unmatched points get -1."""
+    # Arrange
+    import numpy as np
+    from shapely.geometry import box
+    from process_dvf import match_iris_zones
+    
+    iris_geoms = np.array([
+        box(651000, 6862000, 652000, 6863000),
+        box(651000, 6862000, 653000, 6863000),
+    ])
+    lon = np.array([2.3376, 0.0])
+    lat = np.array([48.8606, 0.0])
+    
+    # Act
+    result = match_iris_zones(lon, lat, iris_geoms)
+    
+    # Assert
+    assert result.tolist() == [0, -1]
+
+
+# --- Tests for load_aggregated_dvf ---
+
+def test_load_aggregated_dvf_reuses_cache_newer_than_raw_csv(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    temp_processed_dir: Path,
+):
+    """The aggregation runs once; later calls scan the cached Parquet file."""
+    # Arrange
+    raw_path = tmp_path / "dvf.csv"
+    raw_path.write_text("id_mutation\n")
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", raw_path)
+    aggregated = pl.DataFrame({"id_mutation": ["M1", "M2"], "numero_disposition": [1, 1]})
+    calls = []
+    
+    def fake_aggregate_dvf() -> pl.LazyFrame:
+        calls.append(1)
+        return aggregated.lazy()
+    
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", fake_aggregate_dvf)
+    
+    # Act
+    first = process_dvf.load_aggregated_dvf().collect()
+    second = process_dvf.load_aggregated_dvf().collect()
+    
+    # Assert
+    assert len(calls) == 1
+    assert (temp_processed_dir / "dvf_aggregated.parquet").exists()
+    assert first.equals(aggregated)
+    assert second.equals(aggregated)
+
+
+def test_load_aggregated_dvf_rebuilds_cache_when_raw_csv_is_newer(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    temp_processed_dir: Path,
+):
+    """A raw CSV modified after the cache was written triggers a new aggregation."""
+    # Arrange
+    import os
+    
+    raw_path = tmp_path / "dvf.csv"
+    raw_path.write_text("id_mutation\n")
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", raw_path)
+    temp_processed_dir.mkdir(parents=True)
+    cache_path = temp_processed_dir / "dvf_aggregated.parquet"
+    pl.DataFrame({"id_mutation": ["OLD"]}).write_parquet(
+        cache_path, metadata={process_dvf.AGGREGATION_VERSION_KEY: process_dvf.AGGREGATION_VERSION}
+    )
+    os.utime(cache_path, (0, 0))
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: pl.LazyFrame({"id_mutation": ["NEW"]}))
+    
+    # Act
+    result = process_dvf.load_aggregated_dvf().collect()
+    
+    # Assert
+    assert result["id_mutation"].to_list() == ["NEW"]
+    assert pl.read_parquet(cache_path)["id_mutation"].to_list() == ["NEW"]
+
+
+def test_load_aggregated_dvf_rebuilds_cache_from_another_version(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    temp_processed_dir: Path,
+):
+    """A cache written by another AGGREGATION_VERSION is rebuilt even if it is newer than the CSV."""
+    # Arrange
+    raw_path = tmp_path / "dvf.csv"
+    raw_path.write_text("id_mutation\n")
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", raw_path)
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: pl.LazyFrame({"id_mutation": ["OLD"]}))
+    process_dvf.load_aggregated_dvf()
+    monkeypatch.setattr(process_dvf, "AGGREGATION_VERSION", "next")
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: pl.LazyFrame({"id_mutation": ["NEW"]}))
+    
+    # Act
+    result = process_dvf.load_aggregated_dvf().collect()
+    
+    # Assert
+    cache_path = temp_processed_dir / "dvf_aggregated.parquet"
+    assert result["id_mutation"].to_list() == ["NEW"]
+    assert pl.read_parquet_metadata(cache_path)[process_dvf.AGGREGATION_VERSION_KEY] == "next"
+
+
+def test_load_aggregated_dvf_rebuilds_corrupt_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    temp_processed_dir: Path,
+):
+    """A cache that is not a readable parquet file is rebuilt."""
+    # Arrange
+    raw_path = tmp_path / "dvf.csv"
+    raw_path.write_text("id_mutation\n")
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", raw_path)
+    temp_processed_dir.mkdir(parents=True)
+    cache_path = temp_processed_dir / "dvf_aggregated.parquet"
+    cache_path.write_bytes(b"not a parquet file")
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: pl.LazyFrame({"id_mutation": ["NEW"]}))
+    
+    # Act
+    result = process_dvf.load_aggregated_dvf().collect()
+    
+    # Assert
+    assert result["id_mutation"].to_list() == ["NEW"]
+    assert pl.read_parquet_metadata(cache_path)[process_dvf.AGGREGATION_VERSION_KEY] == process_dvf.AGGREGATION_VERSION
+
+
+def test_load_aggregated_dvf_uses_cache_when_raw_csv_is_missing(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    temp_processed_dir: Path,
+):
+    """The cache is still used after the raw CSV has been deleted."""
+    # Arrange
+    raw_path = tmp_path / "dvf.csv"
+    raw_path.write_text("id_mutation\n")
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", raw_path)
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: pl.LazyFrame({"id_mutation": ["CACHED"]}))
+    process_dvf.load_aggregated_dvf()
+    raw_path.unlink()
+    
+    def fail_aggregate_dvf() -> pl.LazyFrame:
+        raise AssertionError("aggregate_dvf should not run")
+    
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", fail_aggregate_dvf)
+    
+    # Act
+    result = process_dvf.load_aggregated_dvf().collect()
+    
+    # Assert
+    assert result["id_mutation"].to_list() == ["CACHED"]
+
+
+# --- Tests for process_dvf ---
+
+def test_process_dvf_removes_extreme_outliers_before_region_join(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_region_mapping: pl.DataFrame,
+    temp_processed_dir: Path,
+):
+    """Rows failing the hard thresholds never reach add_region_information."""
+    # Arrange
+    from datetime import date
+    
+    aggregated = pl.DataFrame({
+        "id_mutation": ["M1", "M2"],
+        "numero_disposition": [1, 1],
+        "date_mutation": [date(2025, 1, 1), date(2025, 2, 1)],
+        "code_departement": ["75", "75"],
+        "code_commune": ["75101", "75101"],
+        "type_local": ["Appartement", "Appartement"],
+        "valeur_fonciere": [300000.0, 5000.0],
+        "surface_batie_totale": [50.0, 50.0],
+        "nombre_pieces_principales": [2, 2],
+    })
+    region_inputs = []
+    add_region_information = process_dvf.add_region_information
+    
+    def spy_add_region_information(df: pl.LazyFrame) -> pl.LazyFrame:
+        region_inputs.append(df.collect())
+        return add_region_information(df)
+    
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: aggregated.lazy())
+    monkeypatch.setattr(process_dvf, "load_region_mapping", lambda: mock_region_mapping)
+    monkeypatch.setattr(process_dvf, "add_region_information", spy_add_region_information)
+    monkeypatch.setattr(process_dvf, "spatial_join_iris", lambda df: df)
+    
+    # Act
+    result = process_dvf.process_dvf()
+    
+    # Assert
+    assert region_inputs[0]["id_mutation"].to_list() == ["M1"]
+    assert result["id_mutation"].to_list() == ["M1"]
+    assert result["nom_region"].to_list() == ["Île-de-France"]
+
+
+def test_process_dvf_raises_on_duplicate_mutation_disposition(
+    monkeypatch: pytest.MonkeyPatch,
+    mock_region_mapping: pl.DataFrame,
+    temp_processed_dir: Path,
+):
+    """A (id_mutation, numero_disposition) key seen twice means the reduction failed."""
+    # Arrange
+    from datetime import date
+    
+    aggregated = pl.DataFrame({
+        "id_mutation": ["M1", "M1", "M2"],
+        "numero_disposition": [1, 1, 1],
+        "date_mutation": [date(2025, 1, 1)] * 3,
+        "code_departement": ["75"] * 3,
+        "code_commune": ["75101"] * 3,
+        "type_local": ["Appartement"] * 3,
+        "valeur_fonciere": [300000.0, 310000.0, 320000.0],
+        "surface_batie_totale": [50.0, 50.0, 50.0],
+        "nombre_pieces_principales": [2, 2, 2],
+    })
+    monkeypatch.setattr(process_dvf, "aggregate_dvf", lambda: aggregated.lazy())
+    monkeypatch.setattr(process_dvf, "load_region_mapping", lambda: mock_region_mapping)
+    monkeypatch.setattr(process_dvf, "spatial_join_iris", lambda df: df)
+    
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="Reduce Failed"):
+        process_dvf.process_dvf()
+
+
+# --- Tests for encode_categoricals ---
+
+def test_encode_categoricals_casts_key_columns(sample_dvf_dataframe: pl.DataFrame):
+    """Test that department, commune and type_local become Categorical/Enum."""
+    # Act
+    result = process_dvf.encode_categoricals(sample_dvf_dataframe.lazy()).collect()
+    
+    # Assert
+    assert result.schema["code_departement"] == pl.Categorical
+    assert result.schema["code_commune"] == pl.Categorical
+    assert result.schema["type_local"] == pl.Enum(process_dvf.TYPE_LOCAL_VALUES)
+    assert result.schema["nom_commune"] == pl.Utf8
+    assert result["code_commune"].cast(pl.Utf8).to_list() == sample_dvf_dataframe["code_commune"].to_list()
+
+
+def test_encode_categoricals_skips_missing_columns():
+    """Test that frames without the key columns are returned unchanged."""
+    # Arrange
+    df = pl.DataFrame({"id_mutation": ["1"], "prix_m2": [5000.0]})
+    
+    # Act
+    result = process_dvf.encode_categoricals(df.lazy()).collect()
+    
+    # Assert
+    assert result.equals(df)
+
+
 # --- Tests for main ---
 
 @patch("process_dvf_final.process_dvf")
@@ -19,7 +19,6 @@ from process_dvf import (
     compute_total_surface_and_price,
     reduce_data,
     add_price_per_sqm,
-    add_first_parcel_id,
     load_region_mapping,
 )
 
@@ -78,7 +77,6 @@ def processed_dvf(sample_dvf_raw: pl.LazyFrame) -> pl.DataFrame:
     
     # Add derived columns
     df = add_price_per_sqm(df)
-    df = add_first_parcel_id(df)
     
     # Add region info
     region_mapping = load_region_mapping()
@@ -269,3 +267,45 @@ class TestDVFProcessingIntegration:
         # Assert - Should reduce by at least 2x (typically 3-5x)
         assert reduction_ratio >= 2.0, \
             f"Expected at least 2x reduction, got {reduction_ratio:.1f}x ({initial_rows} → {final_rows})"
+
+
+def test_aggregate_dvf_matches_step_by_step_pipeline(sample_dvf_raw: pl.LazyFrame, monkeypatch: pytest.MonkeyPatch):
+    """Filtering sale mutations before the grouping steps leaves the result unchanged."""
+    # Arrange
+    import process_dvf
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", SAMPLE_DVF_PATH)
+    
+    df = sample_dvf_raw.with_columns(pl.col("date_mutation").str.to_date("%Y-%m-%d"))
+    df = fill_nature_culture_nulls(df)
+    df = remove_duplicate_lines(df)
+    df = add_dependency(df)
+    df = drop_unwanted_values(df)
+    df = compute_total_surface_and_price(df)
+    expected = reduce_data(df).collect()
+    
+    # Act
+    result = process_dvf.aggregate_dvf().collect()
+    
+    # Assert - "first" values depend on row order after the joins, so
+    # only order-independent columns are compared
+    columns = [
+        "id_mutation", "numero_disposition", "date_mutation", "nature_mutation",
+        "valeur_fonciere", "nombre_pieces_principales", "surface_batie_totale",
+    ]
+    assert len(result) == EXPECTED_PROCESSED_ROWS
+    assert result.select(columns).sort(columns[:2]).equals(expected.select(columns).sort(columns[:2]))
+
+
+def test_aggregate_dvf_reads_only_used_columns(monkeypatch: pytest.MonkeyPatch):
+    """Columns no step uses (ancien_*, lots, numero_volume) are never parsed from the CSV."""
+    # Arrange
+    import process_dvf
+    if not SAMPLE_DVF_PATH.exists():
+        pytest.skip(f"Sample DVF file not found: {SAMPLE_DVF_PATH}")
+    monkeypatch.setattr(process_dvf, "RAW_DVF_PATH", SAMPLE_DVF_PATH)
+    
+    # Act
+    plan = process_dvf.aggregate_dvf().explain()
+    
+    # Assert
+    assert f"PROJECT 25/{len(DVF_SCHEMA)} COLUMNS" in plan
@@ -70,6 +70,24 @@ def get_content_type(filepath: Path) -> str:
     return mime_type or "application/octet-stream"
 
 
+def get_upload_source(filepath: Path) -> tuple[Path, str | None]:
+    """Get the file to send for filepath and its content encoding.
+    
+    GeoJSON files with a .geojson.gz copy (written by join_geometries) are
+    sent as the gzip bytes under the .geojson key, so R2 serves them
+    compressed to clients that accept it.
+    """
+    gz_path = filepath.with_name(f"{filepath.name}.gz")
+    if filepath.suffix.lower() == ".geojson" and gz_path.is_file():
+        return gz_path, "gzip"
+    return filepath, None
+
+
+def is_gzip_copy(filepath: Path) -> bool:
+    """Check if a file is the gzip copy of a GeoJSON, uploaded under its key."""
+    return filepath.name.lower().endswith(".geojson.gz")
+
+
 def create_r2_client():
     """Create an S3 client configured for R2."""
     if not all([ACCOUNT_ID, ACCESS_KEY_ID, SECRET_ACCESS_KEY]):
@@ -117,7 +135,8 @@ class ProgressCallback:
 def upload_file(client, filepath: Path, key: str) -> bool:
     """Upload a single file to R2."""
     content_type = get_content_type(filepath)
-    file_size = filepath.stat().st_size
+    source, content_encoding = get_upload_source(filepath)
+    file_size = source.stat().st_size
     size_mb = file_size / (1024 * 1024)
 
     logger.info(f"Uploading {key} ({size_mb:.1f} MB)...")
@@ -126,6 +145,8 @@ def upload_file(client, filepath: Path, key: str) -> bool:
         extra_args = {
             "ContentType": content_type,
         }
+        if content_encoding:
+            extra_args["ContentEncoding"] = content_encoding
         
         # For large files, use multipart upload
         config = boto3.s3.transfer.TransferConfig(
@@ -135,10 +156,10 @@ def upload_file(client, filepath: Path, key: str) -> bool:
         )
         
         # Progress callback for files > 1MB
-        callback = ProgressCallback(filepath) if size_mb > 1 else None
+        callback = ProgressCallback(source) if size_mb > 1 else None
 
         client.upload_file(
-            str(filepath),
+            str(source),
             BUCKET_NAME,
             key,
             ExtraArgs=extra_args,
@@ -160,7 +181,7 @@ def upload_directory(client, directory: Path, prefix: str = "") -> tuple[int, in
     failed = 0
 
     for filepath in sorted(directory.rglob("*")):
-        if filepath.is_file():
+        if filepath.is_file() and not is_gzip_copy(filepath):
             # Build the S3 key (path in bucket)
             relative_path = filepath.relative_to(directory)
             key = f"{prefix}/{relative_path}" if prefix else str(relative_path)
@@ -203,7 +224,7 @@ def upload_specific_files(client, files: list[Path], base_dir: Path, prefix: str
     failed = 0
 
     for filepath in files:
-        if filepath.is_file():
+        if filepath.is_file() and not is_gzip_copy(filepath):
             # Build the S3 key (path in bucket)
             relative_path = filepath.relative_to(base_dir)
             key = f"{prefix}/{relative_path}" if prefix else str(relative_path)
@@ -268,8 +289,9 @@ def main():
     else:
         # Upload all files
         files = [f for f in MAP_DIR.rglob("*") if f.is_file()]
+    files = [f for f in files if not is_gzip_copy(f)]
 
-    total_size = sum(f.stat().st_size for f in files)
+    total_size = sum(get_upload_source(f)[0].stat().st_size for f in files)
     logger.info(f"Found {len(files)} files to upload ({total_size / (1024 * 1024):.1f} MB)")
 
     # Upload
@@ -1,5 +1,6 @@
 """Utility modules for the DVF pipeline."""
 
 from utils.logger import get_logger, setup_logger, log_timed, format_duration
+from utils.quantiles import sorted_median, sorted_quantile
 
-__all__ = ["get_logger", "setup_logger", "log_timed", "format_duration"]
+__all__ = ["get_logger", "setup_logger", "log_timed", "format_duration", "sorted_median", "sorted_quantile"]
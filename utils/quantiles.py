@@ -0,0 +1,29 @@
+"""
+Quantiles of pre-sorted polars lists.
+
+Used by process_dvf (IQR outlier bounds) and aggregate_prices (quartiles):
+each group's values are sorted once into a list and every quantile is
+picked from it, matching Expr.quantile / Expr.median.
+
+Usage:
+    from utils.quantiles import sorted_median, sorted_quantile
+    
+    q1 = sorted_quantile(pl.col("prix_m2_sorted"), 0.25)
+"""
+
+import polars as pl
+
+
+def sorted_quantile(values: pl.Expr, quantile: float) -> pl.Expr:
+    """Nearest-rank quantile of a sorted list (same rule as Expr.quantile)."""
+    n = values.list.len().cast(pl.Int64)
+    idx = ((n - 1) * quantile + 0.5).floor().cast(pl.Int64)
+    return values.list.get(idx, null_on_oob=True)
+
+
+def sorted_median(values: pl.Expr) -> pl.Expr:
+    """Median of a sorted list (same interpolation as Expr.median)."""
+    n = values.list.len().cast(pl.Int64)
+    lower = values.list.get((n - 1) // 2, null_on_oob=True)
+    upper = values.list.get(n // 2, null_on_oob=True)
+    return lower + (upper - lower) * 0.5